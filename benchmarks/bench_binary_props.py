@@ -0,0 +1,54 @@
+"""Measure the cost of passing large binary props, such as icons, to libcanberra
+
+Binary values are handed to ``ca_proplist_set`` straight from their buffer,
+so the cost should be dominated by libcanberra's own copy of the data.
+
+    python benchmarks/bench_binary_props.py
+
+"""
+import os
+import timeit
+
+from canberra import Context, PropList, Props
+
+
+NUMBER = 200
+REPEAT = 5
+
+SIZES = [
+    ('4 KiB', 4 * 1024),
+    ('256 KiB', 256 * 1024),
+    ('4 MiB', 4 * 1024 * 1024),
+]
+
+
+def report(name: str, timings):
+    best = min(timings) / NUMBER
+    print(f'{name:<40} {best * 1e6:10.2f} us/call')
+
+
+def main():
+    ctx = Context()
+    ctx.set_driver('null')
+    ctx.open()
+
+    for label, size in SIZES:
+        icon = os.urandom(size)
+        mutable_icon = bytearray(icon)
+        base = PropList({Props.EVENT_ID: 'bell', Props.MEDIA_ICON: icon})
+
+        benches = {
+            f'PropList(media_icon=bytes) {label}': lambda: PropList(media_icon=icon),
+            f'PropList(media_icon=bytearray) {label}': lambda: PropList(media_icon=mutable_icon),
+            f'PropList(media_icon=memoryview) {label}': lambda: PropList(media_icon=memoryview(icon)),
+            f'overlay(event_id=...) {label}': lambda: base.overlay(event_id='complete'),
+            f'play(PropList) {label}': lambda: ctx.play(base),
+            f'play(media_icon=bytes) {label}': lambda: ctx.play(event_id='bell', media_icon=icon),
+        }
+
+        for name, fn in benches.items():
+            report(name, timeit.repeat(fn, number=NUMBER, repeat=REPEAT))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""Measure how much work other Python threads get done during blocking libcanberra calls
+
+A ticker thread increments a counter in a tight loop while the main thread
+calls open() and cache(). If the GIL is held during those calls, the ticker
+stalls; if it's released, the ticker keeps its usual pace.
+
+Run against a real sound server to see the effect of slow connects and
+sample uploads, or pass a driver name (e.g. ``null``) to run headless:
+
+    python benchmarks/bench_gil.py [driver]
+
+"""
+import sys
+import threading
+import time
+
+from canberra import Context
+
+
+class Ticker(threading.Thread):
+    def __init__(self):
+        super().__init__(daemon=True)
+        self.ticks = 0
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.is_set():
+            self.ticks += 1
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+
+def measure(name: str, fn):
+    ticker = Ticker()
+    ticker.start()
+    time.sleep(0.05)  # let the ticker get going
+
+    start_ticks = ticker.ticks
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    ticks = ticker.ticks - start_ticks
+
+    # Baseline pace of the ticker when the main thread is merely sleeping
+    base_start = ticker.ticks
+    time.sleep(max(elapsed, 0.01))
+    base_ticks = ticker.ticks - base_start
+
+    ticker.stop()
+
+    pace = ticks / base_ticks * 100 if base_ticks else 0
+    print(f'{name:<24} {elapsed * 1e3:9.2f} ms  other thread ran at {pace:5.1f}% of its idle pace')
+
+
+def main():
+    driver = sys.argv[1] if len(sys.argv) > 1 else None
+
+    ctx = Context(application_name='py-canberra GIL benchmark')
+    if driver:
+        ctx.set_driver(driver)
+
+    measure('open()', ctx.open)
+    measure('cache(event_id=bell)', lambda: ctx.cache(event_id='bell'))
+    measure('play(event_id=bell)', lambda: ctx.play(event_id='bell'))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,42 @@
+"""Measure how long importing canberra takes, and how long creating the first Context takes
+
+Each measurement runs in a fresh interpreter. Run with:
+
+    python benchmarks/bench_import.py
+
+"""
+import statistics
+import subprocess
+import sys
+
+
+RUNS = 20
+
+SNIPPETS = {
+    'import canberra': 'import canberra',
+    'import canberra; Context()': 'import canberra; canberra.Context()',
+}
+
+TIMER = '''
+import time
+start = time.perf_counter()
+{snippet}
+print(time.perf_counter() - start)
+'''
+
+
+def measure(snippet: str) -> float:
+    timings = []
+    for _ in range(RUNS):
+        output = subprocess.check_output([sys.executable, '-c', TIMER.format(snippet=snippet)])
+        timings.append(float(output))
+    return statistics.median(timings)
+
+
+def main():
+    for name, snippet in SNIPPETS.items():
+        print(f'{name:<32} {measure(snippet) * 1e3:8.2f} ms (median of {RUNS})')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+"""Compare playing sounds from a prebuilt PropList against passing props as kwargs
+
+Sounds are played through libcanberra's null driver, so no sound server is
+required. Run with:
+
+    python benchmarks/bench_proplist.py
+
+"""
+import itertools
+import timeit
+
+from canberra import Context, PropList
+
+
+NUMBER = 20_000
+REPEAT = 5
+
+PROPS = {
+    'event_id': 'bell',
+    'event_description': 'Build finished',
+    'media_role': 'event',
+    'application_name': 'py-canberra benchmark',
+    'canberra_cache_control': 'volatile',
+}
+
+
+def report(name: str, timings):
+    best = min(timings) / NUMBER
+    print(f'{name:<32} {best * 1e6:8.2f} us/call')
+
+
+def main():
+    ctx = Context()
+    ctx.set_driver('null')
+    ctx.open()
+
+    base = PropList(PROPS)
+
+    # change_props() skips props whose values haven't changed, so alternating
+    # between two sets of values measures the call into libcanberra
+    alternatives = [PROPS, {**PROPS, 'event_description': 'Build failed'}]
+    props_cycle = itertools.cycle(alternatives)
+    proplist_cycle = itertools.cycle([PropList(props) for props in alternatives])
+
+    benches = {
+        'build PropList': lambda: PropList(PROPS),
+        'overlay PropList': lambda: base.overlay(event_id='complete'),
+        'play(**kwargs)': lambda: ctx.play(**PROPS),
+        'play(PropList)': lambda: ctx.play(base),
+        'play(PropList, event_id=...)': lambda: ctx.play(base, event_id='complete'),
+        'change_props(**kwargs)': lambda: ctx.change_props(**next(props_cycle)),
+        'change_props(PropList)': lambda: ctx.change_props(next(proplist_cycle)),
+        'change_props(unchanged)': lambda: ctx.change_props(base),
+    }
+
+    for name, fn in benches.items():
+        report(name, timeit.repeat(fn, number=NUMBER, repeat=REPEAT))
+
+
+if __name__ == '__main__':
+    main()
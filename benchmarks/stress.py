@@ -0,0 +1,137 @@
+"""Hammer a shared Context from many threads, checking its bookkeeping stays consistent
+
+Threads play, cancel, query, and change the props of a single Context at
+random, through libcanberra's null driver. Once they stop, every sound
+started must have had its finish callback called exactly once, and the
+Context must report no sounds still playing. Run with:
+
+    python benchmarks/stress.py [--threads 32] [--seconds 10]
+
+Exits with a non-zero status if any check fails. A short, bounded run of
+the same checks is part of the test suite (``tests/test_stress.py``).
+
+"""
+import argparse
+import random
+import sys
+import threading
+import time
+from collections import Counter
+
+from canberra import Context, PropList
+from canberra.dispatch import get_dispatcher
+
+BELL = PropList(event_id='bell', media_role='event', canberra_cache_control='volatile')
+
+
+class Worker(threading.Thread):
+    def __init__(self, ctx: Context, seed: int, deadline: float, results: 'Results'):
+        super().__init__(daemon=True)
+        self.ctx = ctx
+        self.random = random.Random(seed)
+        self.deadline = deadline
+        self.results = results
+        self.ops = Counter()
+        self.error = None
+
+    def run(self):
+        try:
+            while time.monotonic() < self.deadline:
+                self.step()
+        except BaseException as e:
+            self.error = e
+
+    def step(self):
+        ctx = self.ctx
+        rand = self.random.random()
+        id = self.random.randrange(1, 64)
+
+        if rand < 0.5:
+            ctx.play(BELL, id=id, on_finished=self.results.finished, tags='stress')
+            self.results.started(1)
+            self.ops['play'] += 1
+        elif rand < 0.6:
+            results = ctx.play_many([{'props': BELL, 'id': id, 'on_finished': self.results.finished}] * 8)
+            self.results.started(sum(1 for r in results if not isinstance(r, Exception)))
+            self.ops['play_many'] += 1
+        elif rand < 0.75:
+            ctx.cancel(id)
+            self.ops['cancel'] += 1
+        elif rand < 0.8:
+            ctx.cancel_group('stress')
+            self.ops['cancel_group'] += 1
+        elif rand < 0.95:
+            ctx.playing(id)
+            ctx.active_count()
+            self.ops['playing'] += 1
+        else:
+            ctx.change_props(application_name=f'stress {self.random.randrange(100)}')
+            self.ops['change_props'] += 1
+
+
+class Results:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.num_started = 0
+        self.num_finished = 0
+        self.errors = Counter()
+
+    def started(self, n: int):
+        with self.lock:
+            self.num_started += n
+
+    def finished(self, context, id, error):
+        with self.lock:
+            self.num_finished += 1
+            self.errors[getattr(error, 'code', error)] += 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('-t', '--threads', type=int, default=32)
+    parser.add_argument('-s', '--seconds', type=float, default=10.0)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    ctx = Context(application_name='py-canberra stress')
+    ctx.set_driver('null')
+    ctx.open()
+
+    results = Results()
+    deadline = time.monotonic() + args.seconds
+    workers = [Worker(ctx, args.seed + i, deadline, results) for i in range(args.threads)]
+
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    # Let the remaining sounds finish, and their callbacks be dispatched
+    wait_deadline = time.monotonic() + 30
+    while time.monotonic() < wait_deadline:
+        stats = get_dispatcher().stats()
+        if ctx.active_count() == 0 and stats.depth == 0 and results.num_finished >= results.num_started:
+            break
+        time.sleep(0.05)
+
+    ops = sum((worker.ops for worker in workers), Counter())
+    print(f'{args.threads} threads, {args.seconds:g}s: ' + ', '.join(f'{n} {op}' for op, n in sorted(ops.items())))
+    print(f'{results.num_started} sounds started, {results.num_finished} callbacks: '
+          + ', '.join(f'{n} {code!r}' for code, n in results.errors.items()))
+
+    failures = [f'{worker.name} raised {worker.error!r}' for worker in workers if worker.error is not None]
+    if results.num_finished != results.num_started:
+        failures.append(f'{results.num_started} sounds started, but {results.num_finished} callbacks called')
+    if ctx.active_count() or ctx.active_ids():
+        failures.append(f'{ctx.active_count()} sounds still reported playing: {ctx.active_ids()}')
+    if get_dispatcher().stats().errors:
+        failures.append(f'{get_dispatcher().stats().errors} callbacks raised exceptions')
+
+    for failure in failures:
+        print(f'FAIL: {failure}', file=sys.stderr)
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,251 @@
+"""Benchmark suite, recording results as JSON to compare releases
+
+Every benchmark plays through libcanberra's null driver, so no sound server
+is required, and the suite runs headless on any Linux box. Run with:
+
+    python benchmarks/suite.py [-o results.json] [--compare baseline.json]
+
+Results are written as JSON, recording the py-canberra and Python versions
+alongside each benchmark's best time. Passing ``--compare`` prints the
+change of each benchmark relative to an earlier run.
+
+"""
+import argparse
+import itertools
+import json
+import platform
+import sys
+import threading
+import time
+import timeit
+from datetime import datetime, timezone
+from typing import Callable, Dict, List
+
+import canberra
+from canberra import Context, PropList, Props
+from canberra.dispatch import get_dispatcher
+
+DRIVER = 'null'
+
+PROPS = {
+    'event_id': 'bell',
+    'event_description': 'Build finished',
+    'media_role': 'event',
+    'application_name': 'py-canberra benchmark',
+    'canberra_cache_control': 'volatile',
+}
+
+
+def make_context() -> Context:
+    ctx = Context(application_name='py-canberra benchmark suite')
+    ctx.set_driver(DRIVER)
+    ctx.open()
+    return ctx
+
+
+def time_per_call(fn: Callable[[], None], number: int, repeat: int) -> Dict[str, float]:
+    timings = [t / number for t in timeit.repeat(fn, number=number, repeat=repeat)]
+    best = min(timings)
+    return {
+        'seconds_per_call': best,
+        'calls_per_second': 1 / best if best else float('inf'),
+        'mean_seconds_per_call': sum(timings) / len(timings),
+    }
+
+
+def bench_play(number: int, repeat: int) -> Dict[str, Dict[str, float]]:
+    ctx = make_context()
+    proplist = PropList(PROPS)
+
+    return {
+        'play.kwargs': time_per_call(lambda: ctx.play(**PROPS), number, repeat),
+        'play.proplist': time_per_call(lambda: ctx.play(proplist), number, repeat),
+        'play.callback': time_per_call(lambda: ctx.play(proplist, on_finished=_noop), number, repeat),
+        'play_many.100': {
+            key: value / 100 if key != 'calls_per_second' else value * 100
+            for key, value in time_per_call(
+                lambda: ctx.play_many([proplist] * 100), max(number // 100, 1), repeat,
+            ).items()
+        },
+    }
+
+
+def bench_context_calls(number: int, repeat: int) -> Dict[str, Dict[str, float]]:
+    ctx = make_context()
+    # change_props() skips props whose values haven't changed, so alternating
+    # between two values measures the call into libcanberra
+    names = itertools.cycle(['py-canberra', 'py-canberra-alt'])
+
+    return {
+        'cache': time_per_call(lambda: ctx.cache(**PROPS), number, repeat),
+        'change_props': time_per_call(lambda: ctx.change_props(application_name=next(names)), number, repeat),
+        'change_props.unchanged': time_per_call(lambda: ctx.change_props(application_name='py-canberra'), number, repeat),
+    }
+
+
+def bench_props(number: int, repeat: int) -> Dict[str, Dict[str, float]]:
+    proplist = PropList(PROPS)
+
+    return {
+        'props.from_kwargs': time_per_call(lambda: Props.from_kwargs(**PROPS), number, repeat),
+        'props.proplist': time_per_call(lambda: PropList(PROPS), number, repeat),
+        'props.overlay': time_per_call(lambda: proplist.overlay(event_id='message'), number, repeat),
+    }
+
+
+def bench_callback_latency(number: int, repeat: int) -> Dict[str, Dict[str, float]]:
+    """Time from play() returning to its finish callback being run"""
+    ctx = make_context()
+    proplist = PropList(PROPS)
+
+    latencies: List[float] = []
+    done = threading.Semaphore(0)
+
+    def on_finished(context, id, error, started):
+        latencies.append(time.perf_counter() - started)
+        done.release()
+
+    for _ in range(repeat):
+        for _ in range(number):
+            ctx.play(proplist, on_finished=on_finished, user_data=time.perf_counter())
+        for _ in range(number):
+            done.acquire()
+
+    latencies.sort()
+    stats = get_dispatcher().stats()
+    return {
+        'callback.latency': {
+            'seconds_median': latencies[len(latencies) // 2],
+            'seconds_p99': latencies[int(len(latencies) * 0.99)],
+            'seconds_max': latencies[-1],
+            'dispatcher_mean_seconds': stats.mean_latency,
+            'dispatcher_max_depth': stats.max_depth,
+        },
+    }
+
+
+def bench_threads(number: int, repeat: int, thread_counts=(1, 2, 4, 8)) -> Dict[str, Dict[str, float]]:
+    """Aggregate play throughput from several threads, sharing one context or each with its own"""
+    results = {}
+
+    for shared in (True, False):
+        for n in thread_counts:
+            shared_ctx = make_context() if shared else None
+            contexts = [shared_ctx or make_context() for _ in range(n)]
+            proplist = PropList(PROPS)
+
+            best = float('inf')
+            for _ in range(repeat):
+                barrier = threading.Barrier(n + 1)
+
+                def worker(ctx):
+                    barrier.wait()
+                    for _ in range(number):
+                        ctx.play(proplist)
+
+                threads = [threading.Thread(target=worker, args=(ctx,)) for ctx in contexts]
+                for thread in threads:
+                    thread.start()
+
+                barrier.wait()
+                start = time.perf_counter()
+                for thread in threads:
+                    thread.join()
+                best = min(best, time.perf_counter() - start)
+
+            name = f'threads.{"shared" if shared else "separate"}.{n}'
+            results[name] = {
+                'threads': n,
+                'seconds': best,
+                'seconds_per_call': best / (n * number),
+                'calls_per_second': n * number / best,
+            }
+
+    return results
+
+
+def _noop(*args):
+    pass
+
+
+BENCHMARKS = {
+    'play': bench_play,
+    'context': bench_context_calls,
+    'props': bench_props,
+    'callback': bench_callback_latency,
+    'threads': bench_threads,
+}
+
+
+def run(names: List[str], number: int, repeat: int) -> dict:
+    results = {}
+    for name in names:
+        print(f'running {name} ...', file=sys.stderr)
+        results.update(BENCHMARKS[name](number, repeat))
+
+    return {
+        'version': canberra.__version__,
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'date': datetime.now(timezone.utc).isoformat(),
+        'number': number,
+        'repeat': repeat,
+        'results': results,
+    }
+
+
+def headline(result: Dict[str, float]) -> float:
+    for key in ('seconds_per_call', 'seconds_median'):
+        if key in result:
+            return result[key]
+    raise KeyError('no timing found')
+
+
+def print_report(run_: dict, baseline: dict = None) -> None:
+    print(f'py-canberra {run_["version"]} on {run_["implementation"]} {run_["python"]}')
+    if baseline is not None:
+        print(f'compared to py-canberra {baseline["version"]} on {baseline["implementation"]} {baseline["python"]}')
+
+    for name, result in run_['results'].items():
+        seconds = headline(result)
+        line = f'{name:<28} {seconds * 1e6:10.2f} us'
+
+        if baseline is not None and name in baseline['results']:
+            before = headline(baseline['results'][name])
+            if before:
+                line += f'  {(seconds - before) / before * 100:+7.1f}%'
+
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('benchmarks', nargs='*', metavar='benchmark',
+                        help=f'benchmarks to run: {", ".join(BENCHMARKS)} (default: all)')
+    parser.add_argument('-n', '--number', type=int, default=10_000, help='calls per timing')
+    parser.add_argument('-r', '--repeat', type=int, default=5, help='timings per benchmark')
+    parser.add_argument('-o', '--output', help='write results as JSON to this file')
+    parser.add_argument('--compare', help='JSON results of an earlier run to compare against')
+    args = parser.parse_args()
+
+    unknown = set(args.benchmarks) - set(BENCHMARKS)
+    if unknown:
+        parser.error(f'unknown benchmarks: {", ".join(sorted(unknown))}')
+
+    results = run(args.benchmarks or list(BENCHMARKS), args.number, args.repeat)
+
+    if args.output:
+        with open(args.output, 'w') as fp:
+            json.dump(results, fp, indent=2)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as fp:
+            baseline = json.load(fp)
+
+    print_report(results, baseline)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,14 +1,18 @@
 __version__ = '0.0.4'
 
 from .constants import Props, Errors
-from ._canberra import Context
+from ._canberra import Context, ContextGroup, LibraryNotFoundError, PropList, drain_all
 from .convenience import play, play_file
 
 
 __all__ = [
     'Context',
+    'ContextGroup',
+    'PropList',
     'Props',
     'Errors',
+    'LibraryNotFoundError',
+    'drain_all',
     'play',
     'play_file',
 ]
@@ -0,0 +1,236 @@
+"""Command-line interface
+
+Play sounds by event id::
+
+    python -m canberra play bell complete
+
+Or play a stream of sounds, one per line of input, through a single
+long-lived context::
+
+    tail -F build.log | jq -c --unbuffered '{event_id: .sound}' | python -m canberra play --stream
+
+Each line of a stream is a JSON object of props (keyed by prop names, e.g.
+``"event.id"``, or their kwarg names, e.g. ``"event_id"``), or a bare event
+id. At most ``--max-concurrent`` sounds play at once; beyond that, input
+isn't read until a sound finishes (or, with ``--drop``, the sound is dropped),
+so a fast producer is slowed down rather than piling up sounds. A summary of
+throughput and errors is printed to stderr on exit.
+
+"""
+import argparse
+import json
+import os
+import stat
+import sys
+import threading
+from collections import Counter
+from time import perf_counter
+from typing import IO, Iterator, List, Optional
+
+from . import Context, PropList, Props
+from ._canberra import CanberraError, LibraryNotFoundError, drain_all
+from .constants import Errors
+
+
+class StreamStats:
+    """Counters of a stream of sounds"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.lines = 0
+        self.invalid = 0
+        self.dropped = 0
+        self.started = 0
+        self.finished = 0
+        self.errors: Counter = Counter()
+
+    def count_error(self, error) -> None:
+        if isinstance(error, CanberraError):
+            name = error.code.name
+        elif isinstance(error, Errors):
+            name = error.name
+        else:
+            name = type(error).__name__
+
+        with self._lock:
+            self.errors[name] += 1
+
+    def summary(self, seconds: float) -> str:
+        rate = self.started / seconds if seconds > 0 else 0.0
+        lines = [
+            f'{self.lines} lines in {seconds:.2f}s: '
+            f'{self.started} sounds started ({rate:.1f}/s), {self.finished} finished, '
+            f'{self.invalid} invalid, {self.dropped} dropped',
+        ]
+        for name, count in self.errors.most_common():
+            lines.append(f'  {name}: {count}')
+        return '\n'.join(lines)
+
+
+def parse_line(line: str) -> Optional[PropList]:
+    """Return the props of one line of a stream, or None if the line is blank
+
+    :raises ValueError: if the line isn't a bare event id or a JSON object of known props
+
+    """
+    line = line.strip()
+    if not line:
+        return None
+
+    if not line.startswith('{'):
+        return PropList({Props.EVENT_ID: line})
+
+    props = json.loads(line)
+    if not isinstance(props, dict):
+        raise ValueError('Expected a JSON object')
+
+    return PropList({
+        prop: value if isinstance(value, str) else json.dumps(value)
+        for prop, value in Props.from_kwargs(props).items()
+    })
+
+
+def read_lines(path: Optional[str]) -> Iterator[str]:
+    """Yield lines of input from stdin, a file, or a FIFO
+
+    A FIFO is reopened whenever its last writer closes it, so producers may
+    come and go.
+    """
+    if path is None or path == '-':
+        yield from sys.stdin
+        return
+
+    is_fifo = stat.S_ISFIFO(os.stat(path).st_mode)
+    while True:
+        with open(path) as fp:
+            yield from fp
+        if not is_fifo:
+            return
+
+
+def stream(context: Context,
+           lines: Iterator[str],
+           max_concurrent: int = 64,
+           drop: bool = False,
+           stats: StreamStats = None,
+           err: IO[str] = sys.stderr) -> StreamStats:
+    """Play a sound for each line, with at most ``max_concurrent`` playing at once"""
+    if stats is None:
+        stats = StreamStats()
+    slots = threading.BoundedSemaphore(max_concurrent)
+
+    def on_finished(ctx: Context, id: int, error) -> None:
+        slots.release()
+        with stats._lock:
+            stats.finished += 1
+        if error != Errors.SUCCESS:
+            stats.count_error(error)
+
+    for line in lines:
+        stats.lines += 1
+
+        try:
+            proplist = parse_line(line)
+        except (ValueError, TypeError) as e:
+            stats.invalid += 1
+            print(f'line {stats.lines}: {e}', file=err)
+            continue
+
+        if proplist is None:
+            continue
+
+        if not slots.acquire(blocking=not drop):
+            stats.dropped += 1
+            continue
+
+        try:
+            context.play(proplist, on_finished=on_finished)
+        except (CanberraError, MemoryError) as e:
+            slots.release()
+            stats.count_error(e)
+        else:
+            stats.started += 1
+
+    return stats
+
+
+def play(args: argparse.Namespace) -> int:
+    try:
+        context = Context(
+            {Props.APPLICATION_NAME: args.application_name},
+            driver=args.driver,
+            device=args.device,
+        )
+        context.open()
+    except (CanberraError, LibraryNotFoundError) as e:
+        print(f'python -m canberra: {e}', file=sys.stderr)
+        return 1
+
+    if not args.stream:
+        if not args.event_ids:
+            print('Pass event ids to play, or --stream', file=sys.stderr)
+            return 2
+
+        failed = False
+        for event_id in args.event_ids:
+            try:
+                context.play(event_id=event_id)
+            except CanberraError as e:
+                print(f'{event_id}: {e}', file=sys.stderr)
+                failed = True
+        context.drain()
+        return 1 if failed else 0
+
+    import signal
+    # Stop reading, and print the summary, on SIGTERM, as on Ctrl+C
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+
+    stats = StreamStats()
+    started_at = perf_counter()
+    interrupted = False
+    try:
+        stream(context, read_lines(args.input), max_concurrent=args.max_concurrent, drop=args.drop, stats=stats)
+    except KeyboardInterrupt:
+        interrupted = True
+
+    # Wait for finish callbacks, too, so every sound is counted
+    drain_all(args.drain_timeout)
+    print(stats.summary(perf_counter() - started_at), file=sys.stderr)
+
+    if interrupted:
+        return 130
+    return 1 if stats.errors or stats.invalid else 0
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m canberra', description='Play event sounds with libcanberra')
+    commands = parser.add_subparsers(dest='command')
+    commands.required = True
+
+    play_parser = commands.add_parser('play', help='play sounds by event id, or a stream of sounds from input')
+    play_parser.add_argument('event_ids', nargs='*', metavar='EVENT_ID', help='event ids to play')
+    play_parser.add_argument('--stream', action='store_true',
+                             help='play a sound for each line of input: a JSON object of props, or an event id')
+    play_parser.add_argument('--input', metavar='PATH',
+                             help='file or FIFO to read the stream from (default: stdin)')
+    play_parser.add_argument('--max-concurrent', type=int, default=64,
+                             help='most sounds playing at once (default: 64)')
+    play_parser.add_argument('--drop', action='store_true',
+                             help='drop sounds beyond --max-concurrent, rather than waiting to read more input')
+    play_parser.add_argument('--drain-timeout', type=float, default=10.0,
+                             help='seconds to wait for playing sounds on exit (default: 10)')
+    play_parser.add_argument('--driver', help='backend driver, e.g. pulse or null')
+    play_parser.add_argument('--device', help='backend device')
+    play_parser.add_argument('--application-name', default='py-canberra',
+                             help='application.name of the context')
+
+    args = parser.parse_args(argv)
+    if args.command == 'play':
+        if args.max_concurrent < 1:
+            parser.error('--max-concurrent must be at least 1')
+        return play(args)
+    return 2
+
+
+if __name__ == '__main__':
+    sys.exit(main())
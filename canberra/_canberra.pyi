@@ -1,27 +1,122 @@
-from typing import Any, Callable, Dict, Union
+import os
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
 
 from canberra._canberra import CanberraError
 from canberra.constants import Errors, Props, NOTSET
+from canberra.drivers import DriverCache, DriverChoice
+from canberra.stats import Stats
+from canberra.theme import ThemeResolver
 
 OnFinishedCallbackWithoutArg = Callable[['Context', int, Union[Errors, CanberraError]], Any]
 OnFinishedCallbackWithArg = Callable[['Context', int, Union[Errors, CanberraError], Any], Any]
 OnFinishedCallback = Union[OnFinishedCallbackWithArg, OnFinishedCallbackWithoutArg]
 
 
+class LibraryNotFoundError(OSError): ...
+
+
+PropValue = Union[str, bytes, bytearray, memoryview]
+
+
+class PropList:
+    def __init__(self, props: Dict[Union[str, Props], PropValue] = None, **other_props: PropValue): ...
+    def update(self, props: Dict[Union[str, Props], PropValue] = None, **other_props: PropValue) -> None: ...
+    def overlay(self, props: Dict[Union[str, Props], PropValue] = None, **other_props: PropValue) -> 'PropList': ...
+    def copy(self) -> 'PropList': ...
+    def items(self) -> List[Tuple[str, Union[str, bytes]]]: ...
+    def __len__(self) -> int: ...
+    def __contains__(self, prop: Union[str, Props]) -> bool: ...
+    def __getitem__(self, prop: Union[str, Props]) -> Union[str, bytes]: ...
+
+
+PropsArg = Union[PropList, Dict[Union[str, Props], PropValue]]
+PlaySpec = Union[PropList, Dict[str, Any]]
+Result = Union[Errors, Exception]
+PlayResult = Result
+
+
 class Context:
-    def __init__(self, props: Dict[Union[str, Props], str] = None, **other_props: str): ...
+    resolver: Optional[ThemeResolver]
+    stats: Optional[Stats]
+    props_interval: float
+    @property
+    def props(self) -> Dict[str, Union[str, bytes]]: ...
+    @property
+    def ready(self) -> Optional[Future]: ...
+
+    def __init__(
+        self,
+        props: PropsArg = None,
+        *,
+        driver: Union[str, bytes] = None,
+        device: Union[str, bytes] = None,
+        connect: Optional[str] = None,
+        **other_props: str,
+    ): ...
     def set_driver(self, driver: Union[str, bytes]) -> None: ...
     def change_device(self, device: Union[str, bytes]) -> None: ...
     def open(self) -> None: ...
-    def change_props(self, props: Dict[Union[str, Props], str] = None, **other_props: str) -> None: ...
-    def cache(self, props: Dict[Union[str, Props], str] = None, **other_props: str) -> None: ...
+    def open_best(
+        self,
+        drivers: Iterable[Union[str, Tuple[str, Optional[str]]]] = None,
+        timeout: float = 2.0,
+        cache: Union[bool, str, os.PathLike, DriverCache] = True,
+    ) -> DriverChoice: ...
+    def change_props(self, props: PropsArg = None, *, defer: bool = False, **other_props: str) -> None: ...
+    def cache(self, props: PropsArg = None, **other_props: str) -> None: ...
     def play(
         self,
-        props: Dict[Union[str, Props], str] = None,
+        props: PropsArg = None,
         id: int = 0,
         on_finished: OnFinishedCallback = None,
         user_data=NOTSET,
+        tags: Union[str, Iterable[str]] = None,
         **other_props: str,
     ) -> None: ...
+    def play_many(self, specs: Iterable[PlaySpec]) -> List[PlayResult]: ...
     def cancel(self, id: int = 0) -> None: ...
+    def cancel_many(self, ids: Iterable[int]) -> List[Result]: ...
+    def cancel_group(self, tag: str) -> List[Result]: ...
+    def cancel_all(self) -> List[Result]: ...
+    def active_ids(self, tag: str = None) -> List[int]: ...
+    def active_count(self, tag: str = None) -> int: ...
+    def playing(self, id: int = 0) -> bool: ...
+    def wait(self, id: int = 0, timeout: float = None) -> bool: ...
+    def drain(self, timeout: float = None) -> bool: ...
+
+
+GroupOnFinishedCallback = Union[
+    Callable[['ContextGroup', int, List[Optional[Union[Errors, CanberraError]]]], Any],
+    Callable[['ContextGroup', int, List[Optional[Union[Errors, CanberraError]]], Any], Any],
+]
+
+
+class ContextGroup:
+    def __init__(
+        self,
+        members: Iterable[Union[Context, Tuple[Optional[str], Optional[str]]]],
+        props: PropsArg = None,
+        **other_props: str,
+    ): ...
+    @property
+    def contexts(self) -> Tuple[Context, ...]: ...
+    def __len__(self) -> int: ...
+    def __iter__(self) -> Iterator[Context]: ...
+    def open(self) -> List[Result]: ...
+    def change_props(self, props: PropsArg = None, **other_props: str) -> List[Result]: ...
+    def play(
+        self,
+        props: PropsArg = None,
+        id: int = 0,
+        on_finished: GroupOnFinishedCallback = None,
+        user_data=NOTSET,
+        tags: Union[str, Iterable[str]] = None,
+        wait: str = 'all',
+        **other_props: str,
+    ) -> List[Result]: ...
+    def cancel(self, id: int = 0) -> List[Result]: ...
     def playing(self, id: int = 0) -> bool: ...
+
+
+def drain_all(timeout: float = None) -> bool: ...
@@ -1,16 +1,17 @@
 # distutils: language = c
 # cython: language_level=3
 
-from queue import Queue
-from threading import Event, Thread
-from typing import Any, Callable, Dict, Union
+import os
+from threading import Condition, Lock, RLock, Thread, Timer, local
+from time import monotonic, perf_counter
+from weakref import WeakSet
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
 
-from cpython.object cimport PyObject
-from cpython.pystate cimport PyGILState_STATE, PyGILState_Ensure, PyGILState_Release
+from cpython.buffer cimport PyBUF_SIMPLE, PyBuffer_Release, PyObject_CheckBuffer, PyObject_GetBuffer
 from cpython.ref cimport Py_INCREF, Py_DECREF
 from libc.stdint cimport uint32_t
 from libc.stdlib cimport malloc, free
-from posix.dlfcn cimport dlopen, RTLD_NOW, RTLD_GLOBAL, dlsym
+from posix.dlfcn cimport dlerror, dlopen, dlsym, RTLD_GLOBAL, RTLD_NOW
 
 from .constants import Props, Errors, NOTSET
 
@@ -45,53 +46,127 @@ cdef:
         CA_ERROR_FORKED = -17
         CA_ERROR_DISCONNECTED = -18
 
-    ctypedef void (*ca_finish_callback_t)(ca_context *c, uint32_t id, int error_code, void *userdata);
+    ctypedef void (*ca_finish_callback_t)(ca_context *c, uint32_t id, int error_code, void *userdata) nogil
 
-    ctypedef int (*ca_proplist_create_t)(ca_proplist **p);
-    ctypedef int (*ca_proplist_destroy_t)(ca_proplist *p);
-    ctypedef int (*ca_proplist_sets_t)(ca_proplist *p, const char *key, const char *value);
-    ctypedef int (*ca_proplist_setf_t)(ca_proplist *p, const char *key, const char *format, ...);
-    ctypedef int (*ca_proplist_set_t)(ca_proplist *p, const char *key, const void *data, size_t nbytes);
+    ctypedef int (*ca_proplist_create_t)(ca_proplist **p) nogil
+    ctypedef int (*ca_proplist_destroy_t)(ca_proplist *p) nogil
+    ctypedef int (*ca_proplist_sets_t)(ca_proplist *p, const char *key, const char *value) nogil
+    ctypedef int (*ca_proplist_setf_t)(ca_proplist *p, const char *key, const char *format, ...) nogil
+    ctypedef int (*ca_proplist_set_t)(ca_proplist *p, const char *key, const void *data, size_t nbytes) nogil
 
-    ctypedef int (*ca_context_create_t)(ca_context **c);
-    ctypedef int (*ca_context_set_driver_t)(ca_context *c, const char *driver);
-    ctypedef int (*ca_context_change_device_t)(ca_context *c, const char *device);
-    ctypedef int (*ca_context_open_t)(ca_context *c);
-    ctypedef int (*ca_context_destroy_t)(ca_context *c);
-    ctypedef int (*ca_context_change_props_t)(ca_context *c, ...);
-    ctypedef int (*ca_context_change_props_full_t)(ca_context *c, ca_proplist *p);
-    ctypedef int (*ca_context_play_full_t)(ca_context *c, uint32_t id, ca_proplist *p, ca_finish_callback_t cb, void *userdata);
-    ctypedef int (*ca_context_play_t)(ca_context *c, uint32_t id, ...);
-    ctypedef int (*ca_context_cache_full_t)(ca_context *c, ca_proplist *p);
-    ctypedef int (*ca_context_cache_t)(ca_context *c, ...);
-    ctypedef int (*ca_context_cancel_t)(ca_context *c, uint32_t id);
-    ctypedef int (*ca_context_playing_t)(ca_context *c, uint32_t id, int *playing);
+    ctypedef int (*ca_context_create_t)(ca_context **c) nogil
+    ctypedef int (*ca_context_set_driver_t)(ca_context *c, const char *driver) nogil
+    ctypedef int (*ca_context_change_device_t)(ca_context *c, const char *device) nogil
+    ctypedef int (*ca_context_open_t)(ca_context *c) nogil
+    ctypedef int (*ca_context_destroy_t)(ca_context *c) nogil
+    ctypedef int (*ca_context_change_props_t)(ca_context *c, ...) nogil
+    ctypedef int (*ca_context_change_props_full_t)(ca_context *c, ca_proplist *p) nogil
+    ctypedef int (*ca_context_play_full_t)(ca_context *c, uint32_t id, ca_proplist *p, ca_finish_callback_t cb, void *userdata) nogil
+    ctypedef int (*ca_context_play_t)(ca_context *c, uint32_t id, ...) nogil
+    ctypedef int (*ca_context_cache_full_t)(ca_context *c, ca_proplist *p) nogil
+    ctypedef int (*ca_context_cache_t)(ca_context *c, ...) nogil
+    ctypedef int (*ca_context_cancel_t)(ca_context *c, uint32_t id) nogil
+    ctypedef int (*ca_context_playing_t)(ca_context *c, uint32_t id, int *playing) nogil
 
-    ctypedef const char *(*ca_strerror_t)(int code);
+    ctypedef const char *(*ca_strerror_t)(int code) nogil
 
 
 cdef:
-    void *libcanberra = dlopen('libcanberra.so', RTLD_NOW | RTLD_GLOBAL)
-
-    ca_proplist_create_t ca_proplist_create                     = <ca_proplist_create_t>dlsym(libcanberra, 'ca_proplist_create')
-    ca_proplist_destroy_t ca_proplist_destroy                   = <ca_proplist_destroy_t>dlsym(libcanberra, 'ca_proplist_destroy')
-    ca_proplist_sets_t ca_proplist_sets                         = <ca_proplist_sets_t>dlsym(libcanberra, 'ca_proplist_sets')
-    ca_proplist_setf_t ca_proplist_setf                         = <ca_proplist_setf_t>dlsym(libcanberra, 'ca_proplist_setf')
-    ca_proplist_set_t ca_proplist_set                           = <ca_proplist_set_t>dlsym(libcanberra, 'ca_proplist_set')
-    ca_context_create_t ca_context_create                       = <ca_context_create_t>dlsym(libcanberra, 'ca_context_create')
-    ca_context_set_driver_t ca_context_set_driver               = <ca_context_set_driver_t>dlsym(libcanberra, 'ca_context_set_driver')
-    ca_context_change_device_t ca_context_change_device         = <ca_context_change_device_t>dlsym(libcanberra, 'ca_context_change_device')
-    ca_context_open_t ca_context_open                           = <ca_context_open_t>dlsym(libcanberra, 'ca_context_open')
-    ca_context_destroy_t ca_context_destroy                     = <ca_context_destroy_t>dlsym(libcanberra, 'ca_context_destroy')
-    ca_context_change_props_t ca_context_change_props           = <ca_context_change_props_t>dlsym(libcanberra, 'ca_context_change_props')
-    ca_context_change_props_full_t ca_context_change_props_full = <ca_context_change_props_full_t>dlsym(libcanberra, 'ca_context_change_props_full')
-    ca_context_play_full_t ca_context_play_full                 = <ca_context_play_full_t>dlsym(libcanberra, 'ca_context_play_full')
-    ca_context_play_t ca_context_play                           = <ca_context_play_t>dlsym(libcanberra, 'ca_context_play')
-    ca_context_cache_full_t ca_context_cache_full               = <ca_context_cache_full_t>dlsym(libcanberra, 'ca_context_cache_full')
-    ca_context_cache_t ca_context_cache                         = <ca_context_cache_t>dlsym(libcanberra, 'ca_context_cache')
-    ca_context_cancel_t ca_context_cancel                       = <ca_context_cancel_t>dlsym(libcanberra, 'ca_context_cancel')
-    ca_context_playing_t ca_context_playing                     = <ca_context_playing_t>dlsym(libcanberra, 'ca_context_playing')
-    ca_strerror_t ca_strerror                                   = <ca_strerror_t>dlsym(libcanberra, 'ca_strerror')
+    # Loaded on first use, by load_libcanberra()
+    void *libcanberra = NULL
+
+    ca_proplist_create_t ca_proplist_create
+    ca_proplist_destroy_t ca_proplist_destroy
+    ca_proplist_sets_t ca_proplist_sets
+    ca_proplist_setf_t ca_proplist_setf
+    ca_proplist_set_t ca_proplist_set
+    ca_context_create_t ca_context_create
+    ca_context_set_driver_t ca_context_set_driver
+    ca_context_change_device_t ca_context_change_device
+    ca_context_open_t ca_context_open
+    ca_context_destroy_t ca_context_destroy
+    ca_context_change_props_t ca_context_change_props
+    ca_context_change_props_full_t ca_context_change_props_full
+    ca_context_play_full_t ca_context_play_full
+    ca_context_play_t ca_context_play
+    ca_context_cache_full_t ca_context_cache_full
+    ca_context_cache_t ca_context_cache
+    ca_context_cancel_t ca_context_cancel
+    ca_context_playing_t ca_context_playing
+    ca_strerror_t ca_strerror
+
+
+#: The names libcanberra is looked up by, in order
+LIBCANBERRA_NAMES = ('libcanberra.so', 'libcanberra.so.0')
+
+
+class LibraryNotFoundError(OSError):
+    """Exception raised when libcanberra can't be loaded"""
+
+
+cdef void *resolve_symbol(void *handle, str name) except NULL:
+    cdef bytes b_name = name.encode('ascii')
+    cdef void *symbol = dlsym(handle, b_name)
+    if symbol is NULL:
+        raise LibraryNotFoundError(f'libcanberra is missing the symbol {name}')
+    return symbol
+
+
+cdef int load_libcanberra() except -1:
+    """Load libcanberra and resolve its symbols, if not already done
+
+    This is deferred until first needed, so merely importing canberra
+    doesn't pay for it (nor fail when libcanberra is absent).
+    """
+    global libcanberra
+    global ca_proplist_create, ca_proplist_destroy, ca_proplist_sets, ca_proplist_setf, ca_proplist_set, ca_context_create
+    global ca_context_set_driver, ca_context_change_device, ca_context_open, ca_context_destroy, ca_context_change_props
+    global ca_context_change_props_full, ca_context_play_full, ca_context_play, ca_context_cache_full, ca_context_cache
+    global ca_context_cancel, ca_context_playing, ca_strerror
+
+    cdef void *handle = NULL
+    cdef const char *reason
+    cdef bytes b_name
+
+    if libcanberra is not NULL:
+        return 0
+
+    errors = []
+    for name in LIBCANBERRA_NAMES:
+        b_name = name.encode('ascii')
+        handle = dlopen(b_name, RTLD_NOW | RTLD_GLOBAL)
+        if handle is not NULL:
+            break
+
+        reason = dlerror()
+        errors.append(reason.decode('utf-8', 'replace') if reason is not NULL else name)
+
+    if handle is NULL:
+        raise LibraryNotFoundError(
+            'Unable to load libcanberra. Is it installed? ' + '; '.join(errors))
+
+    ca_proplist_create = <ca_proplist_create_t>resolve_symbol(handle, 'ca_proplist_create')
+    ca_proplist_destroy = <ca_proplist_destroy_t>resolve_symbol(handle, 'ca_proplist_destroy')
+    ca_proplist_sets = <ca_proplist_sets_t>resolve_symbol(handle, 'ca_proplist_sets')
+    ca_proplist_setf = <ca_proplist_setf_t>resolve_symbol(handle, 'ca_proplist_setf')
+    ca_proplist_set = <ca_proplist_set_t>resolve_symbol(handle, 'ca_proplist_set')
+    ca_context_create = <ca_context_create_t>resolve_symbol(handle, 'ca_context_create')
+    ca_context_set_driver = <ca_context_set_driver_t>resolve_symbol(handle, 'ca_context_set_driver')
+    ca_context_change_device = <ca_context_change_device_t>resolve_symbol(handle, 'ca_context_change_device')
+    ca_context_open = <ca_context_open_t>resolve_symbol(handle, 'ca_context_open')
+    ca_context_destroy = <ca_context_destroy_t>resolve_symbol(handle, 'ca_context_destroy')
+    ca_context_change_props = <ca_context_change_props_t>resolve_symbol(handle, 'ca_context_change_props')
+    ca_context_change_props_full = <ca_context_change_props_full_t>resolve_symbol(handle, 'ca_context_change_props_full')
+    ca_context_play_full = <ca_context_play_full_t>resolve_symbol(handle, 'ca_context_play_full')
+    ca_context_play = <ca_context_play_t>resolve_symbol(handle, 'ca_context_play')
+    ca_context_cache_full = <ca_context_cache_full_t>resolve_symbol(handle, 'ca_context_cache_full')
+    ca_context_cache = <ca_context_cache_t>resolve_symbol(handle, 'ca_context_cache')
+    ca_context_cancel = <ca_context_cancel_t>resolve_symbol(handle, 'ca_context_cancel')
+    ca_context_playing = <ca_context_playing_t>resolve_symbol(handle, 'ca_context_playing')
+    ca_strerror = <ca_strerror_t>resolve_symbol(handle, 'ca_strerror')
+
+    libcanberra = handle
+    return 0
 
 
 class CanberraError(Exception):
@@ -101,6 +176,7 @@ class CanberraError(Exception):
         self.code = Errors(code)
 
         if msg is None:
+            load_libcanberra()
             msg = ca_strerror(code).decode('utf-8')
         self.msg = msg
 
@@ -116,73 +192,180 @@ cdef raise_if_error(int error):
         raise CanberraError(code=error)
 
 
+cdef error_result(int error):
+    """Return the result reported for a libcanberra error code, without raising"""
+    if error == CA_SUCCESS:
+        return Errors.SUCCESS
+
+    if error == CA_ERROR_OOM:
+        return MemoryError()
+
+    return CanberraError(code=error)
+
+
+cdef class _PlayRecord:
+    """The Python objects needed to dispatch the finish callback of one played sound
+
+    A reference to the record is handed to libcanberra as the userdata of
+    ``ca_context_play_full``, keeping the Context and callback alive until the
+    sound finishes.
+    """
+
+    cdef object context
+    cdef uint32_t id
+    cdef object on_finished
+    cdef object user_data
+    cdef tuple tags
+
+    # perf_counter() when the sound was played, if stats are being recorded; otherwise 0
+    cdef double started_at
+
+    # The stats collectors which counted the sound as started, and so count
+    # it as finished, too, even if collectors are swapped meanwhile
+    cdef list collectors
+
+
+cdef _PlayRecord make_play_record(context, uint32_t id, on_finished, user_data, tags):
+    cdef _PlayRecord record = _PlayRecord.__new__(_PlayRecord)
+    record.context = context
+    record.id = id
+    record.on_finished = on_finished
+    record.user_data = user_data
+    record.tags = expand_tags(tags)
+    return record
+
+
+cdef tuple expand_tags(tags):
+    """Expand hierarchical tags into every level, e.g. 'alerts/disk' into ('alerts', 'alerts/disk')"""
+    cdef list expanded = []
+    cdef list parts
+
+    if not tags:
+        return ()
+
+    if isinstance(tags, str):
+        tags = (tags,)
+
+    for tag in tags:
+        parts = tag.split('/')
+        for i in range(1, len(parts) + 1):
+            prefix = '/'.join(parts[:i])
+            if prefix not in expanded:
+                expanded.append(prefix)
+
+    return tuple(expanded)
+
+
+# Tracks whether the current thread is running a ca_finish_callback
+cdef object finish_callback_state = local()
+
+# canberra.dispatch is imported on first use, to keep importing canberra quick
+cdef object dispatch = None
+
+
+cdef object get_dispatcher():
+    """Return the current dispatcher, starting the callback thread if necessary"""
+    global dispatch
+    if dispatch is None:
+        from . import dispatch as dispatch_module
+        dispatch = dispatch_module
+    return dispatch.get_dispatcher()
+
+
+cdef submit_completion(context, uint32_t id, error, on_finished=None, user_data=NOTSET, started_at=None,
+                       collectors=()):
+    get_dispatcher().submit(dispatch.Completion(context, id, error, on_finished, user_data, started_at, collectors))
+
+
+# The module-wide stats collector, set by canberra.stats.enable()
+cdef object global_stats = None
+
+
+def _set_global_stats(stats):
+    global global_stats
+    global_stats = stats
+
+
+cdef list stats_collectors(Context context):
+    if context.stats is None or context.stats is global_stats:
+        return [global_stats] if global_stats is not None else []
+    if global_stats is None:
+        return [context.stats]
+    return [global_stats, context.stats]
+
+
+cdef record_play(_PlayRecord record, str name, int error, Py_ssize_t n=1):
+    """Record one of n plays which, altogether, took perf_counter() - record.started_at seconds"""
+    cdef double seconds = (perf_counter() - record.started_at) / n
+    for stats in record.collectors:
+        stats.record_call(name, seconds, error, record.context, started=1 if error == CA_SUCCESS else 0)
+
+
 cdef void ca_finish_callback(ca_context *ca, uint32_t id, int error_code, void *userdata) with gil:
-    cdef PyGILState_STATE gilstate
+    finish_callback_state.active = True
+    try:
+        dispatch_finished(id, error_code, userdata)
+    finally:
+        finish_callback_state.active = False
+
 
-    cdef PyObject **py_data = <PyObject **> userdata
-    cdef object context = <object>py_data[0]
-    cdef object callback = <object>py_data[1]
-    cdef object callback_arg = <object>py_data[2]
+cdef dispatch_finished(uint32_t id, int error_code, void *userdata):
+    cdef _PlayRecord record = <_PlayRecord>userdata
 
-    free(userdata)
+    (<Context>record.context).untrack(record)
+
+    if record.started_at:
+        for stats in record.collectors:
+            stats.record_finished()
 
     error = Errors(error_code)
     if error != Errors.SUCCESS:
         error = CanberraError(code=error)
 
-    gilstate = PyGILState_Ensure()
+    #
+    # ca_finish_callbacks are not allowed to call libcanberra API functions,
+    # as they may cause deadlocks (or fatal errors).
+    #
+    # We must be especially careful with DECREFing in the ca_finish_callback,
+    # as well, for if the Context gets GC'd during this callback,
+    # ca_context_destroy will be called on it, undoubtedly causing a fatal
+    # error. (Should the dispatcher release its reference before this
+    # function returns, Context.__dealloc__ defers the destruction to the
+    # dispatcher; see finish_callback_state.)
+    #
+    # So, instead of invoking user callbacks directly from the
+    # ca_finish_callback, we hand them to the dispatcher, to be run in a
+    # separate callback thread. The queued Completion keeps the Context alive,
+    # so it's safe to release the reference handed to libcanberra afterward.
+    #
     try:
-        #
-        # ca_finish_callbacks are not allowed to call libcanberra API functions,
-        # as they may cause deadlocks (or fatal errors).
-        #
-        # We must be especially careful with DECREFing in the ca_finish_callback,
-        # as well, for if the Context gets GC'd during this callback,
-        # ca_context_destroy will be called on it, undoubtedly causing a fatal
-        # error.
-        #
-        # So, instead of invoking user callbacks or DECREFing our context
-        # directly from the ca_finish_callback, we queue these to be run in a
-        # separate callback thread.
-        #
-        callback_queue.put_nowait((callback, context, id, error, callback_arg))
+        submit_completion(record.context, id, error, record.on_finished, record.user_data,
+                          record.started_at or None, record.collectors or ())
     finally:
-        PyGILState_Release(gilstate)
+        Py_DECREF(record)
 
 
-cdef callback_processor():
-    cdef object callback
-    cdef object context
-    cdef uint32_t id
-    cdef object error
-    cdef object callback_arg
+cdef class _DeferredContextDestroy:
+    """Destroys a ca_context once released, from whichever thread releases it"""
 
-    while True:
-        callback, context, id, error, callback_arg = callback_queue.get()
-
-        try:
-            if callback is not None:
-                if callback_arg is NOTSET:
-                    args = (context, id, error)
-                else:
-                    args = (context, id, error, callback_arg)
+    cdef ca_context *_ca_ctx
 
-                callback(*args)
-        finally:
-            Py_DECREF(context)
-            Py_DECREF(callback)
-            Py_DECREF(callback_arg)
+    def __dealloc__(self):
+        if self._ca_ctx is not NULL:
+            destroy_context(self._ca_ctx)
 
-            del context
-            del callback
-            del callback_arg
-            del error
 
+cdef destroy_context(ca_context *ca_ctx):
+    cdef _DeferredContextDestroy deferred
 
-cdef callback_queue = Queue()
-cdef callback_thread_canceled = Event()
-cdef callback_thread = Thread(name='py-canberra callback thread', target=callback_processor, daemon=True)
-callback_thread.start()
+    if getattr(finish_callback_state, 'active', False):
+        # Destroying the context from libcanberra's own thread would
+        # deadlock, so leave it to the dispatcher.
+        deferred = _DeferredContextDestroy.__new__(_DeferredContextDestroy)
+        deferred._ca_ctx = ca_ctx
+        submit_completion(deferred, 0, Errors.SUCCESS)
+    else:
+        ca_context_destroy(ca_ctx)
 
 
 OnFinishedCallbackWithoutArg = Callable[['Context', int, Union[Errors, CanberraError]], Any]
@@ -190,13 +373,18 @@ OnFinishedCallbackWithArg = Callable[['Context', int, Union[Errors, CanberraErro
 OnFinishedCallback = Union[OnFinishedCallbackWithArg, OnFinishedCallbackWithoutArg]
 
 
-cdef populate_propslist(ca_proplist *proplist,
-                        props: Dict[Union[str, Props], str],
-                        other_props: Dict[Union[str, Props], str]):
-    cdef bytes b_prop
-    cdef char *c_prop
-    cdef bytes b_value
-    cdef char *c_value
+PropValue = Union[str, bytes, bytearray, memoryview]
+
+
+cdef encode_props(props: Dict[Union[str, Props], PropValue],
+                  other_props: Dict[Union[str, Props], PropValue]):
+    """Return a list of (key, value) pairs, ready to be passed to libcanberra
+
+    Keys are bytes. String values are encoded to bytes; binary values (any
+    object supporting the buffer protocol) are wrapped in a memoryview, without
+    copying.
+    """
+    cdef list encoded = []
 
     prop_values = Props.from_kwargs(props, **other_props)
 
@@ -205,23 +393,409 @@ cdef populate_propslist(ca_proplist *proplist,
         # libcanberra property names need to be in 7bit ASCII, string
         # property values UTF8.
         #
-        b_prop = str(prop).encode('ascii')
-        c_prop = b_prop
+        if isinstance(value, str):
+            value = value.encode('utf-8')
+        elif PyObject_CheckBuffer(value):
+            value = memoryview(value)
+        else:
+            value = str(value).encode('utf-8')
+
+        encoded.append((str(prop).encode('ascii'), value))
+
+    return encoded
+
+
+cdef class PropList:
+    """A set of properties, encoded once and held in a native ``ca_proplist``
 
-        b_value = str(value).encode('utf-8')
-        c_value = b_value
+    Values may be strings, or binary data (e.g. the PNG data of
+    :attr:`.MEDIA_ICON`) as :class:`bytes`, :class:`bytearray`,
+    :class:`memoryview`, or any other object supporting the buffer protocol.
+    Binary values are passed to libcanberra straight from their buffer,
+    without copying; a PropList keeps a reference to the buffer, and changes
+    made to a mutable buffer afterward show up in later :meth:`overlay` calls.
+
+    A :class:`PropList` may be passed anywhere a props mapping is accepted
+    (:meth:`Context.play`, :meth:`Context.cache`, :meth:`Context.change_props`).
+    Unlike a mapping, which is translated and encoded on every call, a
+    :class:`PropList` is translated and encoded only when it's built, so it's
+    well-suited for sounds played over and over.
+
+    .. code-block:: python
+
+        bell = PropList(event_id='bell', media_role='event')
+        ctx.play(bell)
+
+        # Extra props are layered onto a copy of the PropList; the PropList
+        # itself is left unchanged.
+        ctx.play(bell, event_description='Build finished')
+
+    """
+
+    cdef ca_proplist *_proplist
+
+    # Encoded key -> encoded value, kept around so copies and overlays may be
+    # built without translating and encoding everything again. String values
+    # are stored as bytes, and binary values as memoryviews.
+    cdef dict _items
+
+    def __cinit__(self, *args, **kwargs):
+        self._proplist = NULL
+        self._items = {}
+
+        load_libcanberra()
+
+        error = ca_proplist_create(&self._proplist)
+        if self._proplist is NULL:
+            raise MemoryError()
 
-        error = ca_proplist_sets(proplist, c_prop, c_value)
         raise_if_error(error)
 
+    def __dealloc__(self):
+        if self._proplist is not NULL:
+            ca_proplist_destroy(self._proplist)
+
+    def __init__(self, props: Dict[Union[str, Props], PropValue] = None, **other_props: PropValue):
+        """Build a proplist from the specified props
+
+        :param props:
+            A mapping of :class:`Props` to values.
+
+        :param other_props:
+            :class:`Props` may also be passed as kwargs, where
+            ``{Props.EVENT_ID: 'bell'}`` is passed as ``event_id='bell'``.
+
+        """
+        self.update(props, **other_props)
+
+    cdef int _set(self, bytes key, object value) except -1:
+        cdef int error
+        cdef Py_buffer view
+
+        if type(value) is bytes:
+            error = ca_proplist_sets(self._proplist, key, <bytes>value)
+        else:
+            # Binary values are handed straight from their buffer to libcanberra
+            PyObject_GetBuffer(value, &view, PyBUF_SIMPLE)
+            try:
+                error = ca_proplist_set(self._proplist, key, view.buf, view.len)
+            finally:
+                PyBuffer_Release(&view)
+
+        raise_if_error(error)
+
+        self._items[key] = value
+        return 0
+
+    def update(self, props: Dict[Union[str, Props], PropValue] = None, **other_props: PropValue) -> None:
+        """Set one or more props, overwriting any previously-set values
+
+        :param props:
+            A mapping of :class:`Props` to values.
+
+        :param other_props:
+            :class:`Props` may also be passed as kwargs, where
+            ``{Props.EVENT_ID: 'bell'}`` is passed as ``event_id='bell'``.
+
+        """
+        for key, value in encode_props(props, other_props):
+            self._set(key, value)
+
+    def overlay(self, props: Dict[Union[str, Props], PropValue] = None, **other_props: PropValue) -> 'PropList':
+        """Return a new PropList containing these props, with the specified props layered on top
+
+        Only the overlaid props are translated and encoded; the props of this
+        PropList are copied over as-is.
+
+        :param props:
+            A mapping of :class:`Props` to values.
+
+        :param other_props:
+            :class:`Props` may also be passed as kwargs, where
+            ``{Props.EVENT_ID: 'bell'}`` is passed as ``event_id='bell'``.
+
+        """
+        cdef PropList result = PropList.__new__(PropList)
+
+        for key, value in self._items.items():
+            result._set(key, value)
+
+        if props or other_props:
+            result.update(props, **other_props)
+
+        return result
+
+    def copy(self) -> 'PropList':
+        """Return a copy of this PropList"""
+        return self.overlay()
+
+    def items(self) -> List[Tuple[str, Union[str, bytes]]]:
+        """Return a list of the ``(prop name, value)`` pairs in this PropList
+
+        String values are returned as :class:`str`, and binary values as
+        :class:`bytes`.
+        """
+        return [
+            (key.decode('ascii'), decode_prop_value(value))
+            for key, value in self._items.items()
+        ]
+
+    def __len__(self):
+        return len(self._items)
+
+    def __contains__(self, prop: Union[str, Props]):
+        return encode_prop_name(prop) in self._items
+
+    def __getitem__(self, prop: Union[str, Props]) -> Union[str, bytes]:
+        return decode_prop_value(self._items[encode_prop_name(prop)])
+
+    def __repr__(self):
+        return f'{type(self).__name__}({dict(self.items())!r})'
+
+
+PropsArg = Union[PropList, Dict[Union[str, Props], str]]
+
+
+cdef decode_prop_value(value):
+    if type(value) is bytes:
+        return (<bytes>value).decode('utf-8')
+    return bytes(value)
+
+
+cdef bytes encode_prop_name(prop):
+    if isinstance(prop, str) and not isinstance(prop, Props):
+        prop = Props.kwarg_names.get(prop) or Props(prop)
+    return str(prop).encode('ascii')
+
+
+cdef PropList to_proplist(props, dict other_props):
+    """Return props as a PropList, layering any other_props on top"""
+    if isinstance(props, PropList):
+        if other_props:
+            return (<PropList>props).overlay(None, **other_props)
+        return <PropList>props
+
+    return PropList(props, **other_props)
+
+
+PlaySpec = Union[PropList, Dict[str, Any]]
+Result = Union[Errors, Exception]
+PlayResult = Result
+
+
+cdef int decrement(dict counts, key) except -1:
+    cdef Py_ssize_t count = counts.get(key, 0) - 1
+    if count > 0:
+        counts[key] = count
+    else:
+        counts.pop(key, None)
+    return 0
+
+
+cdef tuple parse_play_spec(spec):
+    """Split a play_many() spec into (proplist, id, on_finished, user_data, tags)"""
+    cdef uint32_t id
+
+    if isinstance(spec, PropList):
+        return spec, 0, None, NOTSET, None
+
+    spec = dict(spec)
+    props = spec.pop('props', None)
+    id = spec.pop('id', 0)
+    on_finished = spec.pop('on_finished', None)
+    user_data = spec.pop('user_data', NOTSET)
+    tags = spec.pop('tags', None)
+
+    return to_proplist(props, spec), id, on_finished, user_data, tags
+
+
+cdef int configure_context(ca_context *ca_ctx, bytes driver, bytes device, dict props) except -1:
+    """Apply a driver, device, and props (encoded, as in Context._props) to a new ca_context"""
+    cdef PropList proplist
+
+    if driver is not None:
+        raise_if_error(ca_context_set_driver(ca_ctx, driver))
+
+    if device is not None:
+        raise_if_error(ca_context_change_device(ca_ctx, device))
+
+    if props:
+        proplist = PropList.__new__(PropList)
+        for key, value in props.items():
+            proplist._set(key, value)
+        raise_if_error(ca_context_change_props_full(ca_ctx, proplist._proplist))
+
+    return 0
+
+
+cdef class _Probe:
+    """A ca_context opened with one candidate driver by Context.open_best(), on a thread of its own"""
+
+    cdef ca_context *_ca_ctx
+    cdef object choice
+    cdef bytes driver
+    cdef bytes device
+    cdef dict props
+
+    # The error opening failed with, or None if it succeeded
+    cdef object error
+
+    def __dealloc__(self):
+        # Probes which lost to a more preferred driver are closed here
+        if self._ca_ctx is not NULL:
+            destroy_context(self._ca_ctx)
+
+    def run(self):
+        cdef int error
+        cdef ca_context *ca_ctx = NULL
+
+        try:
+            error = ca_context_create(&ca_ctx)
+            if ca_ctx is NULL:
+                raise MemoryError()
+            self._ca_ctx = ca_ctx
+
+            raise_if_error(error)
+            configure_context(ca_ctx, self.driver, self.device, self.props)
+
+            with nogil:
+                error = ca_context_open(ca_ctx)
+            raise_if_error(error)
+
+        except Exception as e:
+            self.error = e
+
+
+def _run_probe(_Probe probe, results):
+    try:
+        probe.run()
+    finally:
+        results.put(probe)
+
 
 cdef class Context:
-    """A libcanberra ``ca_context``"""
+    """A libcanberra ``ca_context``
+
+    The GIL is released while calling into libcanberra from :meth:`open`,
+    :meth:`change_props`, :meth:`cache`, :meth:`.play`, :meth:`.cancel`, and
+    :meth:`.cancel_many`, so other threads keep running while, e.g.,
+    connecting to the sound server or uploading a sample.
+
+    A Context may be shared by any number of threads:
+
+     - :meth:`.play`, :meth:`.play_many`, :meth:`cache`, :meth:`.cancel`, and
+       :meth:`.cancel_many` take no lock of their own, so concurrent calls
+       don't serialize on the Context; libcanberra guards each ``ca_context``
+       with its own mutex, held only briefly per call.
+     - :meth:`set_driver`, :meth:`change_device`, :meth:`open`, and
+       :meth:`change_props` are serialized with each other by a per-Context
+       lock. They may run concurrently with plays; a sound started while
+       props are changing is played with either the old or new props.
+     - The bookkeeping behind :meth:`.playing`, :meth:`active_ids`, and
+       :meth:`active_count` is updated with the GIL held, and is consistent
+       at all times.
+     - A Context is only destroyed once nothing references it: each sound
+       still playing, and each finish callback waiting to be dispatched,
+       holds a reference. If the last reference is released from
+       libcanberra's own thread, destruction is handed to the dispatcher.
+
+    Contexts survive ``fork()`` (e.g. into the workers of a pre-forking
+    server), which libcanberra contexts otherwise don't. In the child, each
+    Context is recreated the first time it's used, with the same driver,
+    device, and props, and reopened if it had been opened in the parent.
+    Sounds still playing in the parent are forgotten by the child; their
+    callbacks are only called in the parent. (This requires Python 3.7+.)
+
+    Connecting to the sound server may be started in the background when
+    the Context is created, with ``connect='background'``. Until it
+    completes, :meth:`.play` queues sounds, rather than blocking, and they're
+    played in order once connected. :meth:`.play_many`, :meth:`cache`, and
+    :meth:`open` wait for the connection; :meth:`.cancel` and
+    :meth:`.cancel_many` remove queued sounds.
+    """
 
     cdef ca_context *_ca_ctx
 
-    def __cinit__(self):
+    # Serializes changes to the configuration of the ca_context (and
+    # reconnecting), keeping the copy of it below consistent with the ca_context
+    cdef object _lock
+
+    # The configuration of the ca_context, replayed onto a new one when the
+    # context is first used in a forked child (see reconnect()). _props is
+    # also the shadow change_props() diffs against.
+    cdef bytes _driver
+    cdef bytes _device
+    cdef dict _props
+    cdef bint _opened
+
+    # Props changed with change_props(defer=True), and not yet sent; None if
+    # there are none. Guarded by _lock.
+    cdef dict _deferred_props
+
+    #: Seconds over which props changed with ``change_props(defer=True)`` are
+    #: gathered into a single call to libcanberra
+    cdef public double props_interval
+
+    # Records of sounds started and not yet finished
+    cdef set _records
+
+    # Sounds started and not yet finished: id -> number of sounds
+    cdef dict _active
+
+    # Sounds started and not yet finished, by tag: tag -> {id -> number of sounds}
+    cdef dict _tagged
+
+    # Notified whenever a sound finishes; created by the first wait() or drain()
+    cdef object _finished
+
+    # While connecting in the background, the sounds played meanwhile, as
+    # (proplist, record) pairs; None otherwise. Guarded by _queue_lock.
+    cdef list _queued
+    cdef object _queue_lock
+
+    #: With ``connect='background'``, a :class:`~concurrent.futures.Future`
+    #: resolving to ``None`` once the context is connected (and any sounds
+    #: queued meanwhile have been started), or raising the error connecting
+    #: failed with. ``None`` otherwise.
+    cdef readonly object ready
+
+    #: A :class:`~canberra.stats.Stats` collector recording this context's
+    #: calls and sounds, in addition to the module-wide collector enabled with
+    #: :func:`canberra.stats.enable`. ``None`` (the default) records nothing.
+    cdef public object stats
+
+    #: An optional :class:`~canberra.theme.ThemeResolver`, used to resolve the
+    #: :attr:`.EVENT_ID` of sounds played or cached into a :attr:`.MEDIA_FILENAME`.
+    #: Its ``resolve_props`` is passed each sound's proplist, along with a
+    #: read-only mapping of the context's props (as :attr:`props`) to fall
+    #: back on, e.g. for a theme name set with :meth:`change_props`.
+    cdef public object resolver
+
+    cdef object __weakref__
+
+    def __cinit__(self, *args, **kwargs):
         self._ca_ctx = NULL
+        self._lock = RLock()
+        self._driver = None
+        self._device = None
+        self._props = {}
+        self._opened = False
+        self._deferred_props = None
+        self.props_interval = 0.02
+        self._records = set()
+        self._active = {}
+        self._tagged = {}
+        self._finished = None
+        self._queued = None
+        self._queue_lock = Lock()
+        self.ready = None
+        self.stats = None
+        self.resolver = None
+
+        load_libcanberra()
+
+        # Start the callback thread, if not yet running
+        get_dispatcher()
 
         error = ca_context_create(&self._ca_ctx)
         if self._ca_ctx is NULL:
@@ -229,26 +803,330 @@ cdef class Context:
 
         raise_if_error(error)
 
+        all_contexts.add(self)
+
     def __dealloc__(self):
         if self._ca_ctx is not NULL:
-            ca_context_destroy(self._ca_ctx)
-
-    def __init__(self, props: Dict[Union[str, Props], str] = None, **other_props: str):
+            destroy_context(self._ca_ctx)
+
+    def __init__(self,
+                 props: PropsArg = None,
+                 *,
+                 driver: Union[str, bytes] = None,
+                 device: Union[str, bytes] = None,
+                 connect: str = None,
+                 **other_props: str):
         """Initialize the libcanberra ca_context, optionally with default props all sounds will share
 
         :param props:
-            A mapping of Props to values. These properties and values will be set
+            A PropList, or a mapping of Props to values. These properties and values will be set
             as defaults for all sounds played from this context.
 
+        :param driver:
+            The backend driver to use; see :meth:`set_driver`
+
+        :param device:
+            The backend device to use; see :meth:`change_device`
+
+        :param connect:
+            ``None`` (the default) to connect to the sound system on first
+            use, or ``'background'`` to start connecting right away, on a
+            thread of its own. Failing to connect doesn't raise here; see
+            :attr:`ready`.
+
         :param other_props:
             Props may also be passed as kwargs, where ``{Props.EVENT_ID: 'bell'}`` may
             be passed as ``event_id='bell'``. These properties and values will be set
             as defaults for all sounds played from this context.
 
         """
+        if connect not in (None, 'background'):
+            raise ValueError(f"connect must be None or 'background'. Found {connect!r}")
+
         if props or other_props:
             self.change_props(props, **other_props)
 
+        if driver is not None:
+            self.set_driver(driver)
+
+        if device is not None:
+            self.change_device(device)
+
+        if connect == 'background':
+            # concurrent.futures is imported only when needed, as it's slow to import
+            from concurrent.futures import Future
+
+            self._queued = []
+            self.ready = Future()
+            Thread(target=self._connect_in_background, name='canberra-connect', daemon=True).start()
+
+    def _connect_in_background(self):
+        error = None
+        try:
+            self.open_now()
+        except BaseException as e:
+            error = e
+
+        # The queue is only cleared once flushed, so until then, play(),
+        # cancel(), and wait_connected() keep finding it, and wait on the lock
+        # (or ready). So a sound played meanwhile is started after every
+        # queued sound, and a cancel reaches the queued sounds it names.
+        with self._queue_lock:
+            queued = self._queued
+            try:
+                if queued is not None:
+                    if error is None:
+                        self.play_queued(queued)
+                    else:
+                        for _, record in queued:
+                            self.fail_queued(record, error)
+            finally:
+                self._queued = None
+
+        if error is None:
+            self.ready.set_result(None)
+        else:
+            self.ready.set_exception(error)
+
+    cdef bint enqueue(self, PropList proplist, _PlayRecord record) except -1:
+        """Queue a sound until connected, returning False if no longer connecting"""
+        with self._queue_lock:
+            if self._queued is None:
+                return False
+
+            # As when played, the record is referenced and tracked until the
+            # sound finishes (or fails to start)
+            Py_INCREF(record)
+            self.track(record)
+            self._queued.append((proplist, record))
+
+        return True
+
+    cdef int play_queued(self, list queued) except -1:
+        cdef PropList proplist
+        cdef _PlayRecord record
+        cdef int error
+        cdef double started
+
+        for proplist, record in queued:
+            started = self.start_play(record)
+
+            with nogil:
+                error = ca_context_play_full(self._ca_ctx, record.id, proplist._proplist,
+                                             ca_finish_callback, <void *>record)
+
+            if started:
+                record_play(record, 'play', error)
+
+            if error != CA_SUCCESS:
+                self.fail_queued(record, error_result(error))
+
+        return 0
+
+    cdef int fail_queued(self, _PlayRecord record, error) except -1:
+        """Report a queued sound which won't be played to its callback, releasing its record"""
+        self.untrack(record)
+        if record.on_finished is not None:
+            submit_completion(self, record.id, error, record.on_finished, record.user_data)
+        Py_DECREF(record)
+        return 0
+
+    cdef bint cancel_queued(self, ids) except -1:
+        """Cancel queued sounds with any of the ids, returning False if no longer connecting"""
+        cdef list remaining = []
+
+        with self._queue_lock:
+            if self._queued is None:
+                return False
+
+            for proplist, record in self._queued:
+                if (<_PlayRecord>record).id in ids:
+                    self.fail_queued(record, CanberraError(Errors.CANCELED, 'Canceled'))
+                else:
+                    remaining.append((proplist, record))
+            self._queued = remaining
+
+        # Nothing is played through the ca_context until connected
+        return True
+
+    cdef int wait_connected(self) except -1:
+        """Wait for a background connect to finish, successfully or not"""
+        if self._queued is not None:
+            self.ready.exception()
+        return 0
+
+    cdef inline int ensure_connected(self) except -1:
+        if self._ca_ctx is NULL:
+            self.reconnect()
+        return 0
+
+    cdef int reconnect(self) except -1:
+        """Create a new ca_context, configured like the one lost to a fork"""
+        cdef int error
+        cdef ca_context *ca_ctx = NULL
+
+        with self._lock:
+            if self._ca_ctx is not NULL:
+                # Another thread reconnected first
+                return 0
+
+            error = ca_context_create(&ca_ctx)
+            if ca_ctx is NULL:
+                raise MemoryError()
+
+            # The new ca_context is only published once fully configured, so
+            # other threads never play through a half-configured one.
+            try:
+                raise_if_error(error)
+
+                configure_context(ca_ctx, self._driver, self._device, self._props)
+
+                if self._opened:
+                    with nogil:
+                        error = ca_context_open(ca_ctx)
+                    raise_if_error(error)
+
+            except BaseException:
+                ca_context_destroy(ca_ctx)
+                raise
+
+            self._ca_ctx = ca_ctx
+
+        return 0
+
+    cdef int forget_after_fork(self) except -1:
+        # The ca_context belongs to the parent process; libcanberra refuses to
+        # destroy it from the child, so it's simply abandoned.
+        self._ca_ctx = NULL
+
+        # Another thread may have held the lock at the time of the fork
+        self._lock = RLock()
+        self._finished = None
+
+        # The timer sending deferred props didn't survive the fork; they're
+        # sent along with the rest when the ca_context is recreated.
+        if self._deferred_props is not None:
+            self._props.update(self._deferred_props)
+            self._deferred_props = None
+
+        # The connecting thread, if any, didn't survive the fork. Queued
+        # sounds are the parent's (and are released with its records); the
+        # child connects on first use.
+        self._queue_lock = Lock()
+        self._queued = None
+        if self.ready is not None:
+            from concurrent.futures import Future
+            self.ready = Future()
+            self.ready.set_result(None)
+
+        if self.stats is not None:
+            self.stats._after_fork_in_child()
+
+        return 0
+
+    cdef int release_records(self) except -1:
+        # The parent's sounds will never finish in this process, so their
+        # records are released without calling their callbacks.
+        records, self._records = self._records, set()
+        self._active.clear()
+        self._tagged.clear()
+
+        for record in records:
+            Py_DECREF(record)
+
+        return 0
+
+    # track() and untrack() update the bookkeeping with the GIL held, only
+    # touching dicts keyed by ints and strs, which never release it; so each
+    # update is atomic with respect to other threads.
+
+    cdef int track(self, _PlayRecord record) except -1:
+        cdef dict ids
+
+        self._records.add(record)
+        self._active[record.id] = self._active.get(record.id, 0) + 1
+
+        for tag in record.tags:
+            ids = self._tagged.get(tag)
+            if ids is None:
+                ids = self._tagged[tag] = {}
+            ids[record.id] = ids.get(record.id, 0) + 1
+
+        return 0
+
+    cdef int untrack(self, _PlayRecord record) except -1:
+        # Called from ca_finish_callback, so this must not call into libcanberra
+        cdef dict ids
+
+        self._records.discard(record)
+        decrement(self._active, record.id)
+
+        for tag in record.tags:
+            ids = self._tagged.get(tag)
+            if ids is not None:
+                decrement(ids, record.id)
+                if not ids:
+                    del self._tagged[tag]
+
+        finished = self._finished
+        if finished is not None:
+            with finished:
+                finished.notify_all()
+
+        return 0
+
+    cdef object finished_condition(self):
+        # Created before the bookkeeping is checked, so a sound finishing
+        # between the check and the wait always notifies the waiter.
+        if self._finished is None:
+            self._finished = Condition()
+        return self._finished
+
+    cdef bint wait_until_finished(self, bint all_ids, uint32_t id, timeout) except -1:
+        """Wait until no sounds (with the id, unless all_ids) are playing, returning False on timeout"""
+        cdef object finished = self.finished_condition()
+        cdef double deadline = 0
+
+        if timeout is not None:
+            deadline = monotonic() + timeout
+
+        with finished:
+            while (self._active if all_ids else id in self._active):
+                if timeout is None:
+                    finished.wait()
+                else:
+                    remaining = deadline - monotonic()
+                    if remaining <= 0:
+                        return False
+                    finished.wait(remaining)
+
+        return True
+
+    cdef double start_timer(self):
+        """Return perf_counter(), if stats are being recorded for this context; otherwise 0"""
+        if global_stats is None and self.stats is None:
+            return 0
+        return perf_counter()
+
+    cdef double start_play(self, _PlayRecord record):
+        """Like start_timer(), noting on the record the collectors its sound is counted by"""
+        cdef double started = self.start_timer()
+        record.started_at = started
+        if started:
+            record.collectors = stats_collectors(self)
+        return started
+
+    cdef record_call(self, str name, double started, int error, Py_ssize_t n=1):
+        """Record one of n calls which, altogether, took perf_counter() - started seconds"""
+        cdef double seconds = (perf_counter() - started) / n
+        for stats in stats_collectors(self):
+            stats.record_call(name, seconds, error, self)
+
+    cdef PropList _resolve(self, PropList proplist):
+        if self.resolver is None:
+            return proplist
+        return self.resolver.resolve_props(proplist, _ContextProps(self))
+
     def set_driver(self, driver: Union[str, bytes]) -> None:
         """Specify the backend driver used
 
@@ -262,11 +1140,18 @@ cdef class Context:
             The backend driver to use (e.g. ``"alsa"``, ``"pulse"``, ``"null"``, ...)
 
         """
-        driver_bytes = driver if isinstance(driver, bytes) else driver.encode('utf-8')
+        cdef bytes driver_bytes = driver if isinstance(driver, bytes) else driver.encode('utf-8')
         cdef char *c_driver = driver_bytes
 
-        cdef int error = ca_context_set_driver(self._ca_ctx, c_driver)
-        raise_if_error(error)
+        cdef int error
+
+        with self._lock:
+            self.ensure_connected()
+
+            error = ca_context_set_driver(self._ca_ctx, c_driver)
+            raise_if_error(error)
+
+            self._driver = driver_bytes
 
     def change_device(self, device: Union[str, bytes]) -> None:
         """Specify the backend device to use
@@ -284,11 +1169,18 @@ cdef class Context:
             The backend device to use, in a format that is specific to the backend
 
         """
-        device_bytes = device if isinstance(device, bytes) else device.encode('utf-8')
+        cdef bytes device_bytes = device if isinstance(device, bytes) else device.encode('utf-8')
         cdef char *c_device = device_bytes
 
-        cdef int error = ca_context_change_device(self._ca_ctx, c_device)
-        raise_if_error(error)
+        cdef int error
+
+        with self._lock:
+            self.ensure_connected()
+
+            error = ca_context_change_device(self._ca_ctx, c_device)
+            raise_if_error(error)
+
+            self._device = device_bytes
 
     def open(self) -> None:
         """Connect the context to the sound system.
@@ -298,11 +1190,177 @@ cdef class Context:
         with :meth:`change_props` (or when creating :class:`Context`)
         before calling this function.
 
+        With ``connect='background'``, this waits for the background connect
+        to finish, and is retried if it failed.
+
         """
-        cdef int error = ca_context_open(self._ca_ctx)
-        raise_if_error(error)
+        if self.ready is not None and self.ready.exception() is None:
+            return
+
+        self.open_now()
+
+    cdef int open_now(self) except -1:
+        cdef int error
+        cdef double started
+
+        with self._lock:
+            self.ensure_connected()
 
-    def change_props(self, props: Dict[Union[str, Props], str] = None, **other_props: str) -> None:
+            started = self.start_timer()
+
+            with nogil:
+                error = ca_context_open(self._ca_ctx)
+
+            if started:
+                self.record_call('open', started, error)
+
+            raise_if_error(error)
+
+            self._opened = True
+
+        return 0
+
+    def open_best(self,
+                  drivers: Iterable[Union[str, Tuple[str, Optional[str]]]] = None,
+                  timeout: float = 2.0,
+                  cache: Union[bool, str, os.PathLike, 'DriverCache'] = True) -> 'DriverChoice':
+        """Connect the context through the most preferred driver which works
+
+        Each candidate driver is probed in parallel, each through a new
+        connection configured with this context's device and props. The
+        connection of the most preferred driver which opens within
+        :paramref:`.timeout` seconds is adopted by this context.
+
+        The winning driver is recorded per host in a
+        :class:`~canberra.drivers.DriverCache`, and on later calls (e.g. in
+        later processes), it's opened directly. The drivers are only probed
+        again if it fails.
+
+        This must be called before any sounds are played.
+
+        :param drivers:
+            Driver names, or ``(driver, device)`` pairs, in order of
+            preference. Defaults to :data:`~canberra.drivers.DEFAULT_DRIVERS`.
+
+        :param timeout:
+            Seconds to wait for the candidates to open. Candidates which
+            haven't opened by then are treated as failed.
+
+        :param cache:
+            ``True`` to use the default :class:`~canberra.drivers.DriverCache`,
+            a path or :class:`~canberra.drivers.DriverCache` to use another,
+            or ``False`` to probe every time.
+
+        :return:
+            The :class:`~canberra.drivers.DriverChoice` the context was opened with
+
+        :raises CanberraError:
+            with a ``code`` of :attr:`.NODRIVER`, if no candidate could be opened
+
+        """
+        from .drivers import DEFAULT_DRIVERS, DriverCache, to_choices
+
+        cdef _Probe probe
+
+        choices = to_choices(drivers if drivers is not None else DEFAULT_DRIVERS)
+        if not choices:
+            raise ValueError('No drivers to probe')
+
+        if cache is True:
+            driver_cache = DriverCache()
+        elif not cache:
+            driver_cache = None
+        elif isinstance(cache, DriverCache):
+            driver_cache = cache
+        else:
+            driver_cache = DriverCache(cache)
+
+        with self._lock:
+            if self._opened:
+                raise CanberraError(Errors.STATE, 'Context is already open')
+
+            known = driver_cache.get() if driver_cache is not None else None
+            if known is not None and known in choices:
+                probe, _ = self.probe_drivers([known], timeout)
+                if probe is not None:
+                    self.adopt_probe(probe)
+                    return known
+
+            probe, failures = self.probe_drivers(choices, timeout)
+            if probe is None:
+                if driver_cache is not None:
+                    driver_cache.discard()
+                raise CanberraError(Errors.NODRIVER, f'No driver could be opened ({"; ".join(failures)})')
+
+            if driver_cache is not None and probe.choice != known:
+                driver_cache.set(probe.choice)
+
+            self.adopt_probe(probe)
+            return probe.choice
+
+    cdef tuple probe_drivers(self, list choices, timeout):
+        """Open every choice in parallel, returning the most preferred probe which opened, and failures"""
+        cdef _Probe probe
+        cdef list probes = []
+        cdef set finished = set()
+        cdef double deadline = monotonic() + timeout
+
+        # queue is imported only when needed, as it's slow to import
+        from queue import Empty, Queue
+
+        results = Queue()
+
+        for choice in choices:
+            probe = _Probe.__new__(_Probe)
+            probe.choice = choice
+            probe.driver = choice.driver.encode('utf-8')
+            probe.device = choice.device.encode('utf-8') if choice.device is not None else self._device
+            probe.props = dict(self._props)
+            probes.append(probe)
+            Thread(target=_run_probe, args=(probe, results), name='canberra-probe', daemon=True).start()
+
+        while True:
+            timed_out = monotonic() >= deadline
+
+            # The most preferred probe which opened wins, once every more
+            # preferred probe has failed (or, on timeout, regardless).
+            for probe in probes:
+                if probe not in finished:
+                    if timed_out:
+                        continue
+                    break
+                if probe.error is None:
+                    return probe, []
+            else:
+                break
+
+            try:
+                finished.add(results.get(timeout=max(deadline - monotonic(), 0)))
+            except Empty:
+                pass
+
+        failures = [
+            f'{probe.choice.driver}: {probe.error if probe in finished else "timed out"}'
+            for probe in probes
+        ]
+        return None, failures
+
+    cdef int adopt_probe(self, _Probe probe) except -1:
+        """Replace the (unopened) ca_context with a probe's opened one"""
+        cdef ca_context *old = self._ca_ctx
+
+        self._ca_ctx = probe._ca_ctx
+        probe._ca_ctx = NULL
+
+        if old is not NULL:
+            destroy_context(old)
+
+        self._driver = probe.driver
+        self._device = probe.device
+        self._opened = True
+        return 0
+
+    def change_props(self, props: PropsArg = None, *, bint defer = False, **other_props: str) -> None:
         """Write one or more string properties to the Context
 
         Properties set like this will be attached to both the client object of
@@ -315,30 +1373,113 @@ cdef class Context:
         This method can be called both before and after the :meth:`open` call.
         Properties that have already been set before will be overwritten.
 
+        Only props whose values differ from the context's current props (see
+        :attr:`props`) are sent to libcanberra; if none do, libcanberra isn't
+        called at all. Binary values are always sent, as their buffers may
+        have changed in place.
+
         :param props:
-            A mapping of :class:`Props` to values.
+            A :class:`PropList`, or a mapping of :class:`Props` to values.
+
+        :param defer:
+            If true, rather than being sent right away, the props are gathered
+            with any others changed over the next :attr:`props_interval`
+            seconds, and sent in a single call (or before the next sound is
+            played or cached, if sooner). Errors sending deferred props are
+            logged, rather than raised.
 
         :param other_props:
             :class:`Props` may also be passed as kwargs, where
             ``{Props.EVENT_ID: 'bell'}`` is passed as ``event_id='bell'``.
 
         """
+        cdef PropList proplist = to_proplist(props, other_props)
+
+        with self._lock:
+            if not defer:
+                self.send_props(proplist._items)
+                return
+
+            if self._deferred_props is None:
+                self._deferred_props = {}
+                timer = Timer(self.props_interval, self._send_deferred_props)
+                timer.daemon = True
+                timer.start()
+
+            self._deferred_props.update(proplist._items)
+
+    @property
+    def props(self) -> Dict[str, Union[str, bytes]]:
+        """A copy of the props set on the context, by prop name
+
+        Props changed with ``change_props(defer=True)`` are included, even if
+        they haven't been sent to libcanberra yet.
+        """
+        cdef dict items = {}
+
+        with self._lock:
+            items.update(self._props)
+            if self._deferred_props is not None:
+                items.update(self._deferred_props)
+
+        return {key.decode('ascii'): decode_prop_value(value) for key, value in items.items()}
+
+    cdef int send_props(self, dict items) except -1:
+        """Send the props which differ from the shadow copy (along with any deferred props)"""
         cdef int error
-        cdef ca_proplist *proplist
+        cdef dict changed = {}
+        cdef PropList proplist
+        cdef double started
 
-        error = ca_proplist_create(&proplist)
-        raise_if_error(error)
+        with self._lock:
+            if self._deferred_props is not None:
+                # Deferred props are older, so they're overridden by the new ones
+                deferred, self._deferred_props = self._deferred_props, None
+                deferred.update(items)
+                items = deferred
 
-        try:
-            populate_propslist(proplist, props, other_props)
+            for key, value in items.items():
+                if type(value) is not bytes or self._props.get(key) != value:
+                    changed[key] = value
+
+            if not changed:
+                return 0
+
+            proplist = PropList.__new__(PropList)
+            for key, value in changed.items():
+                proplist._set(key, value)
+
+            self.ensure_connected()
+
+            started = self.start_timer()
+
+            with nogil:
+                error = ca_context_change_props_full(self._ca_ctx, proplist._proplist)
+
+            if started:
+                self.record_call('change_props', started, error)
 
-            error = ca_context_change_props_full(self._ca_ctx, proplist)
             raise_if_error(error)
 
-        finally:
-            ca_proplist_destroy(proplist)
+            self._props.update(changed)
 
-    def cache(self, props: Dict[Union[str, Props], str] = None, **other_props: str) -> None:
+        return 0
+
+    cdef int flush_deferred_props(self) except -1:
+        """Send any deferred props now, logging (rather than raising) errors"""
+        try:
+            if self._deferred_props is not None:
+                self.send_props({})
+        except Exception:
+            # logging is imported only when needed, as it's slow to import
+            import logging
+            logging.getLogger(__name__).exception('Error sending deferred props of %r', self)
+        return 0
+
+    def _send_deferred_props(self):
+        self.flush_deferred_props()
+
+    def cache(self, props: PropsArg = None, **other_props: str) -> None:
         """Upload the specified sample into the audio server and attach the specified properties to it
 
         This method will only return after the sample upload was finished.
@@ -350,7 +1491,7 @@ cdef class Context:
         will raise a :exc:`CanberraError` with a ``code`` of :attr:`.NOTSUPPORTED`.
 
         :param props:
-            A mapping of :class:`Props` to values.
+            A :class:`PropList`, or a mapping of :class:`Props` to values.
 
         :param other_props:
             :class:`Props` may also be passed as kwargs, where
@@ -358,26 +1499,36 @@ cdef class Context:
 
         """
         cdef int error
-        cdef ca_proplist *proplist
+        cdef PropList proplist = self._resolve(to_proplist(props, other_props))
+        cdef double started
 
-        error = ca_proplist_create(&proplist)
-        raise_if_error(error)
+        self.wait_connected()
 
-        try:
-            populate_propslist(proplist, props, other_props)
+        if self._deferred_props is not None:
+            self.flush_deferred_props()
 
-            error = ca_context_cache_full(self._ca_ctx, proplist)
-            raise_if_error(error)
+        self.ensure_connected()
 
-        finally:
-            ca_proplist_destroy(proplist)
+        started = self.start_timer()
+
+        with nogil:
+            error = ca_context_cache_full(self._ca_ctx, proplist._proplist)
+
+        if started:
+            self.record_call('cache', started, error)
+
+        raise_if_error(error)
+
+        # Caching implicitly opens the context
+        self._opened = True
 
     def play(
         self,
-        props: Dict[Union[str, Props], str] = None,
+        props: PropsArg = None,
         uint32_t id = 0,
         on_finished: OnFinishedCallback = None,
         user_data = NOTSET,
+        tags: Union[str, Iterable[str]] = None,
         **other_props: str,
     ) -> None:
         """Play one event sound
@@ -417,8 +1568,8 @@ cdef class Context:
         that matches the XDG sound name in :attr:`.EVENT_ID` is played.
 
         :param props:
-            A mapping of :class:`Props` to values describing additional
-            properties for this sound event.
+            A :class:`PropList`, or a mapping of :class:`Props` to values,
+            describing additional properties for this sound event.
 
         :param id:
             An integer id this sound can later be identified with when calling
@@ -441,6 +1592,13 @@ cdef class Context:
             An optional argument to be passed to the
             :paramref:`on_finished <Context.play.on_finished>` callback
 
+        :param tags:
+            An optional tag, or iterable of tags, to group this sound under,
+            for use with :meth:`active_ids`, :meth:`active_count`, and
+            :meth:`cancel_group`. Tags may be hierarchical, separated by
+            slashes: a sound tagged ``"alerts/disk"`` is also part of the
+            ``"alerts"`` group.
+
         :param other_props:
             :class:`Props` may also be passed as kwargs, where ``{Props.EVENT_ID: 'bell'}``
             is passed as ``event_id='bell'``, which describe additional
@@ -448,41 +1606,157 @@ cdef class Context:
 
         """
         cdef int error
-        cdef ca_proplist *proplist
-        cdef PyObject **ca_userdata
+        cdef PropList proplist = self._resolve(to_proplist(props, other_props))
+        cdef _PlayRecord record = make_play_record(self, id, on_finished, user_data, tags)
+        cdef double started
+
+        if self._queued is not None and self.enqueue(proplist, record):
+            return
+
+        if self._deferred_props is not None:
+            self.flush_deferred_props()
+
+        self.ensure_connected()
+
+        started = self.start_play(record)
+
+        Py_INCREF(record)
+        self.track(record)
+
+        with nogil:
+            error = ca_context_play_full(self._ca_ctx, id, proplist._proplist, ca_finish_callback, <void *>record)
+
+        if started:
+            record_play(record, 'play', error)
+
+        if error != CA_SUCCESS:
+            #
+            # If the call is not successful, our ca_finish_callback will not
+            # be called, so we must release the record's reference now.
+            #
+            self.untrack(record)
+            Py_DECREF(record)
 
-        error = ca_proplist_create(&proplist)
         raise_if_error(error)
 
-        try:
-            populate_propslist(proplist, props, other_props)
+        # Playing implicitly opens the context
+        self._opened = True
 
-            ca_userdata = <PyObject **>malloc(sizeof(PyObject *) * 3)
-            ca_userdata[0] = <PyObject *>self
-            ca_userdata[1] = <PyObject *>on_finished
-            ca_userdata[2] = <PyObject *>user_data
+    def play_many(self, specs: Iterable[PlaySpec]) -> List[PlayResult]:
+        """Play many event sounds at once
 
-            Py_INCREF(self)
-            Py_INCREF(on_finished)
-            Py_INCREF(user_data)
+        All props and callback records are prepared up front, then every sound
+        is submitted to libcanberra in a single loop, with the GIL released.
+        Failing sounds don't prevent the remaining sounds from being played;
+        instead, the outcome of each sound is returned.
 
-            error = ca_context_play_full(self._ca_ctx, id, proplist, ca_finish_callback, <void *>ca_userdata)
-            if error != CA_SUCCESS:
-                #
-                # If the call is not successful, our ca_finish_callback will not
-                # be called, so we must free our memory and decrement our references
-                # now.
-                #
-                free(ca_userdata)
+        .. code-block:: python
 
-                Py_DECREF(self)
-                Py_DECREF(on_finished)
-                Py_DECREF(user_data)
+            results = ctx.play_many([
+                PropList(event_id='bell'),
+                {'event_id': 'message-new-instant', 'id': 2, 'on_finished': done},
+            ])
 
-            raise_if_error(error)
+        :param specs:
+            An iterable of sounds to play. Each may be a :class:`PropList`, or
+            a mapping of the keyword arguments accepted by :meth:`.play`
+            (``props``, ``id``, ``on_finished``, ``user_data``, ``tags``, and
+            any :class:`Props` as kwargs).
+
+        :return:
+            A list with one result per spec, in order: :attr:`.SUCCESS` if the
+            sound was started, or the exception describing why it wasn't
+            (a :exc:`CanberraError`, or any error raised while preparing the
+            spec's props).
+
+        """
+        cdef list results = []
+        cdef list proplists = []
+        cdef list records = []
+        cdef list indices = []
+        cdef Py_ssize_t i, n
+        cdef PropList proplist
+        cdef _PlayRecord record
+        cdef ca_proplist **c_proplists = NULL
+        cdef uint32_t *c_ids = NULL
+        cdef void **c_userdata = NULL
+        cdef int *c_errors = NULL
+        cdef double started
+
+        for spec in specs:
+            try:
+                proplist, id, on_finished, user_data, tags = parse_play_spec(spec)
+                proplist = self._resolve(proplist)
+                record = make_play_record(self, id, on_finished, user_data, tags)
+            except Exception as e:
+                results.append(e)
+                continue
+
+            indices.append(len(results))
+            results.append(None)
+            proplists.append(proplist)
+            records.append(record)
+
+        n = len(records)
+        if n == 0:
+            return results
+
+        self.wait_connected()
+
+        if self._deferred_props is not None:
+            self.flush_deferred_props()
+
+        self.ensure_connected()
+
+        try:
+            c_proplists = <ca_proplist **>malloc(sizeof(ca_proplist *) * n)
+            c_ids = <uint32_t *>malloc(sizeof(uint32_t) * n)
+            c_userdata = <void **>malloc(sizeof(void *) * n)
+            c_errors = <int *>malloc(sizeof(int) * n)
+            if c_proplists is NULL or c_ids is NULL or c_userdata is NULL or c_errors is NULL:
+                raise MemoryError()
+
+            started = self.start_timer()
+            collectors = stats_collectors(self) if started else None
+
+            for i in range(n):
+                proplist = proplists[i]
+                record = records[i]
+                record.started_at = started
+                record.collectors = collectors
+                c_proplists[i] = proplist._proplist
+                c_ids[i] = record.id
+                c_userdata[i] = <void *>record
+                Py_INCREF(record)
+                self.track(record)
+
+            with nogil:
+                for i in range(n):
+                    c_errors[i] = ca_context_play_full(self._ca_ctx, c_ids[i], c_proplists[i],
+                                                       ca_finish_callback, c_userdata[i])
+
+            if started:
+                for i in range(n):
+                    record_play(records[i], 'play_many', c_errors[i], n)
+
+            for i in range(n):
+                if c_errors[i] != CA_SUCCESS:
+                    # ca_finish_callback won't be called for this sound
+                    record = records[i]
+                    self.untrack(record)
+                    Py_DECREF(record)
+                else:
+                    self._opened = True
+
+                results[indices[i]] = error_result(c_errors[i])
 
         finally:
-            ca_proplist_destroy(proplist)
+            free(c_proplists)
+            free(c_ids)
+            free(c_userdata)
+            free(c_errors)
+
+        return results
 
     def cancel(self, uint32_t id = 0) -> None:
         """Cancel one or more event sounds that have been started via :meth:`.play`
@@ -496,13 +1770,135 @@ cdef class Context:
 
         """
         cdef int error
+        cdef double started
+
+        if self._queued is not None and self.cancel_queued((id,)):
+            return
+
+        self.ensure_connected()
+
+        started = self.start_timer()
+
+        with nogil:
+            error = ca_context_cancel(self._ca_ctx, id)
+
+        if started:
+            self.record_call('cancel', started, error)
 
-        error = ca_context_cancel(self._ca_ctx, id)
         raise_if_error(error)
 
+    def cancel_many(self, ids: Iterable[int]) -> List[Result]:
+        """Cancel the event sounds with any of the specified ids
+
+        Every id is canceled in a single loop, with the GIL released. Failing
+        to cancel one id doesn't prevent the remaining ids from being canceled;
+        instead, the outcome of each is returned.
+
+        :param ids:
+            The IDs that identify the sounds to cancel
+
+        :return:
+            A list with one result per id, in order: :attr:`.SUCCESS`, or the
+            exception describing why canceling failed.
+
+        """
+        cdef list id_list = list(ids)
+        cdef Py_ssize_t i, n = len(id_list)
+        cdef uint32_t *c_ids = NULL
+        cdef int *c_errors = NULL
+        cdef double started
+
+        if n == 0:
+            return []
+
+        if self._queued is not None and self.cancel_queued(set(id_list)):
+            return [Errors.SUCCESS] * n
+
+        try:
+            c_ids = <uint32_t *>malloc(sizeof(uint32_t) * n)
+            c_errors = <int *>malloc(sizeof(int) * n)
+            if c_ids is NULL or c_errors is NULL:
+                raise MemoryError()
+
+            for i in range(n):
+                c_ids[i] = id_list[i]
+
+            self.ensure_connected()
+
+            started = self.start_timer()
+
+            with nogil:
+                for i in range(n):
+                    c_errors[i] = ca_context_cancel(self._ca_ctx, c_ids[i])
+
+            if started:
+                for i in range(n):
+                    self.record_call('cancel_many', started, c_errors[i], n)
+
+            return [error_result(c_errors[i]) for i in range(n)]
+
+        finally:
+            free(c_ids)
+            free(c_errors)
+
+    def cancel_group(self, tag: str) -> List[Result]:
+        """Cancel every event sound tagged with the specified tag (or a tag beneath it)
+
+        See :meth:`cancel_many` for the return value.
+
+        .. note::
+
+            Sounds are canceled by id, so sounds outside the group which share
+            an id with a sound inside it are canceled, too.
+
+        """
+        return self.cancel_many(self.active_ids(tag))
+
+    def cancel_all(self) -> List[Result]:
+        """Cancel every event sound still playing from this context
+
+        See :meth:`cancel_many` for the return value.
+
+        """
+        return self.cancel_many(self.active_ids())
+
+    def active_ids(self, tag: str = None) -> List[int]:
+        """Return the ids of the sounds still playing
+
+        This is answered from the context's own bookkeeping, without calling
+        into libcanberra.
+
+        :param tag:
+            If passed, only return ids of sounds tagged with this tag (or a
+            tag beneath it)
+
+        """
+        if tag is None:
+            return list(self._active)
+        return list(self._tagged.get(tag, ()))
+
+    def active_count(self, tag: str = None) -> int:
+        """Return the number of sounds still playing
+
+        This is answered from the context's own bookkeeping, without calling
+        into libcanberra.
+
+        :param tag:
+            If passed, only count sounds tagged with this tag (or a tag
+            beneath it)
+
+        """
+        if tag is None:
+            return sum(self._active.values())
+        return sum(self._tagged.get(tag, {}).values())
+
     def playing(self, uint32_t id = 0) -> bool:
         """Check if at least one sound with the specified id is still playing
 
+        Sounds are tracked from the moment they're played until their finish
+        callback is called, so this is answered without calling into
+        libcanberra.
+
         :param id:
             The ID that identifies the sound(s) to check
 
@@ -511,10 +1907,455 @@ cdef class Context:
             and ``False`` if no sounds with the specified ID are still playing
 
         """
-        cdef int error
-        cdef int playing
+        return id in self._active
 
-        error = ca_context_playing(self._ca_ctx, id, &playing)
-        raise_if_error(error)
+    def wait(self, uint32_t id = 0, timeout: float = None) -> bool:
+        """Block until every sound with the specified id has finished playing
+
+        The calling thread sleeps until woken by the finish callback of a
+        sound; no polling is involved. The sounds' ``on_finished`` callbacks
+        may still be waiting to be dispatched when this returns; use
+        :func:`canberra.drain_all` to wait for those, too.
+
+        :param id:
+            The ID that identifies the sound(s) to wait for
+
+        :param timeout:
+            The longest time, in seconds, to wait, or ``None`` to wait
+            indefinitely
+
+        :return:
+            ``True`` if the sounds finished, or ``False`` if the timeout
+            elapsed first
+
+        """
+        return self.wait_until_finished(False, id, timeout)
+
+    def drain(self, timeout: float = None) -> bool:
+        """Block until every sound played from this context has finished playing
+
+        See :meth:`wait`.
+
+        :param timeout:
+            The longest time, in seconds, to wait, or ``None`` to wait
+            indefinitely
+
+        :return:
+            ``True`` if all sounds finished, or ``False`` if the timeout
+            elapsed first
+
+        """
+        return self.wait_until_finished(True, 0, timeout)
+
+
+cdef class _ContextProps:
+    """A read-only view of a Context's props, by prop name, passed to its resolver
+
+    Unlike :attr:`Context.props`, nothing is copied or decoded until a prop is
+    looked up. Props changed with ``change_props(defer=True)`` are included.
+    """
+
+    cdef Context _context
+
+    def __init__(self, Context context):
+        self._context = context
+
+    cdef object _lookup(self, name):
+        cdef bytes key = str(name).encode('ascii')
+        deferred = self._context._deferred_props
+        if deferred is not None and key in deferred:
+            return deferred[key]
+        return self._context._props.get(key)
+
+    def get(self, name: Union[str, Props], default=None) -> Union[str, bytes, None]:
+        value = self._lookup(name)
+        if value is None:
+            return default
+        return decode_prop_value(value)
+
+    def __contains__(self, name: Union[str, Props]) -> bool:
+        return self._lookup(name) is not None
+
+    def __getitem__(self, name: Union[str, Props]) -> Union[str, bytes]:
+        value = self._lookup(name)
+        if value is None:
+            raise KeyError(name)
+        return decode_prop_value(value)
+
+
+cdef class _GroupPlayback:
+    """Collects the outcomes of one sound played by every member of a ContextGroup"""
+
+    cdef object group
+    cdef uint32_t id
+    cdef object on_finished
+    cdef object user_data
+    cdef list results
+    cdef Py_ssize_t remaining
+    cdef bint wait_all
+    cdef bint reported
+
+    def member_finished(self, context, uint32_t id, error, Py_ssize_t index):
+        self.finished(index, error, True)
+
+    cdef int finished(self, Py_ssize_t index, result, bint played) except -1:
+        # Runs with the GIL held and without calling Python code until the
+        # decision to report is made, so members finishing concurrently on
+        # separate dispatcher threads can't both report.
+        self.results[index] = result
+        self.remaining -= 1
+
+        if self.reported:
+            return 0
+
+        # With wait='first', a member failing to start doesn't count as the
+        # first to finish, unless no member started at all.
+        if self.remaining > 0 and (self.wait_all or not played):
+            return 0
+
+        self.reported = True
+        submit_completion(self.group, self.id, list(self.results), self.on_finished, self.user_data)
+        return 0
+
+
+cdef class ContextGroup:
+    """A set of contexts, e.g. one per output device, played through together
+
+    Each sound played by the group is handed to every member in a single loop,
+    with the GIL released. Its ``on_finished`` callback is called once for
+    the whole group: when every member has finished playing it, or, with
+    ``wait='first'``, when the first member has.
+
+    .. code-block:: python
+
+        group = ContextGroup([('pulse', 'speakers'), ('pulse', 'lobby-pa')],
+                             application_name='Announcer')
+        group.open()
+        group.play(event_id='message-new-instant', on_finished=announced)
+
+    """
+
+    cdef tuple _members
+
+    def __init__(self,
+                 members: Iterable[Union[Context, Tuple[Optional[str], Optional[str]]]],
+                 props: PropsArg = None,
+                 **other_props: str):
+        """Gather existing contexts, or create a context per (driver, device) pair
+
+        :param members:
+            :class:`Context` objects, and/or ``(driver, device)`` pairs, for
+            which a new context is created. Either of ``driver`` and ``device``
+            may be ``None`` to use libcanberra's default.
+
+        :param props:
+            A :class:`PropList`, or a mapping of :class:`Props` to values, set
+            as defaults on the contexts created from ``(driver, device)`` pairs.
+
+        :param other_props:
+            :class:`Props` may also be passed as kwargs, where
+            ``{Props.EVENT_ID: 'bell'}`` is passed as ``event_id='bell'``.
+
+        """
+        cdef list contexts = []
+
+        for member in members:
+            if not isinstance(member, Context):
+                driver, device = member
+                member = Context(props, **other_props)
+                if driver is not None:
+                    member.set_driver(driver)
+                if device is not None:
+                    member.change_device(device)
+
+            contexts.append(member)
+
+        self._members = tuple(contexts)
+
+    @property
+    def contexts(self) -> Tuple[Context, ...]:
+        """The member contexts, in order"""
+        return self._members
+
+    def __len__(self):
+        return len(self._members)
+
+    def __iter__(self):
+        return iter(self._members)
+
+    def open(self) -> List[Result]:
+        """Connect every member to the sound system, concurrently
+
+        :return:
+            A list with one result per member, in order: :attr:`.SUCCESS`, or
+            the exception raised opening it.
+
+        """
+        if len(self._members) <= 1:
+            return [_call_for_result(context.open) for context in self._members]
+
+        # Imported here, as it's slow to import
+        from concurrent.futures import ThreadPoolExecutor
+
+        with ThreadPoolExecutor(max_workers=len(self._members),
+                                thread_name_prefix='py-canberra group open') as executor:
+            futures = [executor.submit(_call_for_result, context.open) for context in self._members]
+            return [future.result() for future in futures]
+
+    def change_props(self, props: PropsArg = None, **other_props: str) -> List[Result]:
+        """Write props to every member; see :meth:`Context.change_props`
+
+        :return:
+            A list with one result per member, in order.
+
+        """
+        cdef PropList proplist = to_proplist(props, other_props)
+        return [_call_for_result(context.change_props, proplist) for context in self._members]
+
+    def play(
+        self,
+        props: PropsArg = None,
+        uint32_t id = 0,
+        on_finished: Callable = None,
+        user_data = NOTSET,
+        tags: Union[str, Iterable[str]] = None,
+        wait: str = 'all',
+        **other_props: str,
+    ) -> List[Result]:
+        """Play one event sound on every member
+
+        Accepts the same arguments as :meth:`Context.play`, except for the
+        ``on_finished`` callback, which is called once for the whole group as
+        ``on_finished(group, id, results)`` (or ``on_finished(group, id,
+        results, user_data)``), where ``results`` has one entry per member:
+        :attr:`.SUCCESS`, the error the member's sound failed with (including
+        failing to start), or ``None`` if it's still playing.
+
+        :param wait:
+            ``'all'`` (the default) to call ``on_finished`` once every member
+            has finished playing the sound, or ``'first'`` to call it as soon
+            as one has.
+
+        :return:
+            A list with one result per member, in order: :attr:`.SUCCESS` if
+            the member started playing the sound, or the exception describing
+            why it didn't. A member failing to start doesn't prevent the others
+            from playing.
+
+        """
+        cdef PropList proplist = to_proplist(props, other_props)
+        cdef Py_ssize_t i, n = len(self._members)
+        cdef Context member
+        cdef _PlayRecord record
+        cdef _GroupPlayback playback = None
+        cdef list records = []
+        cdef list proplists = []
+        cdef list results
+        cdef ca_context **c_contexts = NULL
+        cdef ca_proplist **c_proplists = NULL
+        cdef void **c_userdata = NULL
+        cdef int *c_errors = NULL
+        cdef double started = 0
+
+        if wait not in ('all', 'first'):
+            raise ValueError(f"wait must be 'all' or 'first'. Found {wait!r}")
+
+        if n == 0:
+            return []
+
+        if on_finished is not None:
+            playback = _GroupPlayback.__new__(_GroupPlayback)
+            playback.group = self
+            playback.id = id
+            playback.on_finished = on_finished
+            playback.user_data = user_data
+            playback.results = [None] * n
+            playback.remaining = n
+            playback.wait_all = wait == 'all'
+
+        for i in range(n):
+            member = self._members[i]
+            member.wait_connected()
+
+            # As in Context.play, props changed with defer=True are sent first
+            if member._deferred_props is not None:
+                member.flush_deferred_props()
+
+            member.ensure_connected()
+
+            proplists.append(member._resolve(proplist))
+            records.append(make_play_record(
+                member, id,
+                playback.member_finished if playback is not None else None,
+                i if playback is not None else NOTSET,
+                tags,
+            ))
+
+            if not started:
+                started = member.start_timer()
+
+        try:
+            c_contexts = <ca_context **>malloc(sizeof(ca_context *) * n)
+            c_proplists = <ca_proplist **>malloc(sizeof(ca_proplist *) * n)
+            c_userdata = <void **>malloc(sizeof(void *) * n)
+            c_errors = <int *>malloc(sizeof(int) * n)
+            if c_contexts is NULL or c_proplists is NULL or c_userdata is NULL or c_errors is NULL:
+                raise MemoryError()
+
+            for i in range(n):
+                member = self._members[i]
+                record = records[i]
+                record.started_at = started
+                if started:
+                    record.collectors = stats_collectors(member)
+                c_contexts[i] = member._ca_ctx
+                c_proplists[i] = (<PropList>proplists[i])._proplist
+                c_userdata[i] = <void *>record
+                Py_INCREF(record)
+                member.track(record)
+
+            with nogil:
+                for i in range(n):
+                    c_errors[i] = ca_context_play_full(c_contexts[i], id, c_proplists[i],
+                                                       ca_finish_callback, c_userdata[i])
+
+            results = []
+            for i in range(n):
+                member = self._members[i]
+                result = error_result(c_errors[i])
+                results.append(result)
+
+                if started:
+                    record_play(records[i], 'play', c_errors[i], n)
+
+                if c_errors[i] != CA_SUCCESS:
+                    # ca_finish_callback won't be called for this member
+                    record = records[i]
+                    member.untrack(record)
+                    Py_DECREF(record)
+
+                    if playback is not None:
+                        playback.finished(i, result, False)
+                else:
+                    member._opened = True
+
+        finally:
+            free(c_contexts)
+            free(c_proplists)
+            free(c_userdata)
+            free(c_errors)
+
+        return results
+
+    def cancel(self, uint32_t id = 0) -> List[Result]:
+        """Cancel the sounds with the specified id on every member, in a single loop with the GIL released
+
+        :return:
+            A list with one result per member, in order.
+
+        """
+        cdef Py_ssize_t i, n = len(self._members)
+        cdef Context member
+        cdef ca_context **c_contexts = NULL
+        cdef int *c_errors = NULL
+
+        if n == 0:
+            return []
+
+        try:
+            c_contexts = <ca_context **>malloc(sizeof(ca_context *) * n)
+            c_errors = <int *>malloc(sizeof(int) * n)
+            if c_contexts is NULL or c_errors is NULL:
+                raise MemoryError()
+
+            for i in range(n):
+                member = self._members[i]
+                member.wait_connected()
+                member.ensure_connected()
+                c_contexts[i] = member._ca_ctx
+
+            with nogil:
+                for i in range(n):
+                    c_errors[i] = ca_context_cancel(c_contexts[i], id)
+
+            return [error_result(c_errors[i]) for i in range(n)]
+
+        finally:
+            free(c_contexts)
+            free(c_errors)
+
+    def playing(self, uint32_t id = 0) -> bool:
+        """Check if any member is still playing a sound with the specified id"""
+        return any(context.playing(id) for context in self._members)
+
+
+def _call_for_result(fn, *args):
+    """Call fn, returning SUCCESS, or the exception it raised"""
+    try:
+        fn(*args)
+    except Exception as e:
+        return e
+    return Errors.SUCCESS
+
+
+# Every live Context, so each may be reset in a forked child
+cdef object all_contexts = WeakSet()
+
+
+def _after_fork_in_child():
+    """Forget the parent's ca_contexts and in-flight sounds in a forked child
+
+    libcanberra refuses to use a ca_context after a fork (returning
+    :attr:`.FORKED`), and the threads delivering its callbacks don't survive
+    it. Each Context creates a new ca_context, configured like the last, the
+    next time it's used.
+    """
+    contexts = list(all_contexts)
+
+    for context in contexts:
+        (<Context>context).forget_after_fork()
+
+    for context in contexts:
+        (<Context>context).release_records()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
+
+
+def drain_all(timeout: float = None) -> bool:
+    """Block until every sound played from any context has finished, and its callback run
+
+    Meant to be called before exiting, so sounds (and their ``on_finished``
+    callbacks) aren't cut off.
+
+    :param timeout:
+        The longest time, in seconds, to wait, or ``None`` to wait indefinitely
+
+    :return:
+        ``True`` if everything finished, or ``False`` if the timeout elapsed first
+
+    """
+    cdef double deadline = 0
+
+    if timeout is not None:
+        deadline = monotonic() + timeout
+
+    def remaining():
+        return None if timeout is None else max(deadline - monotonic(), 0)
+
+    if dispatch is None:
+        # No context was ever created, so there's nothing to wait for
+        return True
+
+    # Callbacks may play more sounds, so repeat until nothing is left
+    while True:
+        for context in list(all_contexts):
+            if not context.drain(remaining()):
+                return False
+
+        if not dispatch.get_dispatcher().drain(remaining()):
+            return False
 
-        return bool(playing)
+        if not any((<Context>context)._active for context in list(all_contexts)):
+            return True
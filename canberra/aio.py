@@ -0,0 +1,210 @@
+"""asyncio support
+
+An :class:`AsyncContext` wraps a :class:`canberra.Context` for use from
+coroutines. Sounds are awaited until they finish playing, driven by their
+finish callbacks rather than a thread apiece:
+
+.. code-block:: python
+
+    ctx = AsyncContext(application_name='My Application')
+    await ctx.play(event_id='bell')
+
+"""
+import asyncio
+import itertools
+from concurrent.futures import Executor
+from functools import partial
+from typing import Dict, Union
+
+from . import Context, PropList, Props
+from ._canberra import CanberraError
+from .constants import Errors
+
+PropsArg = Union[PropList, Dict[Union[str, Props], str]]
+
+# asyncio.get_running_loop() is new in Python 3.7; before then, get_event_loop()
+# returned the running loop when called from a coroutine
+_get_running_loop = getattr(asyncio, 'get_running_loop', asyncio.get_event_loop)
+
+# Sound IDs are 32-bit unsigned ints; 0 is left for sounds which never need canceling
+_MAX_ID = 2 ** 32 - 1
+
+
+class AsyncContext:
+    """An asyncio interface to a :class:`canberra.Context`
+
+    Calls which may block on the sound server (:meth:`open`, :meth:`cache`,
+    :meth:`change_props`, :meth:`cancel`) are run in an executor, off the
+    event loop. :meth:`.play` resolves when the sound finishes playing, driven
+    by the sound's finish callback, so any number of sounds may be awaited
+    concurrently without dedicating a thread to each.
+
+    .. code-block:: python
+
+        ctx = AsyncContext(application_name='My Application')
+        await ctx.play(event_id='bell')
+
+    """
+
+    def __init__(self,
+                 props: PropsArg = None,
+                 *,
+                 context: Context = None,
+                 executor: Executor = None,
+                 **other_props: str):
+        """Wrap a new or existing Context
+
+        :param props:
+            A :class:`PropList`, or a mapping of :class:`Props` to values,
+            set as defaults for all sounds played from a newly-created context.
+
+        :param context:
+            An existing :class:`Context` to wrap. If omitted, a new one is
+            created with :paramref:`.props` and :paramref:`.other_props`.
+
+        :param executor:
+            The :class:`concurrent.futures.Executor` blocking calls are run in.
+            If omitted, the event loop's default executor is used.
+
+        :param other_props:
+            :class:`Props` may also be passed as kwargs, where
+            ``{Props.EVENT_ID: 'bell'}`` is passed as ``event_id='bell'``.
+
+        """
+        if context is None:
+            context = Context(props, **other_props)
+        elif props or other_props:
+            raise TypeError('props may not be passed along with an existing context')
+
+        self.context = context
+        self.executor = executor
+
+        self._opened = False
+        self._open_lock = None
+        self._ids = itertools.count(1)
+
+    async def _run(self, fn, *args, **kwargs):
+        loop = _get_running_loop()
+        return await loop.run_in_executor(self.executor, partial(fn, *args, **kwargs))
+
+    def _next_id(self) -> int:
+        return (next(self._ids) - 1) % _MAX_ID + 1
+
+    def set_driver(self, driver: Union[str, bytes]) -> None:
+        """Specify the backend driver used; see :meth:`Context.set_driver`"""
+        self.context.set_driver(driver)
+
+    def change_device(self, device: Union[str, bytes]) -> None:
+        """Specify the backend device to use; see :meth:`Context.change_device`"""
+        self.context.change_device(device)
+
+    async def open(self) -> None:
+        """Connect the context to the sound system, off the event loop
+
+        This is implicitly awaited by :meth:`.play` and :meth:`cache`.
+        Awaiting it again after the context has been opened is a no-op.
+
+        """
+        if self._opened:
+            return
+
+        if self._open_lock is None:
+            self._open_lock = asyncio.Lock()
+
+        async with self._open_lock:
+            if self._opened:
+                return
+
+            try:
+                await self._run(self.context.open)
+            except CanberraError as e:
+                # The wrapped context was already opened outside of our purview
+                if e.code != Errors.STATE:
+                    raise
+
+            self._opened = True
+
+    async def change_props(self, props: PropsArg = None, **other_props: str) -> None:
+        """Write one or more properties to the context; see :meth:`Context.change_props`"""
+        await self._run(self.context.change_props, props, **other_props)
+
+    async def cache(self, props: PropsArg = None, **other_props: str) -> None:
+        """Upload the specified sample into the audio server; see :meth:`Context.cache`"""
+        await self.open()
+        await self._run(self.context.cache, props, **other_props)
+
+    async def play(self, props: PropsArg = None, id: int = None, **other_props: str) -> None:
+        """Play one event sound, returning once it has finished playing
+
+        If the awaiting task is cancelled, the sound is canceled, as well.
+
+        :param props:
+            A :class:`PropList`, or a mapping of :class:`Props` to values,
+            describing additional properties for this sound event.
+
+        :param id:
+            An integer id this sound can be identified with when calling
+            :meth:`cancel`. If omitted, a unique id is allocated, so
+            cancelling the awaiting task only cancels this sound.
+
+        :param other_props:
+            :class:`Props` may also be passed as kwargs, where
+            ``{Props.EVENT_ID: 'bell'}`` is passed as ``event_id='bell'``.
+
+        :raises CanberraError:
+            If the sound could not be played, or failed or was canceled
+            while playing.
+
+        """
+        if id is None:
+            id = self._next_id()
+
+        await self.open()
+
+        loop = _get_running_loop()
+        future = loop.create_future()
+
+        def on_finished(ctx: Context, id: int, error: Union[Errors, CanberraError]):
+            # Called from the callback thread
+            try:
+                loop.call_soon_threadsafe(_resolve, future, error)
+            except RuntimeError:
+                pass  # the event loop has been closed; nobody's listening
+
+        self.context.play(props, id=id, on_finished=on_finished, **other_props)
+
+        try:
+            await future
+        except asyncio.CancelledError:
+            loop.run_in_executor(self.executor, _cancel_quietly, self.context, id)
+            raise
+
+    async def cancel(self, id: int = 0) -> None:
+        """Cancel one or more event sounds; see :meth:`Context.cancel`"""
+        await self._run(self.context.cancel, id)
+
+    async def playing(self, id: int = 0) -> bool:
+        """Check if at least one sound with the specified id is still playing; see :meth:`Context.playing`
+
+        This is answered from the context's own record of playing sounds,
+        without blocking, so it isn't run in the executor.
+
+        """
+        return self.context.playing(id)
+
+
+def _resolve(future: asyncio.Future, error: Union[Errors, CanberraError]):
+    if future.done():
+        return
+
+    if isinstance(error, BaseException):
+        future.set_exception(error)
+    else:
+        future.set_result(None)
+
+
+def _cancel_quietly(context: Context, id: int):
+    try:
+        context.cancel(id)
+    except CanberraError:
+        pass
@@ -0,0 +1,220 @@
+"""Merging and rate limiting of bursts of identical sounds
+
+When many parts of an application react to the same event at once, each
+playing the same sound, the sound server ends up mixing dozens of copies of
+it. A :class:`Coalescer` plays the first of a burst of identical sounds, and
+merges the rest into it:
+
+.. code-block:: python
+
+    coalescer = Coalescer(ctx, window=0.1, rate=5, burst=10)
+
+    for job in jobs:
+        coalescer.play(event_id='bell', on_finished=job.notify)
+
+"""
+import threading
+from time import monotonic
+from typing import Any, Callable, Dict, Hashable, List, NamedTuple, Optional, Tuple, Union
+
+from . import Context, PropList, Props
+from ._canberra import CanberraError
+from .constants import Errors, NOTSET
+
+PropsArg = Union[PropList, Dict[Union[str, Props], str]]
+
+
+class CoalescerStats(NamedTuple):
+    """A snapshot of a coalescer's counters"""
+
+    #: Number of sounds actually played
+    started: int
+    #: Number of plays merged into an already-playing sound
+    merged: int
+    #: Number of plays dropped by the rate limit
+    limited: int
+
+
+class _Playback:
+    """One sound actually played, and the callers merged into it"""
+
+    __slots__ = ('key', 'started_at', 'finished', 'callers')
+
+    def __init__(self, key: Hashable, started_at: float, on_finished: Optional[Callable], user_data: Any):
+        self.key = key
+        self.started_at = started_at
+        self.finished = False
+        self.callers: List[Tuple[Optional[Callable], Any]] = [(on_finished, user_data)]
+
+
+class _TokenBucket:
+    __slots__ = ('tokens', 'updated_at')
+
+    def __init__(self, tokens: float, updated_at: float):
+        self.tokens = tokens
+        self.updated_at = updated_at
+
+
+class Coalescer:
+    """Merges identical sounds played within a window, and rate-limits sounds per key
+
+    Two plays are identical if they have the same props and ``id``. A play
+    identical to a sound started less than :paramref:`.window` seconds ago
+    (and still playing) is merged into it, rather than played again. Its
+    ``on_finished`` callback is still called when the merged sound finishes,
+    or with the exception raised, if the sound fails to start.
+
+    If :paramref:`.rate` is passed, sounds are additionally rate-limited with
+    a token bucket per value of the :paramref:`.limit_by` prop (e.g. per
+    event id, or per application). A play exceeding the limit isn't played;
+    its ``on_finished`` callback is called with a :exc:`CanberraError` with a
+    ``code`` of :attr:`.CANCELED`.
+
+    :param context:
+        The :class:`Context` sounds are played through
+
+    :param window:
+        Seconds after a sound starts during which identical plays are merged
+
+    :param rate:
+        Sounds allowed per second, per :paramref:`.limit_by` value. ``None``
+        disables rate limiting.
+
+    :param burst:
+        The most sounds allowed at once, per :paramref:`.limit_by` value,
+        before the rate applies. Defaults to :paramref:`.rate`, or 1.
+
+    :param limit_by:
+        The prop whose value sounds are rate-limited by, e.g.
+        :attr:`.EVENT_ID` or :attr:`.APPLICATION_NAME`. Sounds without the
+        prop share a single bucket.
+
+    """
+
+    def __init__(self,
+                 context: Context,
+                 window: float = 0.05,
+                 rate: float = None,
+                 burst: float = None,
+                 limit_by: Union[str, Props] = Props.EVENT_ID):
+        self.context = context
+        self.window = window
+        self.rate = rate
+        self.burst = burst if burst is not None else max(rate or 1, 1)
+        self.limit_by = limit_by
+
+        self._lock = threading.Lock()
+        self._playbacks: Dict[Hashable, _Playback] = {}
+        self._buckets: Dict[Optional[Union[str, bytes]], _TokenBucket] = {}
+
+        self._started = 0
+        self._merged = 0
+        self._limited = 0
+
+    def play(self,
+             props: PropsArg = None,
+             id: int = 0,
+             on_finished: Callable = None,
+             user_data: Any = NOTSET,
+             **other_props: str) -> bool:
+        """Play a sound, unless merged into an identical sound or rate-limited
+
+        Accepts the same arguments as :meth:`Context.play`.
+
+        :return:
+            ``True`` if the sound was played or merged into an identical
+            sound, and ``False`` if it was dropped by the rate limit.
+
+        """
+        if isinstance(props, PropList):
+            proplist = props.overlay(None, **other_props) if other_props else props
+        else:
+            proplist = PropList(props, **other_props)
+
+        key = (id, tuple(sorted(proplist.items())))
+        now = monotonic()
+
+        with self._lock:
+            playback = self._playbacks.get(key)
+            if playback is not None and not playback.finished and now - playback.started_at <= self.window:
+                playback.callers.append((on_finished, user_data))
+                self._merged += 1
+                return True
+
+            if not self._take_token(proplist, now):
+                self._limited += 1
+                limited = True
+            else:
+                limited = False
+                playback = self._playbacks[key] = _Playback(key, now, on_finished, user_data)
+                self._started += 1
+
+        if limited:
+            self._reject(id, on_finished, user_data)
+            return False
+
+        try:
+            self.context.play(proplist, id=id, on_finished=self._on_finished, user_data=playback)
+        except BaseException as e:
+            with self._lock:
+                self._forget(playback)
+                self._started -= 1
+                callers = playback.callers
+                playback.callers = []
+
+            # The error is raised to the first caller; callers merged into
+            # the sound meanwhile are told through their callbacks.
+            for on_finished, user_data in callers[1:]:
+                self._dispatch(id, e, on_finished, user_data)
+            raise
+
+        return True
+
+    def stats(self) -> CoalescerStats:
+        """Return a snapshot of the coalescer's counters"""
+        with self._lock:
+            return CoalescerStats(started=self._started, merged=self._merged, limited=self._limited)
+
+    def _take_token(self, proplist: PropList, now: float) -> bool:
+        if self.rate is None:
+            return True
+
+        bucket_key = proplist[self.limit_by] if self.limit_by in proplist else None
+        bucket = self._buckets.get(bucket_key)
+        if bucket is None:
+            bucket = self._buckets[bucket_key] = _TokenBucket(self.burst, now)
+        else:
+            bucket.tokens = min(self.burst, bucket.tokens + (now - bucket.updated_at) * self.rate)
+            bucket.updated_at = now
+
+        if bucket.tokens < 1:
+            return False
+
+        bucket.tokens -= 1
+        return True
+
+    def _forget(self, playback: _Playback) -> None:
+        playback.finished = True
+        if self._playbacks.get(playback.key) is playback:
+            del self._playbacks[playback.key]
+
+    def _on_finished(self, context: Context, id: int, error, playback: _Playback) -> None:
+        with self._lock:
+            self._forget(playback)
+            callers = playback.callers
+            playback.callers = []
+
+        # Each caller's callback is dispatched separately, so one raising an
+        # exception doesn't prevent the others from being called.
+        for on_finished, user_data in callers:
+            self._dispatch(id, error, on_finished, user_data)
+
+    def _reject(self, id: int, on_finished: Optional[Callable], user_data: Any) -> None:
+        self._dispatch(id, CanberraError(Errors.CANCELED, 'Rate limited'), on_finished, user_data)
+
+    def _dispatch(self, id: int, error, on_finished: Optional[Callable], user_data: Any) -> None:
+        if on_finished is None:
+            return
+
+        from .dispatch import Completion, get_dispatcher
+        get_dispatcher().submit(Completion(self.context, id, error, on_finished, user_data))
@@ -1,14 +1,29 @@
-from pathlib import Path
-from typing import Dict, Union
+import os
+from typing import TYPE_CHECKING, Dict, Union
 
-from . import Context, Props
+from . import Context, PropList, Props
+from .pool import default_pool
 
+if TYPE_CHECKING:
+    from .staging import StagingArea
 
-def play(props: Dict[Union[str, Props], str] = None, **other_props: str) -> Context:
+
+def play(props: Union[PropList, Dict[Union[str, Props], str]] = None,
+         *,
+         fresh: bool = False,
+         **other_props: str) -> Context:
     """Play a sound with the specified props
 
+    By default, the sound is played from a context shared through
+    :data:`canberra.pool.default_pool`, so the connection to the sound server
+    (and any samples it uploaded) is reused between calls.
+
     :param props:
-        A mapping of :class:`Props` to values.
+        A :class:`PropList`, or a mapping of :class:`Props` to values.
+
+    :param fresh:
+        If true, play the sound from a brand-new context, rather than a
+        shared one.
 
     :param other_props:
         :class:`Props` may also be passed as kwargs, where ``{Props.EVENT_ID: 'bell'}``
@@ -16,20 +31,34 @@ def play(props: Dict[Union[str, Props], str] = None, **other_props: str) -> Cont
 
     :return:
         The canberra.Context used to play the sound. `cancel()` may be called
-        on this context to stop the playing sound.
+        on this context to stop the playing sound; unless
+        :paramref:`.fresh` is passed, this also stops any other sounds played
+        from the shared context.
 
     """
-    ctx = Context()
+    ctx = Context() if fresh else default_pool.get()
     ctx.play(props, **other_props)
     return ctx
 
 
-def play_file(filename: Union[str, Path], **other_props: str) -> Context:
+def play_file(filename: Union[str, os.PathLike],
+              *,
+              fresh: bool = False,
+              staging: 'StagingArea' = None,
+              **other_props: str) -> Context:
     """Play the specified sound file
 
     :param filename:
         Path to the sound file to be played
 
+    :param fresh:
+        If true, play the sound from a brand-new context, rather than a
+        shared one. See :func:`play`.
+
+    :param staging:
+        If passed, the file is played from its copy in this
+        :class:`~canberra.staging.StagingArea`, staging it if necessary.
+
     :param other_props:
         :class:`Props` passed as kwargs, where ``{Props.EVENT_ID: 'bell'}`` is
         passed as ``event_id='bell'``.
@@ -39,5 +68,11 @@ def play_file(filename: Union[str, Path], **other_props: str) -> Context:
         called on this context to stop the playing sound.
 
     """
-    filename = str(filename)
-    return play(**other_props, media_filename=filename)
+    filename = os.fspath(filename)
+    if staging is not None:
+        try:
+            filename = staging.stage(filename)
+        except OSError:
+            # Let libcanberra report the missing file
+            pass
+    return play(**other_props, media_filename=filename, fresh=fresh)
@@ -0,0 +1,631 @@
+"""A sound daemon, sharing opened contexts between processes over a Unix socket
+
+When many worker processes each play sounds, each pays for its own
+connection to the sound server, sample uploads, and server-side client
+state. Instead, one daemon can own a few opened (and optionally pre-cached)
+contexts, and play sounds on behalf of every worker:
+
+.. code-block:: shell
+
+    python -m canberra.daemon --socket /run/user/1000/py-canberra.sock --cache bell
+
+.. code-block:: python
+
+    client = DaemonClient('/run/user/1000/py-canberra.sock')
+    client.play(event_id='bell', on_finished=lambda client, id, error: print(error))
+
+The protocol is newline-delimited JSON. Each request carries a ``seq``
+number, echoed in its reply; the client doesn't wait for the reply to a
+:meth:`~DaemonClient.play` before sending the next request, so plays are
+pipelined. Sounds played with ``"notify": true`` are reported with a
+``"finished"`` event once they finish::
+
+    -> {"seq": 1, "op": "play", "id": 7, "props": {"event.id": "bell"}, "notify": true}
+    <- {"seq": 1, "ok": true}
+    <- {"event": "finished", "seq": 1, "id": 7, "code": 0}
+    -> {"seq": 2, "op": "playing", "id": 7}
+    <- {"seq": 2, "ok": true, "playing": false}
+    -> {"seq": 3, "op": "cancel", "id": 7}
+    <- {"seq": 3, "ok": true}
+
+Failed requests are answered with ``"ok": false``, along with the
+:class:`Errors` ``"code"`` and a ``"message"``.
+
+Prop values are strings; binary values (see :class:`PropList`) can't be sent,
+and are rejected by :class:`DaemonClient` with a :exc:`TypeError`.
+
+Sound ids are private to each client connection: the daemon maps them onto
+ids of its own, so clients can't cancel each other's sounds.
+
+"""
+import argparse
+import itertools
+import json
+import os
+import queue
+import socket
+import socketserver
+import stat
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+from . import Context, PropList, Props
+from ._canberra import CanberraError
+from .constants import Errors, NOTSET
+
+PropsArg = Union[PropList, Dict[Union[str, Props], str]]
+
+# Sound IDs are 32-bit unsigned ints; 0 is left for sounds which never need canceling
+_MAX_ID = 2 ** 32 - 1
+
+
+def default_socket_path() -> str:
+    """Return ``$XDG_RUNTIME_DIR/py-canberra.sock``, or a path in a per-user directory in ``/tmp``"""
+    runtime_dir = os.environ.get('XDG_RUNTIME_DIR')
+    if runtime_dir:
+        return os.path.join(runtime_dir, 'py-canberra.sock')
+    return f'/tmp/py-canberra-{os.getuid()}/daemon.sock'
+
+
+def _ensure_private_directory(path: str) -> None:
+    """Create a directory only its owner may access, or check an existing one is such
+
+    :raises OSError: if the directory belongs to another user, or others may access it
+
+    """
+    try:
+        os.mkdir(path, 0o700)
+    except FileExistsError:
+        pass
+
+    st = os.lstat(path)
+    if not stat.S_ISDIR(st.st_mode) or st.st_uid != os.getuid() or st.st_mode & 0o077:
+        raise OSError(f'{path} must be a directory accessible only to its owner')
+
+
+def encode_props(props: PropsArg = None, other_props: Dict[str, str] = None) -> Dict[str, str]:
+    """Return a JSON-serializable mapping of libcanberra prop names to values
+
+    :raises TypeError: if a value is binary, which the protocol can't carry
+
+    """
+    if isinstance(props, PropList):
+        encoded = dict(props.items())
+        props = None
+    else:
+        encoded = {}
+
+    for prop, value in Props.from_kwargs(props, **(other_props or {})).items():
+        encoded[str(prop)] = value
+
+    for prop, value in encoded.items():
+        if isinstance(value, (bytes, bytearray, memoryview)):
+            raise TypeError(f'Binary prop values can\'t be sent to the daemon. Found {prop}={value!r}')
+
+    return encoded
+
+
+def _error_fields(error) -> Dict[str, Any]:
+    if isinstance(error, CanberraError):
+        return {'code': int(error.code), 'message': error.msg}
+    if isinstance(error, MemoryError):
+        return {'code': int(Errors.OOM), 'message': 'Out of memory'}
+    if isinstance(error, Errors):
+        return {'code': int(error)}
+    return {'code': int(Errors.INTERNAL), 'message': str(error)}
+
+
+def _decode_error(message: Dict[str, Any]):
+    code = message.get('code', 0)
+    if code == Errors.SUCCESS:
+        return Errors.SUCCESS
+    return CanberraError(code, message.get('message') or Errors(code).name)
+
+
+class _Route:
+    """The daemon context and id a client's sound id is played with"""
+
+    __slots__ = ('context', 'id', 'count')
+
+    def __init__(self, context: Context, id: int):
+        self.context = context
+        self.id = id
+        self.count = 0
+
+
+class _Connection(socketserver.StreamRequestHandler):
+    """Serves the requests of one client, in the order they were sent"""
+
+    server: 'SoundDaemon'
+
+    def setup(self):
+        super().setup()
+        self._routes_lock = threading.Lock()
+        # Daemon-side routes, by the client's sound id
+        self._routes: Dict[int, _Route] = {}
+
+        # Messages are written by a thread of their own, so a client slow to
+        # read its replies never holds up the dispatcher's finish callbacks.
+        self._outbox: 'queue.SimpleQueue[Optional[bytes]]' = queue.SimpleQueue()
+        self._writer = threading.Thread(target=self._write, name='canberra-daemon-writer', daemon=True)
+        self._writer.start()
+
+    def finish(self):
+        self._outbox.put(None)
+        self._writer.join()
+        super().finish()
+
+    def handle(self):
+        for line in self.rfile:
+            if not line.strip():
+                continue
+
+            try:
+                request = json.loads(line)
+                seq = request.get('seq')
+            except (ValueError, AttributeError):
+                self._send({'seq': None, 'ok': False, 'code': int(Errors.INVALID), 'message': 'Malformed request'})
+                continue
+
+            try:
+                reply = self._dispatch(request)
+            except (CanberraError, MemoryError) as e:
+                reply = {'ok': False, **_error_fields(e)}
+            except (KeyError, TypeError, ValueError) as e:
+                reply = {'ok': False, 'code': int(Errors.INVALID), 'message': str(e)}
+
+            reply['seq'] = seq
+            self._send(reply)
+
+    def _dispatch(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        op = request.get('op')
+
+        if op == 'play':
+            self._play(request)
+            return {'ok': True}
+
+        if op == 'cancel':
+            route = self._route(request.get('id', 0))
+            if route is not None:
+                route.context.cancel(route.id)
+            return {'ok': True}
+
+        if op == 'playing':
+            route = self._route(request.get('id', 0))
+            playing = route is not None and route.context.playing(route.id)
+            return {'ok': True, 'playing': playing}
+
+        if op == 'cache':
+            for context in self.server.contexts:
+                context.cache(request.get('props') or {})
+            return {'ok': True}
+
+        if op == 'ping':
+            return {'ok': True}
+
+        raise ValueError(f'Unknown op {op!r}')
+
+    def _route(self, client_id: int) -> Optional[_Route]:
+        if client_id == 0:
+            # Sounds played with id 0 can't be told apart, nor canceled
+            return None
+        with self._routes_lock:
+            return self._routes.get(client_id)
+
+    def _play(self, request: Dict[str, Any]) -> None:
+        client_id = request.get('id', 0)
+        props = request.get('props') or {}
+        notify = request.get('notify', False)
+
+        with self._routes_lock:
+            if client_id == 0:
+                route = _Route(self.server.next_context(), 0)
+            else:
+                route = self._routes.get(client_id)
+                if route is None:
+                    route = self._routes[client_id] = _Route(self.server.next_context(), self.server.next_id())
+            route.count += 1
+
+        try:
+            route.context.play(
+                props,
+                id=route.id,
+                on_finished=self._on_finished,
+                user_data=(request.get('seq'), client_id, route, notify),
+            )
+        except BaseException:
+            self._release(client_id, route)
+            raise
+
+    def _on_finished(self, context: Context, id: int, error, user_data: Tuple[Any, int, _Route, bool]) -> None:
+        seq, client_id, route, notify = user_data
+        self._release(client_id, route)
+
+        if notify:
+            self._send({'event': 'finished', 'seq': seq, 'id': client_id, **_error_fields(error)})
+
+    def _release(self, client_id: int, route: _Route) -> None:
+        with self._routes_lock:
+            route.count -= 1
+            if route.count <= 0 and self._routes.get(client_id) is route:
+                del self._routes[client_id]
+
+    def _send(self, message: Dict[str, Any]) -> None:
+        self._outbox.put(json.dumps(message, separators=(',', ':')).encode('utf-8') + b'\n')
+
+    def _write(self) -> None:
+        broken = False
+        while True:
+            data = self._outbox.get()
+            if data is None:
+                return
+            if broken:
+                continue
+
+            try:
+                self.wfile.write(data)
+                if self._outbox.empty():
+                    self.wfile.flush()
+            except (OSError, ValueError):
+                # The client went away; its sounds play on regardless
+                broken = True
+
+
+class SoundDaemon(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Plays sounds for clients connecting to a Unix socket, through a shared set of contexts
+
+    Each client connection is served by its own thread, handling requests in
+    the order they arrive. Sounds are spread round-robin over the daemon's
+    contexts; all sounds a client plays with the same id go to the same
+    context, so they may be canceled together.
+
+    :param path:
+        The path of the Unix socket to listen on. A stale socket left at the
+        path is replaced. The socket is made accessible to its owner only.
+
+    :param contexts:
+        The number of contexts (i.e. sound server connections) to open
+
+    :param driver:
+        The backend driver to use (see :meth:`Context.set_driver`)
+
+    :param device:
+        The backend device to use (see :meth:`Context.change_device`)
+
+    :param props:
+        Default props of every context, e.g. :attr:`.APPLICATION_NAME`
+
+    :param cache:
+        Event ids uploaded to the sound server (see :meth:`Context.cache`)
+        on every context at startup
+
+    """
+
+    daemon_threads = True
+
+    def __init__(self,
+                 path: str = None,
+                 contexts: int = 1,
+                 driver: str = None,
+                 device: str = None,
+                 props: PropsArg = None,
+                 cache: Iterable[str] = ()):
+        if contexts < 1:
+            raise ValueError(f'contexts must be at least 1. Found {contexts!r}')
+
+        if path is None:
+            path = default_socket_path()
+            # The default path is predictable, so it's kept in a directory
+            # other users can't create sockets in, or swap for their own
+            _ensure_private_directory(os.path.dirname(path))
+
+        self.path = path
+        self.contexts: List[Context] = [self._open_context(driver, device, props) for _ in range(contexts)]
+
+        for event_id in cache:
+            for context in self.contexts:
+                try:
+                    context.cache(event_id=event_id)
+                except CanberraError as e:
+                    _log_warning('Unable to cache %r: %s', event_id, e)
+
+        self._lock = threading.Lock()
+        self._contexts = itertools.cycle(self.contexts)
+        self._ids = itertools.count(1)
+
+        _remove_stale_socket(self.path)
+        super().__init__(self.path, _Connection)
+
+    def server_bind(self) -> None:
+        # The socket is created with the permissions left by the umask, so it's
+        # bound under one which leaves it accessible to its owner alone; a
+        # chmod() afterward would leave it open to others until then.
+        umask = os.umask(0o077)
+        try:
+            super().server_bind()
+        finally:
+            os.umask(umask)
+
+    @staticmethod
+    def _open_context(driver: Optional[str], device: Optional[str], props: Optional[PropsArg]) -> Context:
+        context = Context(props)
+        if driver is not None:
+            context.set_driver(driver)
+        if device is not None:
+            context.change_device(device)
+        context.open()
+        return context
+
+    def next_context(self) -> Context:
+        with self._lock:
+            return next(self._contexts)
+
+    def next_id(self) -> int:
+        with self._lock:
+            return (next(self._ids) - 1) % _MAX_ID + 1
+
+    def server_close(self) -> None:
+        super().server_close()
+        try:
+            os.unlink(self.path)
+        except OSError:
+            pass
+
+
+def _remove_stale_socket(path: str) -> None:
+    if not os.path.exists(path):
+        return
+
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(path)
+    except OSError:
+        os.unlink(path)
+    else:
+        raise OSError(f'A daemon is already listening on {path}')
+    finally:
+        sock.close()
+
+
+def _log_warning(msg: str, *args) -> None:
+    # logging is imported only when needed, as it's slow to import
+    import logging
+    logging.getLogger(__name__).warning(msg, *args)
+
+
+class _Pending:
+    __slots__ = ('id', 'on_finished', 'user_data')
+
+    def __init__(self, id: int, on_finished: Callable, user_data: Any):
+        self.id = id
+        self.on_finished = on_finished
+        self.user_data = user_data
+
+
+class DaemonClient:
+    """Plays sounds through a :class:`SoundDaemon`, with an API mirroring :class:`Context`
+
+    :meth:`play` doesn't wait for the daemon's reply, so any number of plays
+    may be in flight at once; a play the daemon fails to start is reported
+    through the returned future, and the sound's ``on_finished`` callback.
+    :meth:`cancel`, :meth:`playing`, and :meth:`cache` wait for their reply.
+
+    Finish callbacks are called through the dispatcher (see
+    :mod:`canberra.dispatch`), with the client in place of the context.
+    Should the connection to the daemon be lost, waiting callbacks are
+    called with a :exc:`CanberraError` with a ``code`` of :attr:`.DISCONNECTED`.
+
+    The client doesn't load libcanberra.
+
+    :param path:
+        The path of the daemon's Unix socket
+
+    :param timeout:
+        Seconds to wait for a connection, and for replies to blocking calls.
+        ``None`` waits indefinitely.
+
+    """
+
+    def __init__(self, path: str = None, timeout: Optional[float] = None):
+        self.path = path or default_socket_path()
+        self.timeout = timeout
+
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._sock.settimeout(timeout)
+        self._sock.connect(self.path)
+        self._sock.settimeout(None)
+
+        self._lock = threading.Lock()
+        # Held while sending, so requests arrive in seq order. It's never
+        # taken by the reader thread, which must keep reading replies while
+        # a large pipeline of requests is being sent.
+        self._send_lock = threading.Lock()
+        self._seqs = itertools.count(1)
+        self._replies: Dict[int, Future] = {}
+        self._pending: Dict[int, _Pending] = {}
+        self._closed = False
+
+        self._reader = threading.Thread(target=self._read, name='canberra-daemon-client', daemon=True)
+        self._reader.start()
+
+    def __enter__(self) -> 'DaemonClient':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self) -> None:
+        """Close the connection; sounds already playing are left to finish"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+
+        try:
+            self._sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self._sock.close()
+        self._reader.join()
+
+    def play(self,
+             props: PropsArg = None,
+             id: int = 0,
+             on_finished: Callable = None,
+             user_data: Any = NOTSET,
+             **other_props: str) -> Future:
+        """Play one event sound through the daemon; see :meth:`Context.play`
+
+        :return:
+            A :class:`~concurrent.futures.Future` resolving to ``None`` once
+            the daemon has started the sound, or raising the
+            :exc:`CanberraError` it failed with.
+
+        :raises TypeError: if a prop value is binary, which can't be sent to the daemon
+
+        """
+        request = {'op': 'play', 'id': id, 'props': encode_props(props, other_props)}
+        if on_finished is not None:
+            request['notify'] = True
+        return self._request(request, _Pending(id, on_finished, user_data) if on_finished is not None else None)
+
+    def cancel(self, id: int = 0) -> None:
+        """Cancel the sounds this client played with the specified id; see :meth:`Context.cancel`"""
+        self._call({'op': 'cancel', 'id': id})
+
+    def playing(self, id: int = 0) -> bool:
+        """Check if a sound this client played with the specified id is still playing"""
+        return self._call({'op': 'playing', 'id': id})['playing']
+
+    def cache(self, props: PropsArg = None, **other_props: str) -> None:
+        """Upload a sample on every one of the daemon's contexts; see :meth:`Context.cache`"""
+        self._call({'op': 'cache', 'props': encode_props(props, other_props)})
+
+    def ping(self) -> None:
+        """Wait for a round trip to the daemon, i.e. for every earlier request to be handled"""
+        self._call({'op': 'ping'})
+
+    def _call(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        return self._request(request).result(self.timeout)
+
+    def _request(self, request: Dict[str, Any], pending: _Pending = None) -> Future:
+        future = Future()
+
+        with self._send_lock:
+            seq = request['seq'] = next(self._seqs)
+
+            # Serialized before the reply is waited for, so a request which
+            # can't be serialized leaves nothing behind
+            data = json.dumps(request, separators=(',', ':')).encode('utf-8') + b'\n'
+
+            with self._lock:
+                if self._closed:
+                    raise CanberraError(Errors.DISCONNECTED, 'Client is closed')
+
+                self._replies[seq] = future
+                if pending is not None:
+                    self._pending[seq] = pending
+
+            try:
+                self._sock.sendall(data)
+            except OSError as e:
+                with self._lock:
+                    self._replies.pop(seq, None)
+                    self._pending.pop(seq, None)
+                raise CanberraError(Errors.DISCONNECTED, str(e)) from e
+
+        return future
+
+    def _read(self) -> None:
+        try:
+            with self._sock.makefile('rb') as fp:
+                for line in fp:
+                    self._handle(json.loads(line))
+        except (OSError, ValueError):
+            pass
+        finally:
+            self._disconnected()
+
+    def _handle(self, message: Dict[str, Any]) -> None:
+        seq = message.get('seq')
+
+        if message.get('event') == 'finished':
+            with self._lock:
+                pending = self._pending.pop(seq, None)
+            if pending is not None:
+                self._finish(pending, _decode_error(message))
+            return
+
+        with self._lock:
+            future = self._replies.pop(seq, None)
+            pending = self._pending.pop(seq, None) if not message.get('ok') else None
+
+        if future is None:
+            return
+
+        if message.get('ok'):
+            if message.keys() - {'seq', 'ok'}:
+                future.set_result(message)
+            else:
+                future.set_result(None)
+            return
+
+        error = _decode_error(message)
+        future.set_exception(error)
+        if pending is not None:
+            self._finish(pending, error)
+
+    def _disconnected(self) -> None:
+        with self._lock:
+            self._closed = True
+            replies, self._replies = self._replies, {}
+            pending, self._pending = self._pending, {}
+
+        for future in replies.values():
+            future.set_exception(CanberraError(Errors.DISCONNECTED, 'Disconnected from daemon'))
+        for pending_ in pending.values():
+            self._finish(pending_, CanberraError(Errors.DISCONNECTED, 'Disconnected from daemon'))
+
+    def _finish(self, pending: _Pending, error) -> None:
+        from .dispatch import Completion, get_dispatcher
+        get_dispatcher().submit(Completion(self, pending.id, error, pending.on_finished, pending.user_data))
+
+
+def main(argv: List[str] = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog='python -m canberra.daemon',
+        description='Play sounds for other processes, through shared contexts',
+    )
+    parser.add_argument('--socket', default=None, help=f'Unix socket to listen on (default: {default_socket_path()})')
+    parser.add_argument('--contexts', type=int, default=1, help='number of contexts to open (default: 1)')
+    parser.add_argument('--driver', help='backend driver, e.g. pulse or null')
+    parser.add_argument('--device', help='backend device')
+    parser.add_argument('--cache', action='append', default=[], metavar='EVENT_ID',
+                        help='event id to upload at startup (may be repeated)')
+    parser.add_argument('--application-name', default='py-canberra daemon',
+                        help='application.name of the daemon\'s contexts')
+    args = parser.parse_args(argv)
+
+    import signal
+    # Shut down cleanly (removing the socket) on SIGTERM, as on Ctrl+C
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+
+    server = SoundDaemon(
+        args.socket,
+        contexts=args.contexts,
+        driver=args.driver,
+        device=args.device,
+        props={Props.APPLICATION_NAME: args.application_name},
+        cache=args.cache,
+    )
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
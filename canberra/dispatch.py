@@ -0,0 +1,543 @@
+"""Delivery of finish callbacks
+
+libcanberra invokes finish callbacks from its own threads, where calling back
+into libcanberra (or destroying a context) may deadlock. So, each finished
+sound is handed to a :class:`Dispatcher` as a :class:`Completion`, and the
+dispatcher invokes the user's callback from a thread of its own.
+
+By default, a single :class:`ThreadDispatcher` thread delivers all callbacks,
+in order. Another dispatcher may be installed with :func:`set_dispatcher`:
+
+.. code-block:: python
+
+    from canberra.dispatch import ThreadDispatcher, set_dispatcher
+
+    set_dispatcher(ThreadDispatcher(workers=4, maxsize=1000, overflow='drop_oldest'))
+
+"""
+import os
+import threading
+from collections import deque
+from time import perf_counter
+from typing import Any, Callable, Deque, List, NamedTuple, Optional, Sequence, Set
+
+from .constants import NOTSET
+
+OVERFLOW_POLICIES = ('block', 'drop_newest', 'drop_oldest')
+
+
+class Completion:
+    """A finished sound, waiting for its callback to be invoked"""
+
+    __slots__ = ('context', 'id', 'error', 'on_finished', 'user_data', 'started_at', 'collectors', 'finished_at')
+
+    def __init__(self,
+                 context,
+                 id: int,
+                 error,
+                 on_finished: Callable = None,
+                 user_data: Any = NOTSET,
+                 started_at: float = None,
+                 collectors: Sequence = ()):
+        self.context = context
+        self.id = id
+        self.error = error
+        self.on_finished = on_finished
+        self.user_data = user_data
+
+        #: :func:`time.perf_counter` timestamp of when the sound was played, if
+        #: stats were being recorded (see :mod:`canberra.stats`); otherwise None
+        self.started_at = started_at
+
+        #: The :class:`~canberra.stats.Stats` collectors which counted the
+        #: sound as started, and record its timings once dispatched
+        self.collectors = collectors
+
+        #: :func:`time.perf_counter` timestamp of when libcanberra reported the sound finished
+        self.finished_at = perf_counter()
+
+    def invoke(self) -> None:
+        """Call the sound's ``on_finished`` callback, if any"""
+        if self.on_finished is None:
+            return
+
+        if self.user_data is NOTSET:
+            self.on_finished(self.context, self.id, self.error)
+        else:
+            self.on_finished(self.context, self.id, self.error, self.user_data)
+
+    def __repr__(self):
+        return f'<{type(self).__name__} id={self.id} error={self.error!r}>'
+
+
+class DispatcherStats(NamedTuple):
+    """A snapshot of a dispatcher's counters"""
+
+    #: Number of completions currently waiting to be dispatched
+    depth: int
+    #: Largest number of completions ever waiting at once
+    max_depth: int
+    #: Number of completions handed to the dispatcher
+    submitted: int
+    #: Number of completions whose callbacks have been run
+    dispatched: int
+    #: Number of completions discarded by the overflow policy
+    dropped: int
+    #: Number of callbacks which raised an exception
+    errors: int
+    #: Seconds, summed over all dispatched completions, between finishing and dispatch
+    total_latency: float
+    #: Longest time, in seconds, a completion waited to be dispatched
+    max_latency: float
+
+    @property
+    def mean_latency(self) -> float:
+        return self.total_latency / self.dispatched if self.dispatched else 0.0
+
+
+class Dispatcher:
+    """Base class for dispatchers: a queue of completions, drained by worker threads
+
+    Subclasses implement :meth:`_work`, the body of each worker thread.
+
+    :param maxsize:
+        The maximum number of completions waiting to be dispatched. ``0``
+        (the default) means the queue is unbounded.
+
+    :param overflow:
+        What to do when a completion is submitted to a full queue:
+
+         - ``'block'``: wait for room in the queue. Note this blocks
+           libcanberra's thread reporting the finished sound.
+         - ``'drop_newest'``: discard the submitted completion
+         - ``'drop_oldest'``: discard the longest-waiting completion
+
+        Callbacks of discarded completions are never called.
+
+    """
+
+    thread_name = 'py-canberra callback thread'
+
+    def __init__(self, maxsize: int = 0, overflow: str = 'block', workers: int = 1):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f'overflow must be one of {OVERFLOW_POLICIES!r}. Found {overflow!r}')
+        if maxsize < 0:
+            raise ValueError(f'maxsize must not be negative. Found {maxsize!r}')
+        if workers < 1:
+            raise ValueError(f'workers must be at least 1. Found {workers!r}')
+
+        self.maxsize = maxsize
+        self.overflow = overflow
+        self.workers = workers
+
+        self._queue: Deque[Completion] = deque()
+        self._cond = threading.Condition()
+        # Number of completions taken from the queue whose callbacks are still running
+        self._running = 0
+        self._closing = False
+        self._threads: List[threading.Thread] = []
+        self._worker_idents: Set[int] = set()
+        # The dispatcher which replaced this one, if any; see _hand_off()
+        self._successor: Optional[Dispatcher] = None
+
+        # Completions discarded by the overflow policy. They may hold the last
+        # reference to their Context, which must not be released from
+        # libcanberra's thread; so they're kept here until a worker clears them.
+        self._discarded: List[Completion] = []
+
+        self._max_depth = 0
+        self._submitted = 0
+        self._dispatched = 0
+        self._dropped = 0
+        self._errors = 0
+        self._total_latency = 0.0
+        self._max_latency = 0.0
+
+    def start(self) -> None:
+        """Start the worker threads, if not already started"""
+        with self._cond:
+            if self._threads:
+                return
+
+            self._closing = False
+            for i in range(self.workers):
+                name = self.thread_name if self.workers == 1 else f'{self.thread_name} {i}'
+                thread = threading.Thread(name=name, target=self._run, daemon=True)
+                self._threads.append(thread)
+                thread.start()
+
+    def close(self, wait: bool = True, timeout: float = None) -> None:
+        """Stop the worker threads once all waiting completions have been dispatched
+
+        :param wait:
+            Whether to wait for the worker threads to exit
+
+        :param timeout:
+            The longest time, in seconds, to wait for each worker thread
+
+        """
+        with self._cond:
+            self._closing = True
+            self._cond.notify_all()
+            threads, self._threads = self._threads, []
+
+        if wait:
+            for thread in threads:
+                if thread is not threading.current_thread():
+                    thread.join(timeout)
+
+    def drain(self, timeout: float = None) -> bool:
+        """Block until every waiting completion has been dispatched, and its callback returned
+
+        :param timeout:
+            The longest time, in seconds, to wait, or ``None`` to wait
+            indefinitely
+
+        :return:
+            ``True`` if the queue drained, or ``False`` if the timeout
+            elapsed first
+
+        """
+        if threading.get_ident() in self._worker_idents:
+            raise RuntimeError('drain() would deadlock if called from a callback')
+
+        with self._cond:
+            return self._cond.wait_for(lambda: not self._queue and not self._running, timeout)
+
+    def submit(self, completion: Completion) -> None:
+        """Queue a completion to be dispatched
+
+        This is called from libcanberra's threads, and must never invoke
+        user code. Once the dispatcher has been replaced (see
+        :func:`set_dispatcher`), completions are passed on to its successor.
+        """
+        with self._cond:
+            successor = self._successor
+            if successor is None:
+                self._enqueue(completion)
+                return
+
+        successor.submit(completion)
+
+    def _enqueue(self, completion: Completion) -> None:
+        self._submitted += 1
+
+        if self.maxsize and len(self._queue) >= self.maxsize:
+            if self.overflow == 'drop_newest':
+                self._discard(completion)
+                return
+
+            elif self.overflow == 'drop_oldest':
+                self._discard(self._queue.popleft())
+
+            elif threading.get_ident() not in self._worker_idents:
+                # A worker may submit while running a callback (e.g. one that
+                # cancels a sound); blocking it could leave nobody to make room.
+                while len(self._queue) >= self.maxsize and self._threads:
+                    self._cond.wait()
+
+        self._queue.append(completion)
+        if len(self._queue) > self._max_depth:
+            self._max_depth = len(self._queue)
+
+        self._cond.notify()
+
+    def _hand_off(self, successor: 'Dispatcher') -> None:
+        """Pass completions submitted from now on to another dispatcher
+
+        Completions already waiting are dispatched by this dispatcher's
+        workers, if it has any; otherwise, they're passed on, too.
+        """
+        with self._cond:
+            self._successor = successor
+            if self._threads:
+                leftovers = []
+            else:
+                leftovers = list(self._queue)
+                self._queue.clear()
+                self._cond.notify_all()
+
+        for completion in leftovers:
+            successor.submit(completion)
+
+    def _after_fork_in_child(self) -> None:
+        """Reset the dispatcher in a forked child, restarting its threads if it was running
+
+        The parent's worker threads don't exist in the child, and its locks
+        may have been held at the time of the fork. Completions still waiting
+        are dropped: they belong to the parent's sounds.
+        """
+        running = bool(self._threads)
+
+        self._cond = threading.Condition()
+        self._queue.clear()
+        self._running = 0
+        self._discarded = []
+        self._threads = []
+        self._worker_idents = set()
+
+        if running:
+            self.start()
+
+    def _discard(self, completion: Completion) -> None:
+        self._dropped += 1
+        self._discarded.append(completion)
+        self._cond.notify()
+
+    def stats(self) -> DispatcherStats:
+        """Return a snapshot of the dispatcher's counters"""
+        with self._cond:
+            return DispatcherStats(
+                depth=len(self._queue),
+                max_depth=self._max_depth,
+                submitted=self._submitted,
+                dispatched=self._dispatched,
+                dropped=self._dropped,
+                errors=self._errors,
+                total_latency=self._total_latency,
+                max_latency=self._max_latency,
+            )
+
+    def _take(self, limit: int = 1) -> Optional[List[Completion]]:
+        """Wait for and remove up to ``limit`` completions from the queue
+
+        Returns None once the dispatcher is closing and the queue is empty.
+        """
+        with self._cond:
+            while True:
+                if self._discarded:
+                    discarded, self._discarded = self._discarded, []
+                    # Release the discarded completions outside the lock, as
+                    # this may destroy their Contexts.
+                    self._cond.release()
+                    try:
+                        del discarded
+                    finally:
+                        self._cond.acquire()
+                    continue
+
+                if self._queue:
+                    break
+
+                if self._closing:
+                    return None
+
+                self._cond.wait()
+
+            taken = []
+            while self._queue and len(taken) < limit:
+                taken.append(self._queue.popleft())
+
+            self._running += len(taken)
+            self._cond.notify_all()
+            return taken
+
+    def _done(self, count: int) -> None:
+        """Note that the callbacks of ``count`` completions taken from the queue have returned"""
+        with self._cond:
+            self._running -= count
+            self._cond.notify_all()
+
+    def _record(self, completions: List[Completion], errors: int = 0) -> None:
+        now = perf_counter()
+        with self._cond:
+            for completion in completions:
+                latency = now - completion.finished_at
+                self._total_latency += latency
+                if latency > self._max_latency:
+                    self._max_latency = latency
+
+            self._dispatched += len(completions)
+            self._errors += errors
+
+        for completion in completions:
+            if completion.started_at is not None:
+                from .stats import record_dispatch
+                record_dispatch(completion, now)
+
+    def _invoke(self, completion: Completion) -> int:
+        """Invoke a completion's callback, returning the number of errors raised"""
+        try:
+            completion.invoke()
+        except Exception:
+            _log_exception('Error in on_finished callback for %r', completion)
+            return 1
+        return 0
+
+    def _run(self) -> None:
+        self._worker_idents.add(threading.get_ident())
+        try:
+            self._work()
+        finally:
+            self._worker_idents.discard(threading.get_ident())
+
+    def _work(self) -> None:
+        raise NotImplementedError
+
+
+class ThreadDispatcher(Dispatcher):
+    """Invoke each callback from one of a pool of worker threads
+
+    With a single worker (the default), callbacks are invoked one at a time,
+    in the order their sounds finished. With more workers, a slow callback
+    no longer delays the others, but callbacks may run concurrently and out
+    of order.
+    """
+
+    def _work(self) -> None:
+        while True:
+            taken = self._take()
+            if taken is None:
+                return
+
+            completion = taken[0]
+            self._record(taken)
+            errors = self._invoke(completion)
+            if errors:
+                self._record([], errors=errors)
+
+            del taken, completion
+            self._done(1)
+
+
+class BatchDispatcher(Dispatcher):
+    """Deliver completions in batches to a single handler
+
+    A single worker thread wakes when completions arrive, optionally waits a
+    short while for more to accumulate, then passes up to ``max_batch`` of
+    them to ``handler`` at once.
+
+    :param handler:
+        Called with a list of :class:`Completion`. If omitted, each
+        completion's own callback is invoked.
+
+    :param max_batch:
+        The most completions passed to the handler at once
+
+    :param max_wait:
+        Seconds to wait for more completions to arrive after the first of a
+        batch, if the batch isn't yet full
+
+    """
+
+    thread_name = 'py-canberra batch callback thread'
+
+    def __init__(self,
+                 handler: Callable[[List[Completion]], Any] = None,
+                 max_batch: int = 64,
+                 max_wait: float = 0.0,
+                 maxsize: int = 0,
+                 overflow: str = 'block'):
+        super().__init__(maxsize=maxsize, overflow=overflow, workers=1)
+
+        if max_batch < 1:
+            raise ValueError(f'max_batch must be at least 1. Found {max_batch!r}')
+
+        self.handler = handler
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+
+    def _gather_more(self) -> None:
+        deadline = perf_counter() + self.max_wait
+        with self._cond:
+            while len(self._queue) < self.max_batch and not self._closing:
+                remaining = deadline - perf_counter()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+
+    def _work(self) -> None:
+        while True:
+            if self.max_wait > 0:
+                with self._cond:
+                    while not self._queue and not self._discarded and not self._closing:
+                        self._cond.wait()
+                self._gather_more()
+
+            batch = self._take(self.max_batch)
+            if batch is None:
+                return
+
+            self._record(batch)
+
+            if self.handler is None:
+                errors = sum(self._invoke(completion) for completion in batch)
+            else:
+                try:
+                    self.handler(batch)
+                except Exception:
+                    _log_exception('Error in batch completion handler')
+                    errors = 1
+                else:
+                    errors = 0
+
+            if errors:
+                self._record([], errors=errors)
+
+            count = len(batch)
+            del batch
+            self._done(count)
+
+
+def _log_exception(msg: str, *args) -> None:
+    # logging is imported only when needed, as it's slow to import
+    import logging
+    logging.getLogger(__name__).exception(msg, *args)
+
+
+_dispatcher_lock = threading.Lock()
+_dispatcher: Optional[Dispatcher] = None
+
+
+def get_dispatcher() -> Dispatcher:
+    """Return the dispatcher delivering finish callbacks, starting it if necessary"""
+    global _dispatcher
+
+    dispatcher = _dispatcher
+    if dispatcher is None:
+        with _dispatcher_lock:
+            if _dispatcher is None:
+                _dispatcher = ThreadDispatcher()
+                _dispatcher.start()
+            dispatcher = _dispatcher
+
+    return dispatcher
+
+
+def set_dispatcher(dispatcher: Dispatcher, wait: bool = True) -> None:
+    """Deliver all finish callbacks through the specified dispatcher from now on
+
+    The previous dispatcher is closed once its waiting completions have been
+    dispatched. Completions submitted to it after the switch (e.g. by a sound
+    finishing at the same moment) are passed on to the new dispatcher, so no
+    callback is lost.
+
+    :param dispatcher:
+        The new dispatcher; it's started if not already
+
+    :param wait:
+        Whether to wait for the previous dispatcher to finish dispatching
+
+    """
+    global _dispatcher
+
+    dispatcher.start()
+
+    with _dispatcher_lock:
+        previous, _dispatcher = _dispatcher, dispatcher
+
+    if previous is not None and previous is not dispatcher:
+        previous._hand_off(dispatcher)
+        previous.close(wait=wait)
+
+
+def _after_fork_in_child() -> None:
+    global _dispatcher_lock
+
+    _dispatcher_lock = threading.Lock()
+    if _dispatcher is not None:
+        _dispatcher._after_fork_in_child()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
@@ -0,0 +1,105 @@
+"""The backend drivers chosen by :meth:`Context.open_best`, remembered across process starts
+
+Probing drivers costs a connection attempt per driver, each of which may
+take hundreds of milliseconds to fail on a headless host. The driver (and
+device) which succeeded is recorded per host in a JSON file, so later
+process starts go straight to it, and only probe again if it fails.
+
+"""
+import json
+import os
+import socket
+import threading
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple, Union
+
+#: Drivers probed by :meth:`Context.open_best`, in order of preference
+DEFAULT_DRIVERS = ('pulse', 'alsa', 'oss', 'null')
+
+
+class DriverChoice(NamedTuple):
+    """A backend driver, and optionally the device used with it"""
+
+    driver: str
+    device: Optional[str] = None
+
+
+Candidate = Union[str, Tuple[str, Optional[str]], DriverChoice]
+
+
+def to_choices(candidates: Iterable[Candidate]) -> List[DriverChoice]:
+    """Normalize driver names and (driver, device) pairs into DriverChoices"""
+    choices = []
+    for candidate in candidates:
+        if isinstance(candidate, str):
+            choices.append(DriverChoice(candidate))
+        else:
+            choices.append(DriverChoice(*candidate))
+    return choices
+
+
+def default_cache_path() -> str:
+    """Return ``$XDG_CACHE_HOME/py-canberra/drivers.json``"""
+    cache_home = os.environ.get('XDG_CACHE_HOME') or os.path.expanduser('~/.cache')
+    return os.path.join(cache_home, 'py-canberra', 'drivers.json')
+
+
+class DriverCache:
+    """A JSON file of the driver chosen on each host
+
+    Entries are keyed by hostname, so a home directory shared between hosts
+    (e.g. over NFS) remembers each host's driver separately. Failing to read
+    or write the file is never an error: the cache is simply treated as
+    empty.
+
+    :param path:
+        The path of the cache file. Defaults to :func:`default_cache_path`.
+
+    """
+
+    def __init__(self, path: Union[str, os.PathLike] = None):
+        self.path = os.fspath(path) if path is not None else default_cache_path()
+        self._lock = threading.Lock()
+
+    def get(self, host: str = None) -> Optional[DriverChoice]:
+        """Return the driver recorded for the host (this one, by default), if any"""
+        entry = self._read().get(host or socket.gethostname())
+        if not isinstance(entry, dict) or not isinstance(entry.get('driver'), str):
+            return None
+        return DriverChoice(entry['driver'], entry.get('device'))
+
+    def set(self, choice: DriverChoice, host: str = None) -> None:
+        """Record the driver chosen on the host (this one, by default)"""
+        with self._lock:
+            entries = self._read()
+            entries[host or socket.gethostname()] = {'driver': choice.driver, 'device': choice.device}
+            self._write(entries)
+
+    def discard(self, host: str = None) -> None:
+        """Forget the driver recorded for the host (this one, by default)"""
+        with self._lock:
+            entries = self._read()
+            if entries.pop(host or socket.gethostname(), None) is not None:
+                self._write(entries)
+
+    def _read(self) -> Dict[str, dict]:
+        try:
+            with open(self.path) as fp:
+                entries = json.load(fp)
+        except (OSError, ValueError):
+            return {}
+        return entries if isinstance(entries, dict) else {}
+
+    def _write(self, entries: Dict[str, dict]) -> None:
+        # Written to a temporary file, then renamed into place, so concurrent
+        # readers never see a partially-written file
+        tmp_path = f'{self.path}.{os.getpid()}.tmp'
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(tmp_path, 'w') as fp:
+                json.dump(entries, fp, indent=2, sort_keys=True)
+            os.replace(tmp_path, self.path)
+        except OSError:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
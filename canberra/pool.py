@@ -0,0 +1,151 @@
+import os
+import threading
+import weakref
+from time import monotonic
+from typing import Dict, Hashable, NamedTuple, Optional, Tuple, Union
+
+from . import Context, PropList, Props
+
+PropsArg = Union[PropList, Dict[Union[str, Props], str]]
+
+
+def _key_value(value) -> Union[str, bytes]:
+    # Binary values are keyed by their contents, as PropList.items() returns
+    # them: str() of a bytes-like object is its repr (or, for a memoryview,
+    # its address), which could collide with a string value or never match.
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return bytes(value)
+    return str(value)
+
+
+class _PoolEntry:
+    __slots__ = ('context', 'last_used')
+
+    def __init__(self, context: Context, last_used: float):
+        self.context = context
+        self.last_used = last_used
+
+
+class PoolKey(NamedTuple):
+    driver: Optional[str]
+    device: Optional[str]
+    props: Tuple[Tuple[str, str], ...]
+
+
+class ContextPool:
+    """A pool of contexts, shared by all callers asking for the same driver, device, and default props
+
+    Connecting to the sound server, and looking up and uploading samples,
+    happens once per pooled context, rather than once per sound. Contexts
+    unused for longer than :paramref:`.idle_timeout` are evicted from the
+    pool; any sounds they're still playing finish normally.
+
+    Contexts are shared across threads, guarded by a lock only while being
+    looked up or created.
+
+    :param idle_timeout:
+        Seconds a context may go unused before being evicted. ``None`` keeps
+        contexts around indefinitely.
+
+    """
+
+    def __init__(self, idle_timeout: Optional[float] = 300.0):
+        self.idle_timeout = idle_timeout
+
+        self._lock = threading.Lock()
+        self._entries: Dict[Hashable, _PoolEntry] = {}
+
+        _pools.add(self)
+
+    @staticmethod
+    def make_key(driver: str = None, device: str = None, props: PropsArg = None) -> PoolKey:
+        if isinstance(props, PropList):
+            items = props.items()
+        else:
+            items = [(str(prop), _key_value(value)) for prop, value in Props.from_kwargs(props).items()]
+
+        return PoolKey(driver, device, tuple(sorted(items)))
+
+    def get(self, driver: str = None, device: str = None, props: PropsArg = None) -> Context:
+        """Return the pooled context for the specified configuration, creating it if necessary
+
+        :param driver:
+            The backend driver to use (see :meth:`Context.set_driver`), or
+            ``None`` to let libcanberra choose
+
+        :param device:
+            The backend device to use (see :meth:`Context.change_device`), or
+            ``None`` for the default device
+
+        :param props:
+            A :class:`PropList`, or a mapping of :class:`Props` to values,
+            set as defaults for all sounds played from the context
+
+        """
+        key = self.make_key(driver, device, props)
+        now = monotonic()
+
+        with self._lock:
+            self._evict_idle(now)
+
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._entries[key] = _PoolEntry(self._create(driver, device, props), now)
+            else:
+                entry.last_used = now
+
+            return entry.context
+
+    def _create(self, driver: Optional[str], device: Optional[str], props: Optional[PropsArg]) -> Context:
+        context = Context(props)
+        if driver is not None:
+            context.set_driver(driver)
+        if device is not None:
+            context.change_device(device)
+        return context
+
+    def _evict_idle(self, now: float) -> None:
+        if self.idle_timeout is None:
+            return
+
+        expired = [
+            key
+            for key, entry in self._entries.items()
+            if now - entry.last_used > self.idle_timeout
+        ]
+        for key in expired:
+            del self._entries[key]
+
+    def evict_idle(self) -> None:
+        """Evict all contexts which have gone unused for longer than the idle timeout"""
+        with self._lock:
+            self._evict_idle(monotonic())
+
+    def clear(self) -> None:
+        """Evict all contexts from the pool"""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _after_fork_in_child(self) -> None:
+        # The lock may have been held by another thread at the time of the
+        # fork. Pooled contexts are kept; each reconnects on first use.
+        self._lock = threading.Lock()
+
+
+_pools: 'weakref.WeakSet[ContextPool]' = weakref.WeakSet()
+
+
+def _after_fork_in_child() -> None:
+    for pool in list(_pools):
+        pool._after_fork_in_child()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
+
+
+#: The pool used by :func:`canberra.play` and :func:`canberra.play_file`
+default_pool = ContextPool()
@@ -0,0 +1,253 @@
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Union
+
+from . import Context, PropList, Props
+from .constants import Errors, NOTSET
+from .theme import theme_directories
+
+PropsArg = Union[PropList, Dict[Union[str, Props], str]]
+
+#: File extensions recognized as sounds when preloading theme directories
+SOUND_EXTENSIONS = ('.oga', '.ogg', '.wav')
+
+
+class _Sample:
+    __slots__ = ('event_id', 'filename', 'size')
+
+    def __init__(self, event_id: str, filename: Optional[str], size: int):
+        self.event_id = event_id
+        self.filename = filename
+        self.size = size
+
+
+class SampleCache:
+    """Uploads samples to the sound server ahead of time, and tracks which are resident
+
+    Samples are uploaded with :meth:`Context.cache`, marked with
+    :attr:`.CANBERRA_CACHE_CONTROL` ``"permanent"``, so playing them never
+    pays the upload cost. When more samples are resident than the budget
+    (:paramref:`.max_samples`/:paramref:`.max_bytes`) allows, the
+    least-recently-played ones are evicted.
+
+    .. note::
+
+        libcanberra offers no way to remove a sample from the sound server.
+        Evicting a sample means it's no longer pinned by this cache: further
+        plays of it are marked ``"volatile"``, and it won't be uploaded as
+        ``"permanent"`` again until it's re-admitted by :meth:`preload`.
+
+    :param context:
+        The :class:`Context` samples are uploaded and played through
+
+    :param max_samples:
+        The most samples resident at once, or ``None`` for no limit
+
+    :param max_bytes:
+        The most bytes of sound files resident at once, or ``None`` for no
+        limit. Only samples preloaded from files (rather than by event id
+        alone) count toward this budget.
+
+    :param workers:
+        The number of uploads performed concurrently by :meth:`preload`
+
+    :param context_factory:
+        If passed, each upload worker uploads through its own context created
+        with this callable, rather than sharing :paramref:`.context`.
+        Samples are shared server-wide, so this allows uploads to proceed in
+        parallel over separate connections.
+
+    """
+
+    def __init__(self,
+                 context: Context,
+                 max_samples: int = None,
+                 max_bytes: int = None,
+                 workers: int = 4,
+                 context_factory: Callable[[], Context] = None):
+        self.context = context
+        self.max_samples = max_samples
+        self.max_bytes = max_bytes
+        self.workers = workers
+        self.context_factory = context_factory
+
+        self._lock = threading.Lock()
+        self._resident: 'OrderedDict[str, _Sample]' = OrderedDict()
+        self._resident_bytes = 0
+        self._evicted = set()
+        self._worker_contexts = threading.local()
+
+    @property
+    def resident(self) -> List[str]:
+        """Event ids of the resident samples, least-recently-played first"""
+        with self._lock:
+            return list(self._resident)
+
+    @property
+    def resident_bytes(self) -> int:
+        """Total size of the resident sound files"""
+        return self._resident_bytes
+
+    def __contains__(self, event_id: str) -> bool:
+        return event_id in self._resident
+
+    def __len__(self):
+        return len(self._resident)
+
+    def preload(self,
+                event_ids: Iterable[str] = (),
+                theme_dirs: Iterable[Union[str, Path]] = (),
+                props: PropsArg = None,
+                **other_props: str,
+                ) -> Dict[str, Union[Errors, Exception]]:
+        """Upload samples concurrently, returning once all uploads have finished
+
+        :param event_ids:
+            Event ids to upload, found through the XDG sound theme as with
+            :meth:`Context.play`
+
+        :param theme_dirs:
+            Directories whose sound files are uploaded. Each file is cached
+            under an event id of its filename, without extension (e.g.
+            ``stereo/bell.oga`` as ``"bell"``).
+
+        :param props:
+            A :class:`PropList`, or a mapping of :class:`Props` to values,
+            attached to every uploaded sample.
+
+        :param other_props:
+            :class:`Props` may also be passed as kwargs, where
+            ``{Props.EVENT_ID: 'bell'}`` is passed as ``event_id='bell'``.
+
+        :return:
+            A mapping of each event id to :attr:`.SUCCESS` or the exception
+            raised uploading it.
+
+        """
+        samples = [_Sample(event_id, None, 0) for event_id in event_ids]
+        for theme_dir in theme_dirs:
+            samples.extend(self._scan(Path(theme_dir)))
+
+        if isinstance(props, PropList):
+            base = props.overlay(None, **other_props)
+        else:
+            base = PropList(props, **other_props)
+
+        results = {}
+        with ThreadPoolExecutor(max_workers=self.workers,
+                                thread_name_prefix='py-canberra sample upload') as executor:
+            futures = [(sample, executor.submit(self._upload, sample, base)) for sample in samples]
+            for sample, future in futures:
+                try:
+                    future.result()
+                except Exception as e:
+                    results[sample.event_id] = e
+                else:
+                    results[sample.event_id] = Errors.SUCCESS
+                    self._admit(sample)
+
+        return results
+
+    def play(self,
+             props: PropsArg = None,
+             id: int = 0,
+             on_finished: Callable = None,
+             user_data: Any = NOTSET,
+             tags: Union[str, Iterable[str]] = None,
+             **other_props: str) -> None:
+        """Play a sound through the cache's context, marking its sample as recently played
+
+        Accepts the same arguments as :meth:`Context.play`.
+
+        """
+        if isinstance(props, PropList):
+            proplist = props.overlay(None, **other_props) if other_props else props
+        else:
+            proplist = PropList(props, **other_props)
+
+        event_id = proplist[Props.EVENT_ID] if Props.EVENT_ID in proplist else None
+
+        if event_id is not None:
+            with self._lock:
+                if event_id in self._resident:
+                    self._resident.move_to_end(event_id)
+                elif event_id in self._evicted and Props.CANBERRA_CACHE_CONTROL not in proplist:
+                    proplist = proplist.overlay({Props.CANBERRA_CACHE_CONTROL: 'volatile'})
+
+        self.context.play(proplist, id=id, on_finished=on_finished, user_data=user_data, tags=tags)
+
+    def evict(self, event_id: str) -> None:
+        """Stop tracking a sample as resident"""
+        with self._lock:
+            self._evict(event_id)
+
+    def _evict(self, event_id: str) -> None:
+        sample = self._resident.pop(event_id, None)
+        if sample is not None:
+            self._resident_bytes -= sample.size
+            self._evicted.add(event_id)
+
+    def _admit(self, sample: _Sample) -> None:
+        with self._lock:
+            self._evict(sample.event_id)
+            self._evicted.discard(sample.event_id)
+
+            self._resident[sample.event_id] = sample
+            self._resident_bytes += sample.size
+
+            while len(self._resident) > 1 and self._over_budget():
+                self._evict(next(iter(self._resident)))
+
+    def _over_budget(self) -> bool:
+        if self.max_samples is not None and len(self._resident) > self.max_samples:
+            return True
+        if self.max_bytes is not None and self._resident_bytes > self.max_bytes:
+            return True
+        return False
+
+    def _upload_context(self) -> Context:
+        if self.context_factory is None:
+            return self.context
+
+        context = getattr(self._worker_contexts, 'context', None)
+        if context is None:
+            context = self._worker_contexts.context = self.context_factory()
+        return context
+
+    def _upload(self, sample: _Sample, base: PropList) -> None:
+        props = {
+            Props.EVENT_ID: sample.event_id,
+            Props.CANBERRA_CACHE_CONTROL: 'permanent',
+        }
+        if sample.filename is not None:
+            props[Props.MEDIA_FILENAME] = sample.filename
+
+        self._upload_context().cache(base.overlay(props))
+
+    @staticmethod
+    def _scan(theme_dir: Path) -> Iterable[_Sample]:
+        # Where a sound appears in several subdirectories, the copy uploaded is
+        # the one libcanberra would play: the theme's stereo subdirectories are
+        # scanned first, in the order of its index.theme, then the rest.
+        listed = [theme_dir / subdir for subdir in theme_directories(theme_dir)]
+        walked = set()
+        seen = set()
+        for top in [*listed, theme_dir]:
+            for root, dirs, files in os.walk(top):
+                if Path(root) in walked:
+                    dirs.clear()
+                    continue
+                walked.add(Path(root))
+
+                dirs.sort()
+                for filename in sorted(files):
+                    event_id, ext = os.path.splitext(filename)
+                    if ext not in SOUND_EXTENSIONS or event_id in seen:
+                        continue
+
+                    seen.add(event_id)
+                    path = os.path.join(root, filename)
+                    yield _Sample(event_id, path, os.path.getsize(path))
@@ -0,0 +1,341 @@
+"""Voice limiting and priority scheduling of sounds
+
+When far more sounds overlap than the sound server can sensibly mix, a
+:class:`VoiceScheduler` caps the number playing at once. Sounds beyond the
+cap are dropped, queued until a voice frees up, or preempt a less important
+sound, according to their priority:
+
+.. code-block:: python
+
+    scheduler = VoiceScheduler(ctx, max_voices=4, policy='preempt',
+                               priorities={'alarm': 10, 'event': 0, 'animation': -5})
+
+    scheduler.play(event_id='alarm-clock-elapsed', media_role='alarm')
+
+"""
+import heapq
+import itertools
+import threading
+from typing import Any, Callable, Dict, List, Mapping, NamedTuple, Optional, Tuple, Union
+
+from . import Context, PropList, Props
+from ._canberra import CanberraError
+from .constants import Errors, NOTSET
+
+PropsArg = Union[PropList, Dict[Union[str, Props], str]]
+
+POLICIES = ('drop', 'queue', 'preempt')
+
+# Sound IDs are 32-bit unsigned ints; 0 is left for sounds which never need canceling
+_MAX_ID = 2 ** 32 - 1
+
+
+class VoiceSchedulerStats(NamedTuple):
+    """A snapshot of a scheduler's counters"""
+
+    #: Number of sounds started
+    started: int
+    #: Number of sounds which had to wait in the queue
+    queued: int
+    #: Number of sounds dropped, either when played or later from the queue
+    dropped: int
+    #: Number of playing sounds canceled to make room for a more important sound
+    preempted: int
+    #: Number of sounds currently playing
+    active: int
+    #: Number of sounds currently waiting in the queue
+    waiting: int
+
+
+class _Voice:
+    """One sound played through the scheduler"""
+
+    __slots__ = ('proplist', 'id', 'play_id', 'priority', 'seq', 'on_finished', 'user_data', 'preempted')
+
+    def __init__(self,
+                 proplist: PropList,
+                 id: int,
+                 play_id: int,
+                 priority: int,
+                 seq: int,
+                 on_finished: Optional[Callable],
+                 user_data: Any):
+        self.proplist = proplist
+        self.id = id
+        self.play_id = play_id
+        self.priority = priority
+        self.seq = seq
+        self.on_finished = on_finished
+        self.user_data = user_data
+        self.preempted = False
+
+    def sort_key(self) -> Tuple[int, int]:
+        # Highest priority first, then oldest first
+        return -self.priority, self.seq
+
+
+class VoiceScheduler:
+    """Limits the number of sounds playing at once, by priority
+
+    A sound's priority is passed to :meth:`play`, or looked up in
+    :paramref:`.priorities` by the value of its :paramref:`.priority_prop`
+    (:attr:`.MEDIA_ROLE`, by default).
+
+    When :paramref:`.max_voices` sounds are already playing, a new sound is
+    handled according to :paramref:`.policy`:
+
+     - ``'drop'``: the sound isn't played
+     - ``'queue'``: the sound waits, and is started (highest priority first)
+       from the finish callback of a playing sound
+     - ``'preempt'``: the lowest-priority playing sound is canceled if it's
+       less important than the new sound, which starts in its place;
+       otherwise, the new sound is queued
+
+    Dropped sounds have their ``on_finished`` callback called with a
+    :exc:`CanberraError` with a ``code`` of :attr:`.CANCELED`, as do
+    preempted sounds (reported by libcanberra).
+
+    Sounds played with an ``id`` of ``0`` are each given a unique id, so
+    preempting one cancels only that sound; their callbacks still receive
+    ``0``. Preempting a sound played with an explicit ``id`` cancels every
+    sound sharing that id.
+
+    :param context:
+        The :class:`Context` sounds are played through
+
+    :param max_voices:
+        The most sounds playing at once
+
+    :param policy:
+        ``'drop'``, ``'queue'``, or ``'preempt'``
+
+    :param priorities:
+        A mapping of :paramref:`.priority_prop` values to priorities. Larger
+        numbers are more important.
+
+    :param priority_prop:
+        The prop whose value is looked up in :paramref:`.priorities`
+
+    :param default_priority:
+        The priority of sounds not found in :paramref:`.priorities`
+
+    :param max_queue:
+        The most sounds waiting at once, or ``None`` for no limit. When the
+        queue is full, the least important sound (possibly the new one) is
+        dropped.
+
+    """
+
+    def __init__(self,
+                 context: Context,
+                 max_voices: int = 8,
+                 policy: str = 'queue',
+                 priorities: Mapping[str, int] = None,
+                 priority_prop: Union[str, Props] = Props.MEDIA_ROLE,
+                 default_priority: int = 0,
+                 max_queue: int = None):
+        if policy not in POLICIES:
+            raise ValueError(f'policy must be one of {POLICIES!r}. Found {policy!r}')
+        if max_voices < 1:
+            raise ValueError(f'max_voices must be at least 1. Found {max_voices!r}')
+
+        self.context = context
+        self.max_voices = max_voices
+        self.policy = policy
+        self.priorities = dict(priorities or {})
+        self.priority_prop = priority_prop
+        self.default_priority = default_priority
+        self.max_queue = max_queue
+
+        self._lock = threading.Lock()
+        # Playing sounds, by seq
+        self._active: Dict[int, _Voice] = {}
+        self._queue: List[Tuple[Tuple[int, int], _Voice]] = []
+        self._seq = itertools.count()
+        self._ids = itertools.count(1)
+
+        self._started = 0
+        self._queued = 0
+        self._dropped = 0
+        self._preempted = 0
+
+    def play(self,
+             props: PropsArg = None,
+             id: int = 0,
+             on_finished: Callable = None,
+             user_data: Any = NOTSET,
+             priority: int = None,
+             **other_props: str) -> bool:
+        """Play a sound now, or queue or drop it if all voices are in use
+
+        Accepts the same arguments as :meth:`Context.play`.
+
+        :param priority:
+            The sound's priority. If omitted, it's looked up by the sound's
+            :paramref:`~VoiceScheduler.priority_prop`.
+
+        :return:
+            ``True`` if the sound was started or queued, and ``False`` if it
+            was dropped.
+
+        """
+        if isinstance(props, PropList):
+            proplist = props.overlay(None, **other_props) if other_props else props
+        else:
+            proplist = PropList(props, **other_props)
+
+        if priority is None:
+            priority = self._priority_of(proplist)
+
+        dropped = []
+        victim = None
+
+        with self._lock:
+            voice = _Voice(proplist, id, id or self._next_id(), priority, next(self._seq), on_finished, user_data)
+
+            if len(self._active) < self.max_voices:
+                start = True
+            else:
+                start = False
+
+                if self.policy == 'preempt':
+                    victim = self._find_victim(priority)
+
+                if self.policy == 'drop' or (victim is None and self.max_queue == 0):
+                    dropped.append(voice)
+                else:
+                    # A preempting sound waits at the head of the queue for
+                    # the victim's voice, so the voice limit is never exceeded.
+                    self._enqueue(voice, dropped, bounded=victim is None)
+
+                if victim is not None:
+                    victim.preempted = True
+                    self._preempted += 1
+
+            if start:
+                self._reserve(voice)
+
+        for voice_ in dropped:
+            self._reject(voice_)
+
+        if victim is not None:
+            self._cancel_quietly(victim.play_id)
+
+        if start:
+            try:
+                self._start(voice)
+            except BaseException:
+                with self._lock:
+                    self._release(voice)
+                    self._started -= 1
+                raise
+
+        return voice not in dropped
+
+    def cancel(self, id: int = 0) -> None:
+        """Cancel playing and queued sounds with the specified id
+
+        Queued sounds are removed without being played, and their callbacks
+        are called with a :exc:`CanberraError` with a ``code`` of :attr:`.CANCELED`.
+        """
+        with self._lock:
+            removed = [voice for _, voice in self._queue if voice.id == id]
+            if removed:
+                self._queue = [(key, voice) for key, voice in self._queue if voice.id != id]
+                heapq.heapify(self._queue)
+            play_ids = {voice.play_id for voice in self._active.values() if voice.id == id}
+
+        for voice in removed:
+            self._finish(voice, CanberraError(Errors.CANCELED, 'Canceled'))
+
+        for play_id in play_ids:
+            self.context.cancel(play_id)
+
+    def stats(self) -> VoiceSchedulerStats:
+        """Return a snapshot of the scheduler's counters"""
+        with self._lock:
+            return VoiceSchedulerStats(
+                started=self._started,
+                queued=self._queued,
+                dropped=self._dropped,
+                preempted=self._preempted,
+                active=len(self._active),
+                waiting=len(self._queue),
+            )
+
+    def _priority_of(self, proplist: PropList) -> int:
+        if self.priority_prop in proplist:
+            return self.priorities.get(proplist[self.priority_prop], self.default_priority)
+        return self.default_priority
+
+    def _next_id(self) -> int:
+        return (next(self._ids) - 1) % _MAX_ID + 1
+
+    def _find_victim(self, priority: int) -> Optional[_Voice]:
+        candidates = [v for v in self._active.values() if not v.preempted and v.priority < priority]
+        if not candidates:
+            return None
+        # The least important, and among those, the most recently started
+        return min(candidates, key=lambda v: (v.priority, -v.seq))
+
+    def _enqueue(self, voice: _Voice, dropped: List[_Voice], bounded: bool = True) -> None:
+        heapq.heappush(self._queue, (voice.sort_key(), voice))
+        self._queued += 1
+
+        if bounded and self.max_queue is not None and len(self._queue) > self.max_queue:
+            # Drop the least important (and, among those, newest) waiting sound
+            worst = max(self._queue, key=lambda item: item[0])
+            self._queue.remove(worst)
+            heapq.heapify(self._queue)
+            dropped.append(worst[1])
+
+    def _reserve(self, voice: _Voice) -> None:
+        self._active[voice.seq] = voice
+        self._started += 1
+
+    def _release(self, voice: _Voice) -> None:
+        self._active.pop(voice.seq, None)
+
+    def _start(self, voice: _Voice) -> None:
+        self.context.play(voice.proplist, id=voice.play_id, on_finished=self._on_finished, user_data=voice)
+
+    def _on_finished(self, context: Context, play_id: int, error, voice: _Voice) -> None:
+        with self._lock:
+            self._release(voice)
+
+        self._finish(voice, error)
+        self._pump()
+
+    def _pump(self) -> None:
+        """Start queued sounds while voices are free"""
+        while True:
+            with self._lock:
+                if not self._queue or len(self._active) >= self.max_voices:
+                    return
+                _, voice = heapq.heappop(self._queue)
+                self._reserve(voice)
+
+            try:
+                self._start(voice)
+            except Exception as e:
+                with self._lock:
+                    self._release(voice)
+                self._finish(voice, e)
+
+    def _reject(self, voice: _Voice) -> None:
+        with self._lock:
+            self._dropped += 1
+        self._finish(voice, CanberraError(Errors.CANCELED, 'Voice limit reached'))
+
+    def _cancel_quietly(self, play_id: int) -> None:
+        try:
+            self.context.cancel(play_id)
+        except CanberraError:
+            pass
+
+    def _finish(self, voice: _Voice, error) -> None:
+        if voice.on_finished is None:
+            return
+
+        from .dispatch import Completion, get_dispatcher
+        get_dispatcher().submit(Completion(self.context, voice.id, error, voice.on_finished, voice.user_data))
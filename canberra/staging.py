@@ -0,0 +1,330 @@
+"""Staging of sound files in shared memory
+
+Unless a sound is cached by the sound server, libcanberra reads and decodes
+its file on every play. When sound files live on slow (e.g. network)
+storage, a :class:`StagingArea` copies each file into a tmpfs directory
+(``/dev/shm``, by default) the first time it's played, and rewrites
+:attr:`.MEDIA_FILENAME` to the staged copy, so hot sounds never touch the
+underlying disk again:
+
+.. code-block:: python
+
+    ctx = Context()
+    ctx.resolver = StagingArea(resolver=ThemeResolver(), max_bytes=32 * 1024 * 1024)
+    ctx.play(event_id='bell')  # played from /dev/shm/py-canberra-.../
+
+"""
+import itertools
+import os
+import shutil
+import tempfile
+import threading
+import weakref
+from collections import OrderedDict, deque
+from time import monotonic
+from typing import Deque, Dict, Iterable, List, Mapping, Optional, Tuple, Union
+
+from ._canberra import PropList
+from .constants import Props
+
+#: Directory staging areas are created in, if it exists and is writable
+DEFAULT_PARENT = '/dev/shm'
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+#: Seconds an evicted copy is kept on disk before it's deleted
+DEFAULT_GRACE_PERIOD = 5.0
+
+
+class _Staged:
+    __slots__ = ('source', 'path', 'size', 'mtime_ns', 'checked_at')
+
+    def __init__(self, source: str, path: str, size: int, mtime_ns: int, checked_at: float):
+        self.source = source
+        self.path = path
+        self.size = size
+        self.mtime_ns = mtime_ns
+        self.checked_at = checked_at
+
+
+def default_parent() -> str:
+    """Return ``/dev/shm`` if it's usable, or the system temp directory otherwise"""
+    if os.path.isdir(DEFAULT_PARENT) and os.access(DEFAULT_PARENT, os.W_OK | os.X_OK):
+        return DEFAULT_PARENT
+    return tempfile.gettempdir()
+
+
+def _remove_directory(path: str, owner_pid: int) -> None:
+    # A forked child inherits the finalizer, but the directory belongs to the parent
+    if os.getpid() == owner_pid:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+class StagingArea:
+    """Copies sound files into a tmpfs directory, and plays them from there
+
+    Assign a staging area to :attr:`Context.resolver` to stage the
+    :attr:`.MEDIA_FILENAME` of every sound played or cached through the
+    context, or pass one to :func:`canberra.play_file`. A file is copied the
+    first time it's staged; afterward, staging it costs a dictionary lookup.
+
+    When more files are staged than the budget
+    (:paramref:`.max_bytes`/:paramref:`.max_files`) allows, the
+    least-recently-staged copies are deleted. Files larger than
+    :paramref:`.max_bytes` are played from their original location.
+
+    Evicted (or replaced) copies aren't deleted right away, as a sound may
+    have just been resolved to one and not yet opened by libcanberra; they're
+    deleted by a later call to :meth:`stage` once
+    :paramref:`.grace_period` has passed.
+
+    The staging directory is created on first use, and deleted along with
+    the staging area (or at exit).
+
+    .. note::
+
+        A staged copy is not checked against its source unless
+        :paramref:`.check_interval` is passed; call :meth:`evict` (or
+        :meth:`clear`) after replacing a sound file.
+
+    :param parent:
+        The directory the staging directory is created in. Defaults to
+        ``/dev/shm``, or the system temp directory if that isn't available.
+
+    :param max_bytes:
+        The most bytes of sound files staged at once, or ``None`` for no limit
+
+    :param max_files:
+        The most files staged at once, or ``None`` for no limit
+
+    :param resolver:
+        If passed, each proplist is first passed through this resolver's
+        ``resolve_props`` (e.g. a :class:`~canberra.theme.ThemeResolver`), so
+        sounds played by :attr:`.EVENT_ID` are staged, too.
+
+    :param check_interval:
+        Minimum seconds between checks of a staged file's source for changes.
+        ``None`` disables checking, so hot sounds never ``stat()`` their source.
+
+    :param grace_period:
+        Seconds an evicted copy is kept on disk before it's deleted
+
+    """
+
+    def __init__(self,
+                 parent: Union[str, os.PathLike] = None,
+                 max_bytes: Optional[int] = DEFAULT_MAX_BYTES,
+                 max_files: Optional[int] = None,
+                 resolver=None,
+                 check_interval: Optional[float] = None,
+                 grace_period: float = DEFAULT_GRACE_PERIOD):
+        self.parent = os.fspath(parent) if parent is not None else default_parent()
+        self.max_bytes = max_bytes
+        self.max_files = max_files
+        self.resolver = resolver
+        self.check_interval = check_interval
+        self.grace_period = grace_period
+
+        self._lock = threading.Lock()
+        self._directory: Optional[str] = None
+        self._finalizer = None
+        self._names = itertools.count()
+        # Staged files, by absolute source path, least-recently-staged first
+        self._staged: Dict[str, _Staged] = OrderedDict()
+        self._size = 0
+        # Evicted copies waiting out the grace period, as (deadline, path), oldest first
+        self._retired: Deque[Tuple[float, str]] = deque()
+
+    @property
+    def directory(self) -> Optional[str]:
+        """The staging directory, or None if nothing has been staged yet"""
+        return self._directory
+
+    @property
+    def size(self) -> int:
+        """Total bytes of the files currently staged"""
+        return self._size
+
+    def __len__(self) -> int:
+        return len(self._staged)
+
+    def __contains__(self, path: Union[str, os.PathLike]) -> bool:
+        return os.path.abspath(os.fspath(path)) in self._staged
+
+    def stage(self, path: Union[str, os.PathLike]) -> str:
+        """Return the path of the staged copy of a file, copying it if necessary
+
+        The original path is returned if the file is too large to stage.
+
+        :raises OSError: if the file can't be read
+
+        """
+        source = os.path.abspath(os.fspath(path))
+
+        # Checked on every call, as hot sounds may never reach the copy below
+        self._delete_retired()
+
+        with self._lock:
+            staged = self._staged.get(source)
+            if staged is not None and self._is_fresh(staged):
+                self._staged.move_to_end(source)
+                return staged.path
+
+        st = os.stat(source)
+        if self.max_bytes is not None and st.st_size > self.max_bytes:
+            return source
+
+        if staged is not None and staged.mtime_ns == st.st_mtime_ns and staged.size == st.st_size:
+            with self._lock:
+                staged.checked_at = monotonic()
+                if self._staged.get(source) is staged:
+                    self._staged.move_to_end(source)
+                    return staged.path
+
+        # The copy is made outside the lock, so hot sounds aren't held up
+        # behind a cold one. Should two threads stage the same file at once,
+        # the first copy is kept, and the others discarded.
+        directory = self._ensure_directory()
+        name = f'{next(self._names)}-{os.path.basename(source)}'
+        staged_path = os.path.join(directory, name)
+        tmp_path = os.path.join(directory, f'.{name}.tmp')
+        try:
+            shutil.copyfile(source, tmp_path)
+            os.replace(tmp_path, staged_path)
+        except BaseException:
+            _unlink(tmp_path)
+            raise
+
+        new = _Staged(source, staged_path, st.st_size, st.st_mtime_ns, monotonic())
+        with self._lock:
+            current = self._staged.get(source)
+            if current is not None and current is not staged:
+                # Another thread staged the file meanwhile
+                self._staged.move_to_end(source)
+            else:
+                if current is not None:
+                    del self._staged[source]
+                    self._size -= current.size
+                    self._retire([current])
+
+                self._staged[source] = current = new
+                self._size += new.size
+                self._retire(self._over_budget())
+
+        if current is not new:
+            # Nothing can have been resolved to our copy yet, so it's deleted right away
+            _unlink(staged_path)
+
+        return current.path
+
+    def preload(self, paths: Iterable[Union[str, os.PathLike]]) -> List[str]:
+        """Stage several files ahead of time, returning their staged paths"""
+        return [self.stage(path) for path in paths]
+
+    def resolve_props(self, proplist: PropList, context_props: Mapping[str, str] = None) -> PropList:
+        """Return the proplist with :attr:`.MEDIA_FILENAME` pointed at the staged copy
+
+        The proplist is returned unchanged if it names no file, or the file
+        can't be staged; libcanberra then reports the error when it's played.
+        :paramref:`.context_props` is passed on to :paramref:`.resolver`.
+
+        """
+        if self.resolver is not None:
+            proplist = self.resolver.resolve_props(proplist, context_props)
+
+        if Props.MEDIA_FILENAME not in proplist:
+            return proplist
+
+        filename = proplist[Props.MEDIA_FILENAME]
+        try:
+            staged_path = self.stage(filename)
+        except OSError:
+            return proplist
+
+        if staged_path == filename:
+            return proplist
+        return proplist.overlay({Props.MEDIA_FILENAME: staged_path})
+
+    def evict(self, path: Union[str, os.PathLike]) -> bool:
+        """Delete the staged copy of a file (once the grace period has passed), returning whether it was staged"""
+        source = os.path.abspath(os.fspath(path))
+        with self._lock:
+            staged = self._staged.pop(source, None)
+            if staged is None:
+                return False
+            self._size -= staged.size
+            self._retire([staged])
+
+        return True
+
+    def clear(self) -> None:
+        """Delete every staged copy (once the grace period has passed)"""
+        with self._lock:
+            self._retire(list(self._staged.values()))
+            self._staged.clear()
+            self._size = 0
+
+    def close(self) -> None:
+        """Delete the staging directory and everything in it, right away"""
+        with self._lock:
+            self._staged.clear()
+            self._retired.clear()
+            self._size = 0
+            finalizer, self._finalizer = self._finalizer, None
+            self._directory = None
+
+        if finalizer is not None:
+            finalizer()
+
+    def _ensure_directory(self) -> str:
+        with self._lock:
+            if self._directory is None:
+                self._directory = tempfile.mkdtemp(prefix='py-canberra-', dir=self.parent)
+                self._finalizer = weakref.finalize(self, _remove_directory, self._directory, os.getpid())
+            return self._directory
+
+    def _is_fresh(self, staged: _Staged) -> bool:
+        if self.check_interval is None:
+            return True
+        return monotonic() - staged.checked_at < self.check_interval
+
+    def _retire(self, evicted: List[_Staged]) -> None:
+        """Schedule evicted copies for deletion once the grace period has passed"""
+        deadline = monotonic() + self.grace_period
+        self._retired.extend((deadline, old.path) for old in evicted)
+
+    def _delete_retired(self) -> None:
+        """Delete the evicted copies whose grace period has passed"""
+        if not self._retired:
+            return
+
+        now = monotonic()
+        expired = []
+        with self._lock:
+            while self._retired and self._retired[0][0] <= now:
+                expired.append(self._retired.popleft()[1])
+
+        for path in expired:
+            _unlink(path)
+
+    def _over_budget(self) -> List[_Staged]:
+        """Forget the least-recently-staged files beyond the budget, returning them"""
+        evicted = []
+        # The most recently staged file is always kept
+        while len(self._staged) > 1 and (
+            (self.max_files is not None and len(self._staged) > self.max_files)
+            or (self.max_bytes is not None and self._size > self.max_bytes)
+        ):
+            _, old = self._staged.popitem(last=False)
+            self._size -= old.size
+            evicted.append(old)
+        return evicted
+
+
+def _unlink(path: str) -> None:
+    # Deleting a file being played is safe: libcanberra keeps its open handle.
+    # Only a file not yet opened is at risk, hence the grace period.
+    try:
+        os.unlink(path)
+    except OSError:
+        pass
@@ -0,0 +1,342 @@
+"""Opt-in instrumentation of libcanberra calls and finished sounds
+
+Recording is off by default, costing a single check per call. Enable it for
+every context with :func:`enable`, or for a single context by assigning a
+:class:`Stats` to :attr:`Context.stats`:
+
+.. code-block:: python
+
+    from canberra import stats
+
+    stats.enable()
+    ...
+    snapshot = stats.snapshot()
+    print(snapshot.calls['play'].latency.percentile(0.99))
+
+Each native call (``open``, ``change_props``, ``cache``, ``play``,
+``play_many``, ``cancel``, ``cancel_many``) is counted, along with its errors
+by :class:`Errors` code and a histogram of its duration. For played sounds,
+histograms of the time from play to finish (``play_to_finish``) and from
+finish until the callback is dispatched (``finish_to_dispatch``) are kept, too.
+
+"""
+import os
+import threading
+from math import frexp
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from .constants import Errors
+
+#: Upper bounds, in seconds, of the histogram buckets: 1us, 2us, 4us, ... ~16.8s
+BUCKET_BOUNDS: Tuple[float, ...] = tuple(2 ** k / 1e6 for k in range(25))
+
+#: Names of the histograms kept for finished sounds
+PLAY_TO_FINISH = 'play_to_finish'
+FINISH_TO_DISPATCH = 'finish_to_dispatch'
+
+
+class Histogram:
+    """A histogram of durations, in power-of-two buckets from 1us to ~16.8s
+
+    Durations beyond the last bucket are counted in an overflow bucket.
+    """
+
+    __slots__ = ('counts', 'count', 'total', 'min', 'max')
+
+    def __init__(self):
+        self.counts: List[int] = [0] * (len(BUCKET_BOUNDS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+
+    def add(self, seconds: float) -> None:
+        self.counts[bucket_index(seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if self.min is None or seconds < self.min:
+            self.min = seconds
+        if self.max is None or seconds > self.max:
+            self.max = seconds
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, q: float) -> float:
+        """Return an upper bound on the ``q`` quantile (0–1) of the recorded durations"""
+        if not self.count:
+            return 0.0
+
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(BUCKET_BOUNDS, self.counts):
+            seen += count
+            if count and seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def buckets(self) -> List[Tuple[float, int]]:
+        """Return (upper bound, count) pairs; the overflow bucket's bound is ``inf``"""
+        return list(zip(BUCKET_BOUNDS + (float('inf'),), self.counts))
+
+    def copy(self) -> 'Histogram':
+        other = Histogram()
+        other.counts = list(self.counts)
+        other.count = self.count
+        other.total = self.total
+        other.min = self.min
+        other.max = self.max
+        return other
+
+    def __repr__(self):
+        return f'<Histogram count={self.count} mean={self.mean * 1e6:.1f}us max={(self.max or 0) * 1e6:.1f}us>'
+
+
+def bucket_index(seconds: float) -> int:
+    micros = seconds * 1e6
+    if micros <= 1:
+        return 0
+
+    mantissa, exponent = frexp(micros)
+    index = exponent - 1 if mantissa == 0.5 else exponent
+    return min(index, len(BUCKET_BOUNDS))
+
+
+class CallStats:
+    """Counters and a duration histogram for one kind of call"""
+
+    __slots__ = ('calls', 'errors', 'latency')
+
+    def __init__(self):
+        self.calls = 0
+        self.errors: Dict[Errors, int] = {}
+        self.latency = Histogram()
+
+    @property
+    def error_count(self) -> int:
+        return sum(self.errors.values())
+
+    def copy(self) -> 'CallStats':
+        other = CallStats()
+        other.calls = self.calls
+        other.errors = dict(self.errors)
+        other.latency = self.latency.copy()
+        return other
+
+    def __repr__(self):
+        return f'<CallStats calls={self.calls} errors={self.error_count} latency={self.latency!r}>'
+
+
+class Event(NamedTuple):
+    """One recorded measurement, as passed to observers"""
+
+    #: Name of the call (e.g. ``'play'``), or :data:`PLAY_TO_FINISH`/:data:`FINISH_TO_DISPATCH`
+    name: str
+    #: Duration, in seconds
+    seconds: float
+    #: The outcome of the call or sound
+    error: Errors
+    #: The Context the measurement was taken from
+    context: object
+
+
+class StatsSnapshot(NamedTuple):
+    """A copy of a :class:`Stats` collector's counters at one moment"""
+
+    #: Stats of each native call, by name
+    calls: Dict[str, CallStats]
+    #: Seconds from playing each sound until it finished
+    play_to_finish: Histogram
+    #: Seconds from each sound finishing until its callback was dispatched
+    finish_to_dispatch: Histogram
+    #: Number of sounds played and not yet reported finished by libcanberra
+    in_flight: int
+    #: Counters of the finish-callback dispatcher, if one has been started
+    dispatcher: Optional[object] = None
+
+
+Observer = Callable[[Event], None]
+
+
+class Stats:
+    """A collector of call counts, errors, and duration histograms
+
+    Observers added with :meth:`add_observer` are called with an
+    :class:`Event` for each measurement: for native calls, from the thread
+    making the call, and for :data:`PLAY_TO_FINISH`/:data:`FINISH_TO_DISPATCH`,
+    from the dispatcher's thread, just before the sound's callback is invoked.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._observers: List[Observer] = []
+        self._reset()
+
+    def _reset(self) -> None:
+        self._calls: Dict[str, CallStats] = {}
+        self._play_to_finish = Histogram()
+        self._finish_to_dispatch = Histogram()
+        self._in_flight = 0
+
+    def _after_fork_in_child(self) -> None:
+        # The lock may have been held at the time of the fork, and the
+        # parent's sounds never finish in the child.
+        self._lock = threading.Lock()
+        self._in_flight = 0
+
+    def reset(self) -> None:
+        """Zero all counters and histograms"""
+        with self._lock:
+            self._reset()
+
+    def add_observer(self, observer: Observer) -> None:
+        with self._lock:
+            self._observers = [*self._observers, observer]
+
+    def remove_observer(self, observer: Observer) -> None:
+        with self._lock:
+            self._observers = [o for o in self._observers if o is not observer]
+
+    def snapshot(self) -> StatsSnapshot:
+        with self._lock:
+            return StatsSnapshot(
+                calls={name: call.copy() for name, call in self._calls.items()},
+                play_to_finish=self._play_to_finish.copy(),
+                finish_to_dispatch=self._finish_to_dispatch.copy(),
+                in_flight=self._in_flight,
+                dispatcher=_dispatcher_stats(),
+            )
+
+    def record_call(self, name: str, seconds: float, code: int = 0, context=None, started: int = 0) -> None:
+        """Record one native call, which started ``started`` sounds"""
+        error = Errors(code)
+
+        with self._lock:
+            call = self._calls.get(name)
+            if call is None:
+                call = self._calls[name] = CallStats()
+
+            call.calls += 1
+            if error != Errors.SUCCESS:
+                call.errors[error] = call.errors.get(error, 0) + 1
+            call.latency.add(seconds)
+            self._in_flight += started
+
+            observers = self._observers
+
+        self._notify(observers, Event(name, seconds, error, context))
+
+    def record_finished(self) -> None:
+        """Count one sound as finished
+
+        This is called from libcanberra's threads, and must never invoke
+        user code.
+        """
+        with self._lock:
+            self._in_flight -= 1
+
+    def record_dispatch(self, play_to_finish: float, finish_to_dispatch: float, error, context=None) -> None:
+        """Record the timings of one finished sound, as its callback is dispatched"""
+        if not isinstance(error, Errors):
+            # A CanberraError
+            error = error.code
+
+        with self._lock:
+            self._play_to_finish.add(play_to_finish)
+            self._finish_to_dispatch.add(finish_to_dispatch)
+            observers = self._observers
+
+        self._notify(observers, Event(PLAY_TO_FINISH, play_to_finish, error, context))
+        self._notify(observers, Event(FINISH_TO_DISPATCH, finish_to_dispatch, error, context))
+
+    @staticmethod
+    def _notify(observers: Iterable[Observer], event: Event) -> None:
+        for observer in observers:
+            try:
+                observer(event)
+            except Exception:
+                # logging is imported only when needed, as it's slow to import
+                import logging
+                logging.getLogger(__name__).exception('Error in stats observer %r', observer)
+
+
+def record_dispatch(completion, dispatched_at: float) -> None:
+    """Record the timings of a finished sound, as its callback is dispatched"""
+    play_to_finish = completion.finished_at - completion.started_at
+    finish_to_dispatch = dispatched_at - completion.finished_at
+
+    for stats in completion.collectors:
+        stats.record_dispatch(play_to_finish, finish_to_dispatch, completion.error, completion.context)
+
+
+def _dispatcher_stats():
+    from . import dispatch
+    dispatcher = dispatch._dispatcher
+    return dispatcher.stats() if dispatcher is not None else None
+
+
+_global_stats: Optional[Stats] = None
+
+
+def _after_fork_in_child() -> None:
+    if _global_stats is not None:
+        _global_stats._after_fork_in_child()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
+
+
+def enable(stats: Stats = None) -> Stats:
+    """Record stats from every context into a module-wide collector, returning it
+
+    :param stats:
+        The collector to record into. If omitted, the current collector is
+        kept, or a new one created.
+
+    """
+    global _global_stats
+    from ._canberra import _set_global_stats
+
+    if stats is None:
+        stats = _global_stats or Stats()
+
+    _global_stats = stats
+    _set_global_stats(stats)
+    return stats
+
+
+def disable() -> None:
+    """Stop recording stats into the module-wide collector"""
+    global _global_stats
+    from ._canberra import _set_global_stats
+
+    _global_stats = None
+    _set_global_stats(None)
+
+
+def is_enabled() -> bool:
+    return _global_stats is not None
+
+
+def get_stats() -> Optional[Stats]:
+    """Return the module-wide collector, or None if stats aren't enabled"""
+    return _global_stats
+
+
+def snapshot() -> Optional[StatsSnapshot]:
+    """Return a snapshot of the module-wide collector, or None if stats aren't enabled"""
+    stats = _global_stats
+    return stats.snapshot() if stats is not None else None
+
+
+def add_observer(observer: Observer) -> None:
+    """Call ``observer`` with each :class:`Event` recorded module-wide, enabling stats if necessary"""
+    enable().add_observer(observer)
+
+
+def remove_observer(observer: Observer) -> None:
+    stats = _global_stats
+    if stats is not None:
+        stats.remove_observer(observer)
@@ -0,0 +1,344 @@
+"""An in-memory index of XDG sound themes
+
+libcanberra finds the file for an :attr:`.EVENT_ID` by probing the XDG sound
+theme directories, costing a handful of ``stat()`` calls for every sound
+played. A :class:`ThemeResolver` indexes the theme directories once, and
+resolves event ids to filenames from memory, following the same lookup rules
+as libcanberra.
+
+.. code-block:: python
+
+    ctx = Context()
+    ctx.resolver = ThemeResolver()
+    ctx.play(event_id='bell')  # played with media.filename already resolved
+
+"""
+import configparser
+import os
+import threading
+from pathlib import Path
+from time import monotonic
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
+
+from ._canberra import PropList
+from .constants import Props
+
+DEFAULT_THEME = 'freedesktop'
+DEFAULT_OUTPUT_PROFILE = 'stereo'
+
+#: Suffixes tried, in order, for each sound name. A ``.disabled`` file disables the sound.
+SUFFIXES = ('.disabled', '.oga', '.ogg', '.wav')
+
+
+def default_data_dirs() -> List[Path]:
+    """Return the XDG data directories, in order of precedence"""
+    data_home = os.environ.get('XDG_DATA_HOME') or os.path.expanduser('~/.local/share')
+    data_dirs = os.environ.get('XDG_DATA_DIRS') or '/usr/local/share:/usr/share'
+
+    dirs = []
+    for path in [data_home, *data_dirs.split(':')]:
+        if path and Path(path) not in dirs:
+            dirs.append(Path(path))
+    return dirs
+
+
+def default_locale() -> Optional[str]:
+    for var in ('LC_ALL', 'LC_MESSAGES', 'LANG'):
+        value = os.environ.get(var)
+        if value:
+            return value
+    return None
+
+
+def locale_variants(locale: Optional[str]) -> List[str]:
+    """Return the locale subdirectories to search, most specific first
+
+    e.g. ``de_DE.UTF-8@euro`` yields ``de_DE@euro``, ``de_DE``, ``de``, ``C``,
+    and finally ``''`` for unlocalized sounds.
+    """
+    variants = []
+
+    if locale and locale not in ('C', 'POSIX'):
+        base, _, modifier = locale.partition('@')
+        base = base.partition('.')[0]
+        lang = base.partition('_')[0]
+
+        if modifier:
+            variants.append(f'{base}@{modifier}')
+        variants.append(base)
+        if lang != base:
+            variants.append(lang)
+
+    variants.extend(('C', ''))
+    return variants
+
+
+def name_variants(name: str) -> List[str]:
+    """Return the sound names to search, e.g. ``dialog-warning-auth``, ``dialog-warning``, ``dialog``"""
+    names = [name]
+    while '-' in name:
+        name = name.rsplit('-', 1)[0]
+        names.append(name)
+    return names
+
+
+def theme_directories(theme_dir: os.PathLike, output_profile: str = DEFAULT_OUTPUT_PROFILE) -> List[str]:
+    """Return the subdirectories of a sound theme, in the order libcanberra searches them
+
+    Subdirectories of the output profile come first, then those of the
+    default (``stereo``) profile, each in the order its ``index.theme`` lists
+    them. Subdirectories of other profiles are never searched.
+    """
+    theme = ThemeResolver._read_theme(Path(theme_dir))
+    return [subdir for profile in output_profiles(output_profile)
+            for subdir, subdir_profile in theme.directories if subdir_profile == profile]
+
+
+def output_profiles(output_profile: str) -> List[str]:
+    """Return the output profiles searched for a sound, e.g. ``5.1``, then ``stereo``"""
+    if output_profile == DEFAULT_OUTPUT_PROFILE:
+        return [output_profile]
+    return [output_profile, DEFAULT_OUTPUT_PROFILE]
+
+
+class _Theme:
+    __slots__ = ('name', 'inherits', 'directories')
+
+    def __init__(self, name: str, inherits: List[str], directories: List[Tuple[str, str]]):
+        self.name = name
+        self.inherits = inherits
+        # (subdirectory, output profile) pairs
+        self.directories = directories
+
+
+class ThemeResolver:
+    """Resolves event ids to sound files through an in-memory index of the XDG sound themes
+
+    The theme directories are scanned once. Afterward, they're checked for
+    changes at most every :paramref:`.check_interval` seconds, and the index
+    is rebuilt if any were modified.
+
+    The theme, output profile, and locale of each sound are read from its
+    :attr:`.CANBERRA_XDG_THEME_NAME`, :attr:`.CANBERRA_XDG_THEME_OUTPUT_PROFILE`,
+    and :attr:`.MEDIA_LANGUAGE` (or :attr:`.APPLICATION_LANGUAGE`) props, or
+    those of the context playing it, falling back to the defaults passed here.
+
+    :param data_dirs:
+        The XDG data directories searched for ``sounds/`` themes, in order of
+        precedence. Defaults to ``$XDG_DATA_HOME`` and ``$XDG_DATA_DIRS``.
+
+    :param theme:
+        The theme used when a sound doesn't specify one
+
+    :param output_profile:
+        The output profile used when a sound doesn't specify one
+
+    :param locale:
+        The locale used when a sound doesn't specify one. Defaults to the
+        locale of the environment.
+
+    :param check_interval:
+        Minimum seconds between checks of the theme directories for changes.
+        ``None`` disables checking; call :meth:`invalidate` instead.
+
+    """
+
+    def __init__(self,
+                 data_dirs: Iterable[os.PathLike] = None,
+                 theme: str = DEFAULT_THEME,
+                 output_profile: str = DEFAULT_OUTPUT_PROFILE,
+                 locale: str = None,
+                 check_interval: Optional[float] = 2.0):
+        self.data_dirs = [Path(d) for d in data_dirs] if data_dirs is not None else default_data_dirs()
+        self.theme = theme
+        self.output_profile = output_profile
+        self.locale = locale if locale is not None else default_locale()
+        self.check_interval = check_interval
+
+        self._lock = threading.RLock()
+        self._themes: Optional[Dict[str, _Theme]] = None
+        self._files: Dict[str, str] = {}
+        self._dir_mtimes: Dict[str, float] = {}
+        self._resolved: Dict[Tuple[str, str, str, Optional[str]], Optional[str]] = {}
+        self._last_check = 0.0
+
+    def invalidate(self) -> None:
+        """Discard the index, to be rebuilt on the next lookup"""
+        with self._lock:
+            self._themes = None
+            self._files = {}
+            self._dir_mtimes = {}
+            self._resolved = {}
+
+    def resolve(self,
+                event_id: str,
+                theme: str = None,
+                output_profile: str = None,
+                locale: str = None) -> Optional[str]:
+        """Return the path of the sound file for an event id, or None if there isn't one
+
+        ``None`` is also returned if the sound is disabled by the theme.
+
+        """
+        theme = theme or self.theme
+        output_profile = output_profile or self.output_profile
+        locale = locale or self.locale
+
+        key = (event_id, theme, output_profile, locale)
+
+        with self._lock:
+            self._ensure_index()
+
+            try:
+                return self._resolved[key]
+            except KeyError:
+                pass
+
+            path = self._resolved[key] = self._lookup(event_id, theme, output_profile, locale)
+            return path
+
+    def resolve_props(self, proplist: PropList, context_props: Mapping[str, str] = None) -> PropList:
+        """Return the proplist with :attr:`.MEDIA_FILENAME` set from its :attr:`.EVENT_ID`
+
+        The proplist is returned unchanged if it has no event id, already
+        names a file, or no sound file is found.
+
+        :param context_props:
+            The props of the context playing the sound, by prop name (as
+            :attr:`Context.props`), consulted for the theme, output profile,
+            and locale when the proplist doesn't set them. :class:`Context`
+            passes its own.
+
+        """
+        if Props.EVENT_ID not in proplist or Props.MEDIA_FILENAME in proplist:
+            return proplist
+
+        def get(prop: Props) -> Optional[str]:
+            if prop in proplist:
+                return proplist[prop]
+            if context_props is not None:
+                return context_props.get(str(prop))
+            return None
+
+        path = self.resolve(
+            proplist[Props.EVENT_ID],
+            theme=get(Props.CANBERRA_XDG_THEME_NAME),
+            output_profile=get(Props.CANBERRA_XDG_THEME_OUTPUT_PROFILE),
+            locale=get(Props.MEDIA_LANGUAGE) or get(Props.APPLICATION_LANGUAGE),
+        )
+        if path is None:
+            return proplist
+
+        return proplist.overlay({Props.MEDIA_FILENAME: path})
+
+    def _ensure_index(self) -> None:
+        if self._themes is None:
+            self._build_index()
+            return
+
+        if self.check_interval is None:
+            return
+
+        now = monotonic()
+        if now - self._last_check < self.check_interval:
+            return
+        self._last_check = now
+
+        for path, mtime in self._dir_mtimes.items():
+            try:
+                changed = os.stat(path).st_mtime != mtime
+            except OSError:
+                changed = True
+
+            if changed:
+                self.invalidate()
+                self._build_index()
+                return
+
+    def _build_index(self) -> None:
+        themes: Dict[str, _Theme] = {}
+        files: Dict[str, str] = {}
+        dir_mtimes: Dict[str, float] = {}
+
+        for data_dir in self.data_dirs:
+            sounds_dir = data_dir / 'sounds'
+            try:
+                dir_mtimes[str(sounds_dir)] = os.stat(sounds_dir).st_mtime
+            except OSError:
+                continue
+
+            for root, dirs, filenames in os.walk(sounds_dir):
+                dir_mtimes[root] = os.stat(root).st_mtime
+                rel_root = os.path.relpath(root, sounds_dir)
+
+                for filename in filenames:
+                    rel_path = os.path.join(rel_root, filename)
+                    # Earlier data dirs take precedence
+                    files.setdefault(rel_path, os.path.join(root, filename))
+
+            for theme_dir in sorted(p for p in sounds_dir.iterdir() if p.is_dir()):
+                if theme_dir.name not in themes:
+                    themes[theme_dir.name] = self._read_theme(theme_dir)
+
+        self._themes = themes
+        self._files = files
+        self._dir_mtimes = dir_mtimes
+        self._last_check = monotonic()
+
+    @staticmethod
+    def _read_theme(theme_dir: Path) -> _Theme:
+        parser = configparser.ConfigParser(interpolation=None, strict=False)
+        try:
+            parser.read(theme_dir / 'index.theme', encoding='utf-8')
+        except configparser.Error:
+            pass
+
+        inherits = []
+        directories = []
+        if parser.has_section('Sound Theme'):
+            section = parser['Sound Theme']
+            inherits = [t.strip() for t in section.get('Inherits', '').split(',') if t.strip()]
+
+            for subdir in section.get('Directories', '').split(','):
+                subdir = subdir.strip()
+                if subdir:
+                    profile = parser.get(subdir, 'OutputProfile', fallback=DEFAULT_OUTPUT_PROFILE)
+                    directories.append((subdir, profile))
+
+        return _Theme(theme_dir.name, inherits, directories)
+
+    def _theme_chain(self, theme: str) -> List[_Theme]:
+        chain = []
+        pending = [theme]
+        while pending:
+            name = pending.pop(0)
+            if name in (t.name for t in chain) or name not in self._themes:
+                continue
+
+            chain.append(self._themes[name])
+            pending.extend(self._themes[name].inherits)
+
+        if DEFAULT_THEME in self._themes and all(t.name != DEFAULT_THEME for t in chain):
+            chain.append(self._themes[DEFAULT_THEME])
+
+        return chain
+
+    def _lookup(self, event_id: str, theme: str, output_profile: str, locale: Optional[str]) -> Optional[str]:
+        chain = self._theme_chain(theme)
+        locales = locale_variants(locale)
+
+        for name in name_variants(event_id):
+            for profile in output_profiles(output_profile):
+                for t in chain:
+                    for subdir, subdir_profile in t.directories:
+                        if subdir_profile != profile:
+                            continue
+
+                        for loc in locales:
+                            for suffix in SUFFIXES:
+                                rel_path = os.path.join(t.name, subdir, loc, name + suffix)
+                                path = self._files.get(rel_path)
+                                if path is not None:
+                                    return None if suffix == '.disabled' else path
+
+        return None
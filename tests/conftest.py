@@ -0,0 +1,18 @@
+import pytest
+
+from canberra import Context, LibraryNotFoundError, PropList
+
+
+@pytest.fixture(scope='session')
+def libcanberra() -> None:
+    """Skip the test if libcanberra can't be loaded"""
+    try:
+        PropList()
+    except LibraryNotFoundError:
+        pytest.skip('libcanberra is not installed')
+
+
+@pytest.fixture
+def context(libcanberra) -> Context:
+    """A Context using the null driver, so no sound is actually output"""
+    return Context(driver='null')
@@ -0,0 +1,58 @@
+import threading
+
+import pytest
+
+from canberra import Errors
+from canberra._canberra import CanberraError
+from canberra.coalesce import Coalescer
+from canberra.dispatch import get_dispatcher
+
+# PropList loads libcanberra
+pytestmark = pytest.mark.usefixtures('libcanberra')
+
+
+class FailingContext:
+    """Stands in for a Context whose play() fails, once allowed to return"""
+
+    def __init__(self):
+        self.playing = threading.Event()
+        self.fail = threading.Event()
+
+    def play(self, proplist, id=0, on_finished=None, user_data=None):
+        self.playing.set()
+        self.fail.wait(5)
+        raise CanberraError(Errors.NOTFOUND)
+
+
+def test_merged_callers_receive_play_error():
+    context = FailingContext()
+    coalescer = Coalescer(context, window=10)
+    errors = []
+    raised = []
+
+    def play_first():
+        try:
+            coalescer.play(event_id='bell', on_finished=lambda ctx, id, error: errors.append(('first', error)))
+        except CanberraError as e:
+            raised.append(e)
+
+    first = threading.Thread(target=play_first)
+    first.start()
+    assert context.playing.wait(5)
+
+    # Merged into the first play, which is still in progress
+    assert coalescer.play(event_id='bell', on_finished=lambda ctx, id, error: errors.append(('merged', error)))
+    assert coalescer.stats().merged == 1
+
+    context.fail.set()
+    first.join(5)
+    get_dispatcher().drain(5)
+
+    error, = raised
+    assert error.code == Errors.NOTFOUND
+
+    (caller, error), = errors
+    assert caller == 'merged'
+    assert isinstance(error, CanberraError)
+    assert error.code == Errors.NOTFOUND
+    assert coalescer.stats().started == 0
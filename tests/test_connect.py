@@ -0,0 +1,51 @@
+import threading
+
+import pytest
+
+from canberra import Context, Errors, drain_all
+from canberra._canberra import CanberraError
+
+pytestmark = pytest.mark.usefixtures('libcanberra')
+
+QUEUED = 2000
+
+
+def test_sounds_played_during_flush_start_after_queued_sounds():
+    # The 'slow' driver takes a while to open, so sounds are queued meanwhile
+    context = Context(driver='slow', connect='background')
+    finished = []
+    connected = threading.Event()
+
+    def on_finished(ctx, id, error, name):
+        finished.append(name)
+
+    for i in range(QUEUED):
+        context.play(event_id='bell', on_finished=on_finished, user_data=('queued', i))
+
+    # Plays from another thread until the queue has been flushed, so some of
+    # these sounds are played while it's being flushed
+    played = []
+
+    def play_more():
+        while not connected.is_set():
+            context.play(event_id='bell', on_finished=on_finished, user_data=('more', len(played)))
+            played.append(('more', len(played)))
+
+    thread = threading.Thread(target=play_more)
+    thread.start()
+
+    try:
+        context.ready.result(10)
+    except CanberraError as e:
+        if e.code == Errors.NODRIVER:
+            pytest.skip("libcanberra has no 'slow' driver")
+        raise
+    finally:
+        connected.set()
+        thread.join(10)
+
+    assert context.drain(10)
+    assert drain_all(10)
+
+    # Callbacks are dispatched in the order their sounds were started
+    assert finished == [('queued', i) for i in range(QUEUED)] + played
@@ -0,0 +1,68 @@
+import os
+import stat
+import threading
+
+import pytest
+
+from canberra import Errors
+from canberra._canberra import CanberraError
+from canberra.daemon import DaemonClient, SoundDaemon
+
+pytestmark = pytest.mark.usefixtures('libcanberra')
+
+
+@pytest.fixture
+def daemon(tmp_path):
+    server = SoundDaemon(str(tmp_path / 'daemon.sock'), contexts=2, driver='null')
+    thread = threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True)
+    thread.start()
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
+        thread.join(5)
+
+
+def test_socket_accessible_to_owner_only(daemon):
+    mode = os.stat(daemon.path).st_mode
+    assert stat.S_ISSOCK(mode)
+    assert mode & 0o077 == 0
+
+
+def test_play_round_trip(daemon):
+    finished = threading.Event()
+    results = []
+
+    def on_finished(client, id, error):
+        results.append((client, id, error))
+        finished.set()
+
+    with DaemonClient(daemon.path, timeout=5) as client:
+        assert client.play(event_id='bell', id=7, on_finished=on_finished).result(5) is None
+        assert finished.wait(5)
+
+        (finished_client, id, error), = results
+        assert finished_client is client
+        assert id == 7
+        assert error == Errors.SUCCESS
+
+
+def test_play_error_round_trip(daemon):
+    with DaemonClient(daemon.path, timeout=5) as client:
+        # Neither an event id nor a file to play
+        future = client.play(media_role='event')
+
+        with pytest.raises(CanberraError) as exc_info:
+            future.result(5)
+        assert exc_info.value.code == Errors.INVALID
+
+        # The connection survives a failed request
+        client.ping()
+
+
+def test_binary_props_rejected(daemon):
+    with DaemonClient(daemon.path, timeout=5) as client:
+        with pytest.raises(TypeError):
+            client.play(event_id='bell', window_x11_xid=b'\x01')
+        client.ping()
@@ -0,0 +1,16 @@
+from canberra import ContextGroup
+from canberra.stats import Stats
+
+
+def test_play_sends_deferred_props(context):
+    context.props_interval = 60
+    context.open()
+    group = ContextGroup([context])
+    context.change_props(application_name='deferred', defer=True)
+
+    context.stats = Stats()
+    group.play(event_id='bell')
+
+    # Sent before the sound, rather than left waiting for the timer
+    assert context.stats.snapshot().calls['change_props'].calls == 1
+    assert context.props == {'application.name': 'deferred'}
@@ -0,0 +1,73 @@
+import pytest
+
+from canberra import PropList, Props
+
+# PropList loads libcanberra, too
+pytestmark = pytest.mark.usefixtures('libcanberra')
+
+BINARY_VALUES = [
+    pytest.param(b'\x00\x01\xff', id='bytes'),
+    pytest.param(bytearray(b'\x00\x01\xff'), id='bytearray'),
+    pytest.param(memoryview(b'\x00\x01\xff'), id='memoryview'),
+]
+
+
+def non_contiguous() -> memoryview:
+    return memoryview(b'\x00\x00\x01\x00\xff\x00')[::2]
+
+
+def test_string_values_round_trip():
+    proplist = PropList(application_name='Café')
+    assert proplist.items() == [('application.name', 'Café')]
+    assert proplist[Props.APPLICATION_NAME] == 'Café'
+
+
+@pytest.mark.parametrize('value', BINARY_VALUES)
+def test_binary_values_round_trip(value):
+    proplist = PropList({Props.WINDOW_X11_XID: value}, application_name='test')
+    assert proplist.items() == [
+        ('window.x11.xid', b'\x00\x01\xff'),
+        ('application.name', 'test'),
+    ]
+    assert proplist[Props.WINDOW_X11_XID] == b'\x00\x01\xff'
+
+
+@pytest.mark.parametrize('value', BINARY_VALUES)
+def test_binary_values_survive_overlay(value):
+    proplist = PropList(window_x11_xid=value).overlay(event_id='bell')
+    assert proplist[Props.WINDOW_X11_XID] == b'\x00\x01\xff'
+    assert proplist[Props.EVENT_ID] == 'bell'
+
+
+def test_non_contiguous_buffer_raises():
+    with pytest.raises(BufferError):
+        PropList(window_x11_xid=non_contiguous())
+
+
+@pytest.mark.parametrize('value', BINARY_VALUES)
+def test_play_binary_values(context, value):
+    context.play(event_id='bell', window_x11_xid=value)
+    context.play(PropList(window_x11_xid=value), event_id='bell')
+
+
+def test_play_non_contiguous_buffer_raises(context):
+    with pytest.raises(BufferError):
+        context.play(event_id='bell', window_x11_xid=non_contiguous())
+
+
+@pytest.mark.parametrize('value', BINARY_VALUES)
+def test_change_props_binary_values_round_trip(context, value):
+    context.change_props(window_x11_xid=value, application_name='test')
+    assert context.props == {'window.x11.xid': b'\x00\x01\xff', 'application.name': 'test'}
+
+
+@pytest.mark.parametrize('value', BINARY_VALUES)
+def test_deferred_binary_values_round_trip(context, value):
+    context.change_props(window_x11_xid=value, defer=True)
+    assert context.props == {'window.x11.xid': b'\x00\x01\xff'}
+
+
+def test_change_props_non_contiguous_buffer_raises(context):
+    with pytest.raises(BufferError):
+        context.change_props(window_x11_xid=non_contiguous())
+    assert context.props == {}
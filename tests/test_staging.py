@@ -0,0 +1,63 @@
+import os
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from canberra.staging import StagingArea
+
+
+@pytest.fixture
+def sounds(tmp_path: Path):
+    paths = []
+    for name in ('a', 'b'):
+        path = tmp_path / f'{name}.oga'
+        path.write_bytes(os.urandom(64))
+        paths.append(path)
+    return paths
+
+
+def test_evicted_copy_deleted_after_grace_period(tmp_path, sounds):
+    a, b = sounds
+    staging = StagingArea(parent=tmp_path, max_files=1, grace_period=0.05)
+    try:
+        staged_a = staging.stage(a)
+        staged_b = staging.stage(b)  # evicts a
+
+        # Kept through the grace period, in case a sound was just resolved to it
+        assert a not in staging
+        assert os.path.exists(staged_a)
+
+        time.sleep(0.1)
+
+        # Deleted by the next call, even though it finds b already staged
+        assert staging.stage(b) == staged_b
+        assert not os.path.exists(staged_a)
+        assert os.path.exists(staged_b)
+    finally:
+        staging.close()
+
+
+def test_racing_stages_keep_one_copy(tmp_path, sounds):
+    a, _ = sounds
+    staging = StagingArea(parent=tmp_path)
+    barrier = threading.Barrier(8)
+    results = []
+
+    def stage():
+        barrier.wait()
+        results.append(staging.stage(a))
+
+    try:
+        threads = [threading.Thread(target=stage) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(5)
+
+        path, = set(results)
+        assert len(results) == 8
+        assert os.listdir(staging.directory) == [os.path.basename(path)]
+    finally:
+        staging.close()
@@ -0,0 +1,69 @@
+"""A bounded run of benchmarks/stress.py: many threads sharing one Context"""
+import random
+import threading
+from collections import Counter
+
+from canberra import PropList
+from canberra.dispatch import get_dispatcher
+
+THREADS = 8
+STEPS = 300
+
+
+def test_callbacks_balance_across_threads(context):
+    bell = PropList(event_id='bell', media_role='event', canberra_cache_control='volatile')
+    lock = threading.Lock()
+    counts = Counter()
+    errors = []
+
+    def finished(ctx, id, error):
+        with lock:
+            counts['finished'] += 1
+
+    def work(seed: int):
+        rand = random.Random(seed)
+        try:
+            for _ in range(STEPS):
+                choice = rand.random()
+                id = rand.randrange(1, 16)
+
+                if choice < 0.5:
+                    context.play(bell, id=id, on_finished=finished, tags='stress')
+                    started = 1
+                elif choice < 0.6:
+                    results = context.play_many([{'props': bell, 'id': id, 'on_finished': finished}] * 4)
+                    started = sum(1 for r in results if not isinstance(r, Exception))
+                elif choice < 0.75:
+                    context.cancel(id)
+                    started = 0
+                elif choice < 0.8:
+                    context.cancel_group('stress')
+                    started = 0
+                elif choice < 0.95:
+                    context.playing(id)
+                    context.active_count()
+                    started = 0
+                else:
+                    context.change_props(application_name=f'stress {rand.randrange(4)}')
+                    started = 0
+
+                with lock:
+                    counts['started'] += started
+        except BaseException as e:
+            errors.append(e)
+
+    context.open()
+    workers = [threading.Thread(target=work, args=(seed,)) for seed in range(THREADS)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(30)
+
+    assert context.drain(10)
+    assert get_dispatcher().drain(10)
+
+    assert errors == []
+    assert counts['finished'] == counts['started']
+    assert context.active_count() == 0
+    assert context.active_ids() == []
+    assert get_dispatcher().stats().errors == 0
@@ -0,0 +1,77 @@
+from pathlib import Path
+
+import pytest
+
+from canberra import PropList, Props
+from canberra.theme import ThemeResolver
+
+# PropList loads libcanberra, too
+pytestmark = pytest.mark.usefixtures('libcanberra')
+
+
+def write_theme(data_dir: Path, name: str, sounds=('bell',)) -> None:
+    theme_dir = data_dir / 'sounds' / name
+    (theme_dir / 'stereo').mkdir(parents=True)
+    (theme_dir / 'index.theme').write_text(
+        '[Sound Theme]\n'
+        f'Name={name}\n'
+        'Directories=stereo\n'
+        '\n'
+        '[stereo]\n'
+        'OutputProfile=stereo\n'
+    )
+    for sound in sounds:
+        (theme_dir / 'stereo' / f'{sound}.oga').write_bytes(b'')
+
+
+@pytest.fixture
+def resolver(tmp_path: Path) -> ThemeResolver:
+    write_theme(tmp_path, 'freedesktop')
+    write_theme(tmp_path, 'custom')
+    return ThemeResolver(data_dirs=[tmp_path], locale='C', check_interval=None)
+
+
+class RecordingResolver:
+    """Wraps a resolver, keeping the proplists it resolves"""
+
+    def __init__(self, resolver: ThemeResolver):
+        self.resolver = resolver
+        self.resolved = []
+
+    def resolve_props(self, proplist, context_props=None):
+        proplist = self.resolver.resolve_props(proplist, context_props)
+        self.resolved.append(proplist)
+        return proplist
+
+
+def test_resolve_props_uses_default_theme(resolver, tmp_path):
+    proplist = resolver.resolve_props(PropList(event_id='bell'))
+    assert proplist[Props.MEDIA_FILENAME] == str(tmp_path / 'sounds/freedesktop/stereo/bell.oga')
+
+
+def test_resolve_props_prefers_proplist_over_context_props(resolver, tmp_path):
+    proplist = resolver.resolve_props(
+        PropList(event_id='bell', canberra_xdg_theme_name='custom'),
+        {'canberra.xdg-theme.name': 'freedesktop'},
+    )
+    assert proplist[Props.MEDIA_FILENAME] == str(tmp_path / 'sounds/custom/stereo/bell.oga')
+
+
+def test_context_theme_set_with_change_props(context, resolver, tmp_path):
+    recorder = context.resolver = RecordingResolver(resolver)
+    context.change_props(canberra_xdg_theme_name='custom')
+
+    context.play(event_id='bell')
+
+    proplist, = recorder.resolved
+    assert proplist[Props.MEDIA_FILENAME] == str(tmp_path / 'sounds/custom/stereo/bell.oga')
+
+
+def test_context_theme_changed_with_deferred_props(context, resolver, tmp_path):
+    recorder = context.resolver = RecordingResolver(resolver)
+    context.change_props(canberra_xdg_theme_name='custom', defer=True)
+
+    context.play(event_id='bell')
+
+    proplist, = recorder.resolved
+    assert proplist[Props.MEDIA_FILENAME] == str(tmp_path / 'sounds/custom/stereo/bell.oga')